@@ -0,0 +1,98 @@
+import io
+import json
+import time
+
+
+class BulkLoader:
+    """
+    Loads Flipside result pages into PostgreSQL through a COPY-fed staging table.
+    """
+
+    def load(self, conn, table_name, columns, primary_key, pages):
+        """
+        Streams pages of records into a temporary staging table with COPY FROM STDIN,
+        then moves them into the target table with a single INSERT ... SELECT.
+        The caller owns the transaction and is responsible for committing.
+        :param conn: An open psycopg2 connection.
+        :param table_name: Name of the target table.
+        :param columns: Dictionary of column names and their data types.
+        :param primary_key: Primary key of the target table.
+        :param pages: Iterable of record lists (dictionaries keyed by column name).
+        :return: Number of new rows inserted into the target table.
+        """
+        col_names = ", ".join(columns.keys())
+        staging_table = f"_stage_{table_name.replace('.', '_')}"
+        start_time = time.monotonic()
+        staged_rows = 0
+
+        with conn.cursor() as cur:
+            cur.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {staging_table}
+            (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP;
+            """)
+            cur.execute(f"TRUNCATE {staging_table};")
+
+            copy_sql = f"COPY {staging_table} ({col_names}) FROM STDIN WITH (FORMAT csv)"
+            for records in pages:
+                if not records:
+                    continue
+                buffer = io.StringIO()
+                for row in records:
+                    buffer.write(",".join(self.to_csv_field(row[col]) for col in columns.keys()))
+                    buffer.write("\n")
+                buffer.seek(0)
+                cur.copy_expert(copy_sql, buffer)
+                staged_rows += len(records)
+
+            cur.execute(f"""
+            INSERT INTO {table_name} ({col_names})
+            SELECT {col_names} FROM {staging_table}
+            ON CONFLICT ({primary_key}) DO NOTHING;
+            """)
+            inserted_rows = max(cur.rowcount, 0)
+
+        elapsed = time.monotonic() - start_time
+        rate = staged_rows / elapsed if elapsed > 0 else float(staged_rows)
+        print(
+            f"Loaded {staged_rows} rows into '{table_name}' ({inserted_rows} new) "
+            f"in {elapsed:.2f}s ({rate:,.0f} rows/s)"
+        )
+        return inserted_rows
+
+    @staticmethod
+    def to_csv_field(value):
+        """
+        Formats a single value as a CSV field understood by COPY.
+        NULLs are written as an unquoted empty field, everything else is quoted.
+        :param value: Python value returned by Flipside.
+        :return: CSV-encoded field.
+        """
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            text = "true" if value else "false"
+        elif isinstance(value, (list, tuple)):
+            text = BulkLoader.to_array_literal(value)
+        elif isinstance(value, dict):
+            text = json.dumps(value)
+        else:
+            text = str(value)
+        return '"' + text.replace('"', '""') + '"'
+
+    @staticmethod
+    def to_array_literal(values):
+        """
+        Formats a list the same way psycopg2 adapts it, as a PostgreSQL array literal.
+        :param values: List of values.
+        :return: Array literal such as {"a","b"}.
+        """
+        items = []
+        for item in values:
+            if item is None:
+                items.append("NULL")
+            elif isinstance(item, (list, tuple)):
+                items.append(BulkLoader.to_array_literal(item))
+            else:
+                text = json.dumps(item) if isinstance(item, dict) else str(item)
+                items.append('"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"')
+        return "{" + ",".join(items) + "}"
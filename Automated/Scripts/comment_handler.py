@@ -4,10 +4,19 @@ from twitter_handler import TwitterHandler
 import psycopg2
 from openai import OpenAI
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dao_twitter_responder import DAOTwitterResponder
 
 class CommentHandler: 
 
+    # Tweet IDs are snowflakes: milliseconds since this epoch, shifted left by 22 bits
+    TWITTER_EPOCH_MS = 1288834974657
+
+    # Replies posted whose comment could not be marked in the database yet, comment id -> reply id.
+    # Kept for the whole process, so later runs finish marking them instead of replying twice.
+    posted_replies = {}
+
     def __init__(self): 
         load_dotenv() 
         
@@ -28,30 +37,200 @@ class CommentHandler:
 
         self.dao_twitter_responder = DAOTwitterResponder() 
 
+        # Replies generated at the same time (Qdrant search + GPT-4o); posting stays one at a time
+        self.max_workers = 4
+
+        # Minimum seconds between two posted replies
+        self.post_interval = 2
+        self.last_post_at = 0.0
+
+        # Times a comment is tried before it is given up on (deleted comments, replies limited by the author)
+        self.max_attempts = 3
+        self.columns_ready = False
+
+        # Threads stay active until recent search can no longer reach their replies
+        self.thread_ttl_days = 7
+        self.tables_ready = False
+
+
+    def ensure_columns(self):
+        """
+        Adds the retry bookkeeping columns to twitter_comments if missing:
+        attempts (failed tries), reply_text (generated reply not yet posted) and reply_id (posted reply).
+        The DDL is committed before it is marked done.
+        """
+        if self.columns_ready:
+            return
+        with psycopg2.connect(**self.db_config) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                ALTER TABLE twitter_comments ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+                ALTER TABLE twitter_comments ADD COLUMN IF NOT EXISTS reply_text TEXT;
+                ALTER TABLE twitter_comments ADD COLUMN IF NOT EXISTS reply_id TEXT;
+                """)
+                conn.commit()
+        self.columns_ready = True
+
+
+    def ensure_tables(self):
+        """
+        Creates the thread tracking table and the conversation_id column on twitter_comments if missing.
+        The DDL is committed in its own transaction, so a later failing statement cannot roll it back.
+        """
+        if self.tables_ready:
+            return
+        with psycopg2.connect(**self.db_config) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                CREATE TABLE IF NOT EXISTS twitter_threads (
+                    tweet_id TEXT PRIMARY KEY,
+                    proposal_title TEXT,
+                    space_id TEXT,
+                    proposal_description TEXT,
+                    dao_name TEXT,
+                    since_id TEXT,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    expires_at TIMESTAMPTZ NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS twitter_threads_expires_at ON twitter_threads (expires_at);
+                ALTER TABLE twitter_comments ADD COLUMN IF NOT EXISTS conversation_id TEXT;
+                """)
+                conn.commit()
+
+        # Only set once the DDL is committed
+        self.tables_ready = True
+
+
+    @classmethod
+    def snowflake_ms(cls, tweet_id):
+        """
+        Creation time of a tweet in epoch milliseconds, read from its ID.
+        """
+        return (int(tweet_id) >> 22) + cls.TWITTER_EPOCH_MS
+
+    @classmethod
+    def snowflake_floor(cls, epoch_ms):
+        """
+        Smallest tweet ID created at or after a time in epoch milliseconds.
+        """
+        return (int(epoch_ms) - cls.TWITTER_EPOCH_MS) << 22
+
+    def expires_ms(self, tweet_id):
+        """
+        Time a thread root leaves the recent search window: its creation time plus thread_ttl_days.
+        """
+        return self.snowflake_ms(tweet_id) + self.thread_ttl_days * 24 * 60 * 60 * 1000
+
+
+    def track_thread(self, cursor, tweet_id, proposal_title, space_id, proposal_description, dao_name):
+        """
+        Registers a thread root whose comments are collected until it expires. Known threads are left unchanged.
+        The expiry is measured from the tweet's own creation time, so roots already past it are not registered.
+        The cursor starts at the root itself, since every reply has a larger ID, so the first poll is already incremental.
+        :return: True if the root is still within the recent search window.
+        """
+        expires_ms = self.expires_ms(tweet_id)
+        if expires_ms <= time.time() * 1000:
+            return False
+        cursor.execute(
+            """
+            INSERT INTO twitter_threads (tweet_id, proposal_title, space_id, proposal_description, dao_name, since_id, expires_at)
+            VALUES (%s, %s, %s, %s, %s, %s, TO_TIMESTAMP(%s / 1000.0))
+            ON CONFLICT (tweet_id) DO NOTHING;
+            """,
+            (str(tweet_id), proposal_title, space_id, proposal_description, dao_name, str(tweet_id), expires_ms)
+        )
+        return True
+
+
+    @staticmethod
+    def proposal_context(thread):
+        """
+        Extra context passed to the responder for comments on a thread.
+        :param thread: Dictionary with proposal_title, space_id and proposal_description.
+        """
+        return f"Response to {thread['proposal_title']} from {thread['space_id']} with Proposal Description: {thread['proposal_description']}"
+
 
     def add_comments_to_db(self): 
-        
+        """
+        Stores the comments posted since the last run on every active thread.
+        Threads are polled with OR-combined conversation_id searches, so API calls grow with the number
+        of query batches rather than the number of threads. After a successful search every thread of the
+        batch advances to the newest ID returned, once the comments are committed.
+        """
         try: 
-            tweet_id = self.get_tweet_id()["tweet_id"]
-            comments = self.twitter_handler.get_comments_on_post(tweet_id) 
-            if not comments: 
-                 print("There are no comments to add")
-                 return 
-            
+            self.ensure_tables()
             with psycopg2.connect(**self.db_config) as conn: 
                 with conn.cursor() as cursor: 
 
-                    query = """
-                    INSERT INTO twitter_comments (id, text, responded)
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT (id) DO NOTHING;
-                    """
-
-                    cursor.executemany(query, comments) 
-
+                    # Threads posted before tracking existed are picked up from current_tweet.json
+                    post_data = self.get_tweet_id()
+                    if post_data:
+                        self.track_thread(cursor, post_data["tweet_id"], post_data["proposal_title"], post_data["space_id"],
+                                          post_data["proposal_description"], post_data["dao_name"])
                     conn.commit()
-                    print(f"Inserted {cursor.rowcount} comments into the database.")
-                    
+
+                    cursor.execute("""
+                    SELECT tweet_id, COALESCE(since_id, tweet_id)
+                    FROM twitter_threads
+                    WHERE expires_at > NOW()
+                    ORDER BY tweet_id;
+                    """)
+                    # Rows registered before expiry followed the tweet's age are filtered on the snowflake too
+                    now_ms = time.time() * 1000
+                    since_ids = {tweet_id: since_id for tweet_id, since_id in cursor.fetchall() if self.expires_ms(tweet_id) > now_ms}
+
+            if not since_ids:
+                print("There are no active threads to poll")
+                return
+
+            # Recent search rejects a since_id older than its 7 day window, so cursors are clamped just inside it
+            floor_id = self.snowflake_floor(time.time() * 1000 - (self.thread_ttl_days * 24 - 1) * 60 * 60 * 1000)
+
+            inserted = 0
+            batches = self.twitter_handler.conversation_batches(list(since_ids))
+            while batches:
+                batch = batches.pop(0)
+
+                # One since_id per search: the oldest cursor of the batch
+                since_id = str(max(min(int(since_ids[tweet_id]) for tweet_id in batch), floor_id))
+
+                comments = self.twitter_handler.get_comments_on_post(batch, since_id)
+                if comments is None and len(batch) > 1:
+                    # Split a failed batch so one bad root cannot block the threads searched with it
+                    middle = len(batch) // 2
+                    batches[:0] = [batch[:middle], batch[middle:]]
+                    continue
+                if not comments:
+                    continue  # Nothing new, or the fetch failed and is retried from the same since_id
+
+                # The search covered every thread of the batch, so all of them move up to its newest result
+                newest = max(int(comment[0]) for comment in comments)
+
+                with psycopg2.connect(**self.db_config) as conn: 
+                    with conn.cursor() as cursor: 
+
+                        query = """
+                        INSERT INTO twitter_comments (id, text, responded, conversation_id)
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (id) DO NOTHING;
+                        """
+
+                        cursor.executemany(query, comments) 
+                        inserted += cursor.rowcount
+
+                        # A batch searches from its oldest since_id, so a thread's cursor must never move back
+                        cursor.executemany(
+                            """
+                            UPDATE twitter_threads SET since_id = %s
+                            WHERE tweet_id = %s AND (since_id IS NULL OR since_id::NUMERIC < %s);
+                            """,
+                            [(str(newest), tweet_id, newest) for tweet_id in batch]
+                        )
+                        conn.commit()
+
+            print(f"Inserted {inserted} comments into the database.")
                          
         except Exception as e:
             print(f"Error in store_comments(): {e}")
@@ -60,44 +239,177 @@ class CommentHandler:
 
     def respond_to_comments(self): 
         """
-        Fetches all comments with the responded field set to FALSE.
-        :return: List of unresponded comments as tuples (id, text, responded).
+        Replies to every comment with the responded field set to FALSE.
+        All comments are embedded together, replies are generated max_workers at a time, and each reply
+        is posted as soon as it is ready, one post at a time. A comment is marked responded only once its
+        reply is posted. Failures are retried by later runs up to max_attempts times and only while the
+        thread is active; a reply that was generated but not posted is kept and reposted without a new completion.
         """
+        # Replies already posted whose comment could not be marked last time
+        for comment_id, reply_id in list(self.posted_replies.items()):
+            if self.mark_responded(comment_id, reply_id):
+                self.posted_replies.pop(comment_id, None)
+
         try:
+            self.ensure_columns()
+            self.ensure_tables()
             with psycopg2.connect(**self.db_config) as conn:
                 with conn.cursor() as cursor:
-                    # SQL query to select comments where responded is FALSE
+                    # SQL query to select comments where responded is FALSE and that may still be retried,
+                    # with their thread's proposal
                     query = """
-                    SELECT id, text, responded
-                    FROM twitter_comments
-                    WHERE responded = FALSE;
-                    """
-
-                    cursor.execute(query)
-                    comments = cursor.fetchall()
-
-                    # SQL query to update already selected 
-                    update_query = """
-                        UPDATE twitter_comments
-                        SET responded = TRUE
-                        WHERE responded = FALSE;
+                    SELECT c.id, c.text, c.reply_text,
+                           t.tweet_id, t.proposal_title, t.space_id, t.proposal_description, t.dao_name
+                    FROM twitter_comments c
+                    LEFT JOIN twitter_threads t ON t.tweet_id = c.conversation_id
+                    WHERE c.responded = FALSE
+                      AND c.reply_id IS NULL
+                      AND c.attempts < %s
+                      AND (t.expires_at IS NULL OR t.expires_at > NOW());
                     """
 
-                    cursor.execute(update_query)
-            
-            # returns information about the orignal post
-            post_data = self.get_tweet_id() 
-            
-            for comment in comments:
-                reply = self.dao_twitter_responder.generate_response(comment[1], post_data['dao_name'], f"Response to {post_data['proposal_title']} from {post_data['space_id']} with Proposal Description: {post_data['proposal_description']}")
-            
-                self.twitter_handler.post_thread_reply(reply, comment[0])
-                print(reply) 
-                    
-                    
-
+                    cursor.execute(query, (self.max_attempts,))
+                    rows = [row for row in cursor.fetchall() if row[0] not in self.posted_replies]
         except Exception as e:
             print(f"Error fetching unresponded comments: {e}")
+            return
+
+        if not rows:
+            print("There are no comments to respond to")
+            return
+
+        # Comments stored before threads were tracked fall back to the latest post in current_tweet.json
+        fallback = self.get_tweet_id()
+        comments = []
+        cached_replies = []
+        threads = {}
+        for comment_id, text, reply_text, tweet_id, proposal_title, space_id, proposal_description, dao_name in rows:
+            if reply_text is not None:
+                cached_replies.append((comment_id, reply_text))
+                continue
+            if tweet_id is not None:
+                thread = {"tweet_id": tweet_id, "proposal_title": proposal_title, "space_id": space_id,
+                          "proposal_description": proposal_description, "dao_name": dao_name}
+            elif fallback:
+                thread = fallback
+            else:
+                print(f"No thread found for comment {comment_id}. Skipping...")
+                continue
+            threads.setdefault(str(thread["tweet_id"]), thread)
+            comments.append((comment_id, text, str(thread["tweet_id"])))
+
+        # Comments of one thread share its context, so they are embedded together
+        query_vectors = {}
+        for tweet_id, thread in threads.items():
+            thread_comments = [comment for comment in comments if comment[2] == tweet_id]
+            try:
+                vectors = self.dao_twitter_responder.get_query_vectors(
+                    [comment[1] for comment in thread_comments], self.proposal_context(thread)
+                )
+            except Exception as e:
+                print(f"Error embedding comments on thread {tweet_id}: {e}")
+                for comment in thread_comments:
+                    self.record_failure(comment[0])
+                continue
+            for comment, vector in zip(thread_comments, vectors):
+                query_vectors[comment[0]] = vector
+        comments = [comment for comment in comments if comment[0] in query_vectors]
+
+        posted = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self.dao_twitter_responder.build_response, comment[1], threads[comment[2]]['dao_name'],
+                    self.proposal_context(threads[comment[2]]), query_vectors[comment[0]]
+                ): comment
+                for comment in comments
+            }
+
+            # Replies generated by an earlier run whose post failed go out while the new ones are generated
+            for comment_id, reply in cached_replies:
+                if self.post_reply(comment_id, reply):
+                    posted += 1
+
+            for future in as_completed(futures):
+                comment = futures[future]
+                try:
+                    reply = future.result()
+                except Exception as e:
+                    print(f"Error generating reply to comment {comment[0]}: {e}")
+                    self.record_failure(comment[0])
+                    continue
+
+                if self.post_reply(comment[0], reply):
+                    posted += 1
+
+        print(f"Responded to {posted} of {len(rows)} comments.")
+
+
+    def post_reply(self, comment_id, reply):
+        """
+        Posts a reply at least post_interval seconds after the previous one and records it.
+        A failed post counts as an attempt and keeps the reply for the next one. A reply that was posted
+        but could not be recorded is remembered in posted_replies, so it is never posted twice.
+        :param comment_id: ID of the comment being replied to.
+        :param reply: Reply text.
+        :return: True if the reply was posted.
+        """
+        wait = self.post_interval - (time.monotonic() - self.last_post_at)
+        if wait > 0:
+            time.sleep(wait)
+        reply_id = self.twitter_handler.post_thread_reply(reply, comment_id)
+        self.last_post_at = time.monotonic()
+        print(reply) 
+
+        if reply_id is None:
+            self.record_failure(comment_id, reply)
+            return False
+        if not self.mark_responded(comment_id, reply_id):
+            self.posted_replies[comment_id] = reply_id
+        return True
+
+
+    def record_failure(self, comment_id, reply=None):
+        """
+        Counts a failed attempt at a comment, keeping the generated reply (if any) for the next attempt.
+        :param comment_id: ID of the comment.
+        :param reply: Reply text that was generated but could not be posted.
+        """
+        try:
+            with psycopg2.connect(**self.db_config) as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "UPDATE twitter_comments SET attempts = attempts + 1, reply_text = COALESCE(%s, reply_text) WHERE id = %s;",
+                        (reply, comment_id)
+                    )
+                    conn.commit()
+        except Exception as e:
+            print(f"Error recording failed attempt for comment {comment_id}: {e}")
+
+
+    def mark_responded(self, comment_id, reply_id, retries=3):
+        """
+        Marks a single comment as responded, storing the posted reply's ID in the same write.
+        The write is retried, since a comment left unmarked would be replied to again.
+        :param comment_id: ID of the comment that was replied to.
+        :param reply_id: ID of the posted reply.
+        :param retries: Attempts before giving up.
+        :return: True if the comment was updated.
+        """
+        for attempt in range(retries):
+            try:
+                with psycopg2.connect(**self.db_config) as conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute(
+                            "UPDATE twitter_comments SET responded = TRUE, reply_id = %s WHERE id = %s;",
+                            (str(reply_id), comment_id)
+                        )
+                        conn.commit()
+                        return cursor.rowcount == 1
+            except Exception as e:
+                print(f"Error marking comment {comment_id} as responded (attempt {attempt + 1}/{retries}): {e}")
+                time.sleep(2 ** attempt)
+        return False
 
 
     def set_tweet_id(self, tweet_id, proposal_title, space_id, proposal_description, dao_name):
@@ -124,6 +436,17 @@ class CommentHandler:
         except Exception as e:
             print(f"Error writing to {self.json_file_path}: {e}") 
 
+        # Comments keep being collected on this thread alongside the other active ones
+        try:
+            self.ensure_tables()
+            with psycopg2.connect(**self.db_config) as conn:
+                with conn.cursor() as cursor:
+                    if not self.track_thread(cursor, tweet_id, proposal_title, space_id, proposal_description, dao_name):
+                        print(f"Tweet {tweet_id} is older than {self.thread_ttl_days} days; its comments are not collected")
+                    conn.commit()
+        except Exception as e:
+            print(f"Error tracking thread {tweet_id}: {e}")
+
 
     def get_tweet_id(self):
         """
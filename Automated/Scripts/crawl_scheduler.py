@@ -0,0 +1,219 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from rate_limiter import RateLimiter
+
+
+class CrawlScheduler:
+    """
+    Global work queue for crawls that span many hosts.
+    A single pool of workers runs tasks highest priority first across all hosts, while each host keeps
+    its own concurrency cap and request rate, so many forums are crawled at once without any one of
+    them seeing more than its share. Queue depth and per-host throughput are reported as it runs.
+    """
+
+    def __init__(self, workers=None, max_per_host=None, requests_per_second=None, burst=None, stats_interval=60):
+        """
+        Initializes the scheduler. Defaults are read from the environment:
+          CRAWL_WORKERS (default 16), CRAWL_MAX_PER_HOST (default 2),
+          CRAWL_REQUESTS_PER_SECOND (default 2) and CRAWL_BURST (default 4), all per host except the workers.
+        :param workers: Number of worker threads shared by every host.
+        :param max_per_host: Tasks allowed to run at the same time against one host.
+        :param requests_per_second: Requests per second allowed against one host.
+        :param burst: Requests that may be sent back to back to one host.
+        :param stats_interval: Seconds between progress reports while running; 0 disables them.
+        """
+        self.workers = workers or int(os.getenv("CRAWL_WORKERS", "16"))
+        self.max_per_host = max_per_host or int(os.getenv("CRAWL_MAX_PER_HOST", "2"))
+        self.requests_per_second = requests_per_second or float(os.getenv("CRAWL_REQUESTS_PER_SECOND", "2"))
+        self.burst = burst or float(os.getenv("CRAWL_BURST", "4"))
+        self.stats_interval = stats_interval
+
+        self.condition = threading.Condition()
+        self.queues = {}        # host -> heap of (priority, sequence, func, args, on_error)
+        self.in_flight = {}     # host -> running tasks
+        self.host_limits = {}   # host -> concurrency cap overriding max_per_host
+        self.limiters = {}      # host -> RateLimiter
+        self.host_stats = {}    # host -> counters
+        self.sequence = itertools.count()
+        self.started_at = None
+
+    @staticmethod
+    def host_of(url):
+        """
+        Host a URL is scheduled under.
+        """
+        return urlsplit(url).netloc.lower()
+
+    def get_host_stats(self, host):
+        """
+        Counters of a host, created on first use. Callers must hold the condition.
+        """
+        stats = self.host_stats.get(host)
+        if stats is None:
+            stats = {"tasks_done": 0, "tasks_failed": 0, "requests": 0, "request_errors": 0, "first_request_at": None}
+            self.host_stats[host] = stats
+        return stats
+
+    def set_host_limit(self, host, max_concurrency):
+        """
+        Override the concurrency cap of one host, e.g. for a local service or a fragile forum.
+        """
+        with self.condition:
+            self.host_limits[host] = max_concurrency
+            self.condition.notify_all()
+
+    def limiter(self, host):
+        """
+        Rate limiter of a host, created on first use; callers acquire it before each request.
+        """
+        with self.condition:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                limiter = RateLimiter(self.requests_per_second, self.burst)
+                self.limiters[host] = limiter
+            return limiter
+
+    def submit(self, host, priority, func, *args, on_error=None):
+        """
+        Queue a task. Tasks may submit further tasks while they run.
+        :param host: Host the task talks to; its concurrency cap applies.
+        :param priority: Sortable value, lower runs first across every host.
+        :param func: Callable run by a worker with *args.
+        :param on_error: Optional callable receiving the exception if the task raises.
+        """
+        with self.condition:
+            heapq.heappush(self.queues.setdefault(host, []), (priority, next(self.sequence), func, args, on_error))
+            self.condition.notify()
+
+    def record_request(self, host, ok):
+        """
+        Count one request sent to a host.
+        :param ok: Whether the request succeeded.
+        """
+        with self.condition:
+            stats = self.get_host_stats(host)
+            stats["requests"] += 1
+            if not ok:
+                stats["request_errors"] += 1
+            if stats["first_request_at"] is None:
+                stats["first_request_at"] = time.monotonic()
+
+    def next_task(self):
+        """
+        Highest priority task of a host with a free slot. Callers must hold the condition.
+        :return: Tuple of (host, entry), or None if no host can take a task right now.
+        """
+        best = None
+        for host, queue in self.queues.items():
+            if queue and self.in_flight.get(host, 0) < self.host_limits.get(host, self.max_per_host):
+                if best is None or queue[0] < self.queues[best][0]:
+                    best = host
+        if best is None:
+            return None
+        return best, heapq.heappop(self.queues[best])
+
+    def worker(self):
+        """
+        Run tasks until every queue is empty and nothing is running.
+        """
+        while True:
+            with self.condition:
+                while True:
+                    task = self.next_task()
+                    if task is not None:
+                        break
+                    if not any(self.queues.values()) and not any(self.in_flight.values()):
+                        self.condition.notify_all()
+                        return
+                    self.condition.wait()
+                host, (_, _, func, args, on_error) = task
+                self.in_flight[host] = self.in_flight.get(host, 0) + 1
+
+            failed = False
+            try:
+                func(*args)
+            except Exception as e:
+                failed = True
+                print(f"Task {getattr(func, '__name__', func)} for {host} failed: {e}")
+                if on_error is not None:
+                    try:
+                        on_error(e)
+                    except Exception as callback_error:
+                        print(f"Error handler for {host} failed: {callback_error}")
+            finally:
+                with self.condition:
+                    self.in_flight[host] -= 1
+                    stats = self.get_host_stats(host)
+                    stats["tasks_failed" if failed else "tasks_done"] += 1
+                    self.condition.notify_all()
+
+    def stats(self):
+        """
+        Snapshot of queue depth and per-host throughput.
+        :return: Dictionary with the queued and running task totals and a "hosts" dictionary of per-host counters.
+        """
+        now = time.monotonic()
+        with self.condition:
+            hosts = {}
+            for host in set(self.queues) | set(self.host_stats):
+                counters = self.get_host_stats(host)
+                elapsed = now - counters["first_request_at"] if counters["first_request_at"] else 0
+                hosts[host] = {
+                    "queued": len(self.queues.get(host, [])),
+                    "in_flight": self.in_flight.get(host, 0),
+                    "tasks_done": counters["tasks_done"],
+                    "tasks_failed": counters["tasks_failed"],
+                    "requests": counters["requests"],
+                    "request_errors": counters["request_errors"],
+                    "requests_per_second": round(counters["requests"] / elapsed, 2) if elapsed > 0 else 0.0
+                }
+            return {
+                "queued": sum(h["queued"] for h in hosts.values()),
+                "in_flight": sum(h["in_flight"] for h in hosts.values()),
+                "elapsed_seconds": round(now - self.started_at, 1) if self.started_at else 0.0,
+                "hosts": hosts
+            }
+
+    def report(self):
+        """
+        Print queue depth and the throughput of every host that has work or has sent requests.
+        """
+        stats = self.stats()
+        print(f"Crawl queue: {stats['queued']} queued, {stats['in_flight']} running, {stats['elapsed_seconds']}s elapsed")
+        for host, counters in sorted(stats["hosts"].items(), key=lambda item: -item[1]["requests"]):
+            print(
+                f"  {host}: {counters['queued']} queued, {counters['in_flight']} running, "
+                f"{counters['tasks_done']} done, {counters['tasks_failed']} failed, "
+                f"{counters['requests']} requests ({counters['request_errors']} errors), "
+                f"{counters['requests_per_second']} req/s"
+            )
+
+    def run(self):
+        """
+        Run queued tasks, and everything they submit, to completion.
+        :return: Final stats, as returned by stats().
+        """
+        self.started_at = time.monotonic()
+        finished = threading.Event()
+
+        def reporter():
+            while not finished.wait(self.stats_interval):
+                self.report()
+
+        if self.stats_interval:
+            threading.Thread(target=reporter, daemon=True).start()
+
+        threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        finished.set()
+        self.report()
+        return self.stats()
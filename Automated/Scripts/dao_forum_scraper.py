@@ -1,14 +1,25 @@
 import requests
 from datetime import datetime, timezone
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from openai import OpenAI
 import uuid
 import os
 from dotenv import load_dotenv
-import time
+import json
+import threading
+from source_registry import SourceRegistry
+from seen_post_index import SeenPostIndex
+from embedding_batcher import EmbeddingBatcher
+from text_chunker import TextChunker
+from http_client import HttpClient
+from crawl_scheduler import CrawlScheduler
+from qdrant_collection import QdrantCollection
 
 
 class DAOForumScraper:
+
+    # Namespace of the deterministic point IDs derived from (dao, topic_id, comment_id, part_index)
+    POINT_ID_NAMESPACE = uuid.UUID("9ba40a3d-1e00-4f04-a638-a318ecb79730")
+
     def __init__(self, qdrant_host="http://localhost:6333", collection_name="dao_forum_collection"):
         """Initialize the DAO scraper with OpenAI and Qdrant configurations."""
         load_dotenv() 
@@ -16,67 +27,88 @@ class DAOForumScraper:
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.qdrant_host = qdrant_host
         self.collection_name = collection_name
-        self.chunk_size = 3000
-        self.max_threads = 5
+        self.text_chunker = TextChunker(max_tokens=500, overlap_tokens=50)
+
+        # Global work queue of the current run; per-host rate and concurrency limits come from CRAWL_* env settings
+        self.scheduler = None
+        self.crawled = []
+        self.crawled_lock = threading.Lock()
+
+        # Forums embedded and uploaded at the same time, each through the embedding batcher
+        self.ingest_concurrency = 2
+
+        # Forums to crawl, with their priority and refresh interval
+        self.sources = SourceRegistry()
 
-        # Ensure the Qdrant collection exists
-        # self.create_qdrant_collection()
+        # Bump cursor and per-topic last_posted_at/posts_count/max_post_id for each forum
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.crawl_state_file = os.path.join(script_dir, "../config/forum_crawl_state.json")
+        self.crawl_state_lock = threading.Lock()
+        self.post_batch_size = 20
+
+        # Posts already stored in Qdrant, checked before embedding
+        self.seen_posts = SeenPostIndex()
+
+        # New posts are embedded in batches, embed_window posts at a time
+        self.embedding_batcher = EmbeddingBatcher(self.client)
+        self.embed_window = 500
+
+        # Points sent to Qdrant per upsert request
+        self.upsert_batch_size = 256
+
+        # Pooled keep-alive sessions with per-host concurrency caps, shared with the other clients
+        self.http = HttpClient.shared()
 
     def safe_request(self, method, url, retries=3, **kwargs):
-        """Wrapper for requests with retries and timeout handling."""
-        for attempt in range(retries):
-            try:
-                response = requests.request(method, url, timeout=10, **kwargs)
-                response.raise_for_status()
-                return response  # Return response if successful
-            except requests.Timeout:
-                print(f"Timeout error on attempt {attempt+1}/{retries} for {url}")
-            except requests.RequestException as e:
-                print(f"Request error on attempt {attempt+1}/{retries}: {e}")
-            time.sleep(1)  # Wait before retrying
-        return None  # Return None after all retries fail
+        """Send a request through the shared HTTP client; returns the response only if it succeeded."""
+        try:
+            response = self.http.request(method, url, retries=retries, **kwargs)
+        except requests.RequestException as e:
+            print(f"Request failed after {retries} attempts for {url}: {e}")
+            return None
+        if not response.ok:
+            print(f"Request to {url} failed with status {response.status_code}")
+            return None
+        return response
 
 
     def create_qdrant_collection(self):
-        """Ensure the collection exists in Qdrant."""
-        url = f"{self.qdrant_host}/collections/{self.collection_name}"
-        payload = {"vectors": {"size": 1536, "distance": "Cosine"}}
-        response = requests.put(url, json=payload)
-        if response.status_code in [200, 201]:
-            print(f"Collection '{self.collection_name}' is ready.")
-        else:
-            print(f"Failed to create or access the collection: {response.text}")
-
-    def get_embedding(self, text):
-        """Get OpenAI embeddings for a given text."""
-        embeddings = []
-        parts = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
-        
-        for part in parts:
-            try:
-                response = self.client.embeddings.create(model="text-embedding-ada-002", input=part)
-                embeddings.append(response.data[0].embedding)
-            except Exception as e:
-                print(f"Error embedding text: {e}")
-                return None
-        return embeddings
+        """Ensure the collection exists in Qdrant with its index settings and payload indexes."""
+        try:
+            QdrantCollection(self.qdrant_host, self.collection_name).ensure()
+            return True
+        except (RuntimeError, requests.RequestException) as e:
+            print(f"Failed to create or access the collection: {e}")
+            return False
 
     def fetch_json(self, url):
-        """Fetch JSON data from a given URL with error handling."""
-        response = self.safe_request("GET", url)
+        """Fetch JSON data from a given URL with error handling, within the host's rate limit when crawling."""
+        if self.scheduler is None:
+            response = self.safe_request("GET", url)
+        else:
+            host = CrawlScheduler.host_of(url)
+            response = self.safe_request("GET", url, limiter=self.scheduler.limiter(host))
+            self.scheduler.record_request(host, response is not None)
         if response:
             return response.json()  # Return valid JSON response
         return None  # Return None if request failed
 
 
+    def json_url(self, base_url, path):
+        """Build the JSON endpoint for a forum path such as more_topics_url, which omits the .json suffix."""
+        route, _, query = path.partition("?")
+        if not route.endswith(".json"):
+            route = f"{route}.json"
+        return f"{base_url}{route}?{query}" if query else f"{base_url}{route}"
+
     def fetch_all_categories(self, base_url):
-        """Fetch all categories from the DAO forum."""
+        """Fetch all categories from the DAO forum; None if the listing failed."""
         url = f"{base_url}/categories.json"
         data = self.fetch_json(url)
-        return [cat.get("id") for cat in data.get("category_list", {}).get("categories", [])] if data else []
+        return [cat.get("id") for cat in data.get("category_list", {}).get("categories", [])] if data else None
 
     def fetch_category_topics(self, base_url, category_id):
-        """Fetch topics from a specific category."""
+        """Fetch topics from a specific category; returns the topics and whether every page was fetched."""
         url = f"{base_url}/c/{category_id}.json"
         topics = []
         while url:
@@ -85,16 +117,77 @@ class DAOForumScraper:
                 topics.extend(data.get("topic_list", {}).get("topics", []))
                 url = data.get("topic_list", {}).get("more_topics_url")
                 if url:
-                    url = f"{base_url}{url}"
+                    url = self.json_url(base_url, url)
             else:
-                break
+                return topics, False
+        return topics, True
+
+    def fetch_latest_topics(self, base_url, bumped_since):
+        """Fetch topics bumped after bumped_since, newest bump first, from /latest."""
+        url = f"{base_url}/latest.json?order=activity"
+        topics = []
+        while url:
+            data = self.fetch_json(url)
+            if not data:
+                return None  # Caller falls back to a full crawl
+            page = data.get("topic_list", {}).get("topics", [])
+            for topic in page:
+                # Pinned topics are listed first whatever their bump time
+                if not topic.get("pinned") and (topic.get("bumped_at") or "") <= bumped_since:
+                    return topics
+                if (topic.get("bumped_at") or "") > bumped_since:
+                    topics.append(topic)
+            url = data.get("topic_list", {}).get("more_topics_url")
+            if url:
+                url = self.json_url(base_url, url)
         return topics
 
-    def fetch_topic_posts(self, base_url, topic_id):
-        """Fetch all posts from a topic."""
-        url = f"{base_url}/t/{topic_id}.json"
-        data = self.fetch_json(url)
-        return data.get("post_stream", {}).get("posts", []) if data else []
+    def fetch_topic_posts(self, base_url, topic_id, after_post_id=0):
+        """
+        Fetch the posts of a topic newer than after_post_id.
+        Uses the topic's post_ids stream and only requests the posts not included in the first chunk.
+        Returns (posts, topic) or (None, None) if the topic could not be fetched.
+        """
+        data = self.fetch_json(f"{base_url}/t/{topic_id}.json")
+        if not data:
+            return None, None
+
+        post_stream = data.get("post_stream", {})
+        new_ids = [post_id for post_id in post_stream.get("stream", []) if post_id > after_post_id]
+        posts = {post["id"]: post for post in post_stream.get("posts", []) if post["id"] > after_post_id}
+
+        missing = [post_id for post_id in new_ids if post_id not in posts]
+        for i in range(0, len(missing), self.post_batch_size):
+            batch = missing[i:i + self.post_batch_size]
+            query = "&".join(f"post_ids[]={post_id}" for post_id in batch)
+            batch_data = self.fetch_json(f"{base_url}/t/{topic_id}/posts.json?{query}")
+            if not batch_data:
+                return None, None
+            for post in batch_data.get("post_stream", {}).get("posts", []):
+                posts[post["id"]] = post
+
+        return [posts[post_id] for post_id in new_ids if post_id in posts], data
+
+    def load_crawl_state(self):
+        """Load each forum's bump cursor and per-topic crawl state."""
+        if os.path.exists(self.crawl_state_file):
+            try:
+                with open(self.crawl_state_file, "r") as file:
+                    return json.load(file)
+            except Exception as e:
+                print(f"Error loading JSON file {self.crawl_state_file}: {e}")
+        return {}
+
+    def save_forum_state(self, base_url, forum_state):
+        """Save one forum's crawl state; forums are crawled in parallel so the file is rewritten under a lock."""
+        with self.crawl_state_lock:
+            state = self.load_crawl_state()
+            state[base_url] = forum_state
+            try:
+                with open(self.crawl_state_file, "w") as file:
+                    json.dump(state, file)
+            except Exception as e:
+                print(f"Error saving JSON file {self.crawl_state_file}: {e}")
 
     def iso_to_epoch_milliseconds(self, iso_timestamp):
         """Convert ISO 8601 timestamp to epoch time in milliseconds."""
@@ -106,9 +199,9 @@ class DAOForumScraper:
             print(f"Error converting timestamp: {iso_timestamp}, error: {e}")
             return None
 
-    def record_exists(self, dao_name, topic_id, comment_id):
-        """Check if a record with the same metadata exists in Qdrant."""
-        url = f"{self.qdrant_host}/collections/{self.collection_name}/points/scroll"
+    def delete_post_points(self, dao_name, topic_id, comment_id):
+        """Delete every stored part of a post from Qdrant before it is re-embedded."""
+        url = f"{self.qdrant_host}/collections/{self.collection_name}/points/delete?wait=true"
         query = {
             "filter": {
                 "must": [
@@ -116,140 +209,303 @@ class DAOForumScraper:
                     {"key": "topic_id", "match": {"value": topic_id}},
                     {"key": "comment_id", "match": {"value": comment_id}},
                 ]
-            },
-            "limit": 1
+            }
         }
-        response = self.safe_request("POST", url, json=query)
-        if response:
-            points = response.json().get("result", {}).get("points", [])
-            return len(points) > 0
-        return False
-
-    def upload_to_qdrant(self, post, topic, dao, base_url):
-        """Upload a post's metadata and embedding to Qdrant."""
-        content = post.get("cooked", "").replace("\n", " ")
-        combined_text = f"Topic: {topic['title']}\nAuthor: {post['username']}\nComment: {content}"
-        embeddings = self.get_embedding(combined_text)
-        
-        if embeddings is None:
-            print(f"Skipping upload for {topic['title']} due to embedding error.")
-            return
+        return self.safe_request("POST", url, json=query) is not None
+
+    def prepare_post(self, post, topic, dao):
+        """
+        Build what is needed to embed a post, or return None if its content is already stored.
+        The post's HTML is stripped to text without quoted replies and split into token-bounded chunks.
+        Posts whose content hash is in the seen-post index are skipped before any network call.
+        """
+        content, chunks = self.text_chunker.chunk_html(post.get("cooked", ""))
+        content_hash = SeenPostIndex.content_hash(content)
+        stored_hash = self.seen_posts.get_hash(dao, topic["id"], post["id"])
+        if stored_hash == content_hash:
+            return None  # Skip duplicate
 
+        header = f"Topic: {topic['title']}\nAuthor: {post['username']}\nComment: "
+        return {
+            "post": post,
+            "topic": topic,
+            "content_hash": content_hash,
+            "stored_hash": stored_hash,
+            "chunks": chunks,
+            "parts": [header + chunk for chunk in chunks]
+        }
+
+    def point_id(self, dao, topic_id, comment_id, part_index):
+        """Deterministic Qdrant point ID of one part of a post, so re-ingesting a post overwrites it."""
+        return str(uuid.uuid5(self.POINT_ID_NAMESPACE, f"{dao}:{topic_id}:{comment_id}:{part_index}"))
+
+    def build_points(self, item, embeddings, dao, base_url):
+        """Build the Qdrant points of a prepared post, one per embedded part."""
+        post = item["post"]
+        topic = item["topic"]
         epoch_timestamp = self.iso_to_epoch_milliseconds(post.get("created_at", ""))
-        vector_id = str(uuid.uuid4())
-
-        if self.record_exists(dao, topic["id"], post["id"]):
-            print(f"Record already exists for DAO: {dao}, Topic ID: {topic['id']}, Comment ID: {post['id']}. Skipping...")
-            return  # Skip duplicate
-
-        for idx, embedding in enumerate(embeddings):
-            payload = {
-                "points": [{
-                    "id": vector_id,
-                    "vector": embedding,
-                    "payload": {
-                        "dao_name": dao,
-                        "comment_id": post["id"],
-                        "content": content,
-                        "part_index": idx,
-                        "author": post["username"],
-                        "topic_id": topic["id"],
-                        "topic_title": topic["title"],
-                        "timestamp": epoch_timestamp,
-                        "source_url": f"{base_url}/t/{topic['id']}",
-                    },
-                }]
+
+        return [
+            {
+                "id": self.point_id(dao, topic["id"], post["id"], idx),
+                "vector": embedding,
+                "payload": {
+                    "dao_name": dao,
+                    "comment_id": post["id"],
+                    "content": item["chunks"][idx],
+                    "content_hash": item["content_hash"],
+                    "part_index": idx,
+                    "author": post["username"],
+                    "topic_id": topic["id"],
+                    "topic_title": topic["title"],
+                    "timestamp": epoch_timestamp,
+                    "source_url": f"{base_url}/t/{topic['id']}",
+                },
             }
-            self.safe_request("PUT", f"{self.qdrant_host}/collections/{self.collection_name}/points", json=payload)
-            
+            for idx, embedding in enumerate(embeddings)
+        ]
 
-    def process_topic(self, dao_name, base_url, topic):
-        """Process a single topic."""
+    def upsert_points(self, points, wait=False):
+        """Upsert a batch of points in one request; with wait=False Qdrant acknowledges before indexing."""
+        url = f"{self.qdrant_host}/collections/{self.collection_name}/points?wait={'true' if wait else 'false'}"
+        return self.safe_request("PUT", url, json={"points": points}) is not None
+
+    def fetch_topic_updates(self, base_url, topic, topic_state):
+        """
+        Fetch the posts of a topic that were not seen by the last crawl.
+        Returns (posts, topic_data), or None if the topic should be retried next run.
+        """
         topic_id = topic.get("id")
-        topic_title = topic.get("title", "Unknown Title")
-        print(f"Processing topic: {topic_title} (ID: {topic_id})")
-        posts = self.fetch_topic_posts(base_url, topic_id)
+        max_post_id = topic_state.get("max_post_id", 0) if topic_state else 0
+
+        posts, topic_data = self.fetch_topic_posts(base_url, topic_id, max_post_id)
+        if posts is None:
+            return None
+        print(f"Fetched topic: {topic.get('title', 'Unknown Title')} (ID: {topic_id}), {len(posts)} new posts")
+        return posts, topic_data
+
+    def ingest_posts(self, dao_name, base_url, prepared):
+        """
+        Embed and upload prepared posts, a window at a time so a forum's vectors never all sit in memory.
+        All parts of a window are embedded together in as few OpenAI requests as the token budget allows,
+        and their points are upserted upsert_batch_size at a time. Only the forum's last batch waits for
+        Qdrant to apply the writes, which flushes the earlier ones queued with wait=false. If that batch
+        was empty or failed, the last batch queued with wait=false is sent again with wait=true instead.
+        Posts are marked as seen only once their writes are flushed.
+        Returns the IDs of topics with a post that failed.
+        """
+        failed_topics = set()
+        stored = []
+        unflushed = None  # Last batch accepted with wait=false and not followed by a waited write
+        for start in range(0, len(prepared), self.embed_window):
+            window = prepared[start:start + self.embed_window]
+            vectors = self.embedding_batcher.embed_grouped({i: item["parts"] for i, item in enumerate(window)})
 
-        for post in posts:
-            self.upload_to_qdrant(post, topic, dao_name, base_url)
+            points = []
+            owners = []
+            failed = set()
+            for i, item in enumerate(window):
+                topic = item["topic"]
+                post = item["post"]
+                if vectors[i] is None:
+                    print(f"Skipping upload for {topic['title']} due to embedding error.")
+                    failed.add(i)
+                    continue
 
-    def process_dao(self, dao_name, base_url):
-        """Process a DAO forum."""
+                # A changed post may now have fewer parts, so its old points are removed first
+                if item["stored_hash"] is not None:
+                    print(f"Content changed for DAO: {dao_name}, Topic ID: {topic['id']}, Comment ID: {post['id']}. Re-embedding...")
+                    if not self.delete_post_points(dao_name, topic["id"], post["id"]):
+                        failed.add(i)
+                        continue
+
+                post_points = self.build_points(item, vectors[i], dao_name, base_url)
+                points.extend(post_points)
+                owners.extend([i] * len(post_points))
+
+            last_window = start + self.embed_window >= len(prepared)
+            for batch_start in range(0, len(points), self.upsert_batch_size):
+                batch_end = batch_start + self.upsert_batch_size
+                wait = last_window and batch_end >= len(points)
+                batch = points[batch_start:batch_end]
+                if not self.upsert_points(batch, wait=wait):
+                    failed.update(owners[batch_start:batch_end])
+                else:
+                    unflushed = None if wait else batch
+
+            for i, item in enumerate(window):
+                if i in failed:
+                    failed_topics.add(item["topic"]["id"])
+                else:
+                    stored.append(item)
+
+        # Upserts are idempotent, so repeating the last queued batch with wait=true flushes everything before it
+        if unflushed is not None and not self.upsert_points(unflushed, wait=True):
+            print(f"Failed to flush the queued writes of DAO: {dao_name}; its new posts are retried next run")
+            failed_topics.update(item["topic"]["id"] for item in stored)
+            stored = []
+
+        for item in stored:
+            self.seen_posts.mark(dao_name, item["topic"]["id"], item["post"]["id"], item["content_hash"])
+        return failed_topics
+
+    def topic_priority(self, topic):
+        """Queue priority of a topic fetch: the most recently bumped topics of every forum go first."""
+        bumped_at = topic.get("bumped_at")
+        return (1, -(self.iso_to_epoch_milliseconds(bumped_at) or 0) if bumped_at else 0)
+
+    def list_forum(self, dao):
+        """
+        List the topics of a DAO forum with new activity and queue a fetch for each.
+        The first crawl walks every category; later crawls only visit topics bumped since the last one
+        and skip topics whose last post and post count are unchanged.
+        """
+        dao_name = dao["name"]
+        base_url = dao["base_url"]
         print(f"Processing DAO: {dao_name}")
-        categories = self.fetch_all_categories(base_url)
-        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-            for category_id in categories:
-                topics = self.fetch_category_topics(base_url, category_id)
-                for topic in topics:
-                    executor.submit(self.process_topic, dao_name, base_url, topic)
+        with self.crawl_state_lock:
+            forum_state = self.load_crawl_state().get(base_url, {})
+        bumped_since = forum_state.get("last_bumped_at")
+        topic_states = forum_state.get("topics", {})
+
+        topics = self.fetch_latest_topics(base_url, bumped_since) if bumped_since else None
+        listed = topics is not None
+        if topics is None:
+            # Topics from a partial listing are still fetched, but the forum is not marked as crawled
+            topics = []
+            category_ids = self.fetch_all_categories(base_url)
+            listed = category_ids is not None
+            for category_id in category_ids or []:
+                category_topics, complete = self.fetch_category_topics(base_url, category_id)
+                topics.extend(category_topics)
+                listed = listed and complete
+            if not listed:
+                print(f"{dao_name}: topic listing was incomplete; the forum stays due for the next run")
+
+        # A topic can be listed by several categories
+        unique_topics = {topic["id"]: topic for topic in topics if topic.get("id") is not None}
+        changed = []
+        for topic_id, topic in unique_topics.items():
+            topic_state = topic_states.get(str(topic_id))
+            if topic_state and topic_state.get("last_posted_at") == topic.get("last_posted_at") \
+                    and topic_state.get("posts_count") == topic.get("posts_count"):
+                continue
+            changed.append(topic)
+        print(f"{dao_name}: {len(changed)} of {len(unique_topics)} listed topics have new activity")
+
+        forum = {
+            "source": dao,
+            "name": dao_name,
+            "base_url": base_url,
+            "bumped_since": bumped_since,
+            "topic_states": topic_states,
+            "topics": unique_topics,
+            "pending": len(changed),
+            "updates": {},
+            "listed": listed,
+            "all_succeeded": True,
+            "lock": threading.Lock()
+        }
+        if not changed:
+            self.scheduler.submit("ingest", (0, 0), self.finish_forum, forum)
+            return
+
+        host = CrawlScheduler.host_of(base_url)
+        for topic in changed:
+            self.scheduler.submit(
+                host, self.topic_priority(topic), self.crawl_topic, forum, topic,
+                on_error=lambda e, forum=forum, topic=topic: self.topic_done(forum, topic, None)
+            )
+
+    def crawl_topic(self, forum, topic):
+        """Fetch the new posts of one topic and record them on its forum."""
+        topic_state = forum["topic_states"].get(str(topic["id"]))
+        self.topic_done(forum, topic, self.fetch_topic_updates(forum["base_url"], topic, topic_state))
+
+    def topic_done(self, forum, topic, result):
+        """Record a topic's fetch result; once every topic of the forum is in, queue the forum for ingestion."""
+        with forum["lock"]:
+            if result is None:
+                forum["all_succeeded"] = False
+            else:
+                forum["updates"][topic["id"]] = result
+            forum["pending"] -= 1
+            last = forum["pending"] == 0
+        if last:
+            self.scheduler.submit("ingest", (0, 0), self.finish_forum, forum)
+
+    def finish_forum(self, forum):
+        """
+        Embed and store the new posts of a fully fetched forum, then save its crawl state.
+        The bump cursor only advances, and the forum is only marked as crawled, when its listing and every topic succeeded.
+        """
+        dao_name = forum["name"]
+        base_url = forum["base_url"]
+        topic_states = forum["topic_states"]
+        unique_topics = forum["topics"]
+        updates = forum["updates"]
+        all_succeeded = forum["listed"] and forum["all_succeeded"]
+        bumped_since = forum["bumped_since"]
+
+        prepared = []
+        for topic_id, (posts, _) in updates.items():
+            for post in posts:
+                item = self.prepare_post(post, unique_topics[topic_id], dao_name)
+                if item is not None:
+                    prepared.append(item)
+        failed_topics = self.ingest_posts(dao_name, base_url, prepared)
+
+        for topic_id, (posts, topic_data) in updates.items():
+            if topic_id in failed_topics:
+                all_succeeded = False
+                continue
+            topic = unique_topics[topic_id]
+            previous = topic_states.get(str(topic_id)) or {}
+            topic_states[str(topic_id)] = {
+                "last_posted_at": topic_data.get("last_posted_at") or topic.get("last_posted_at"),
+                "posts_count": topic_data.get("posts_count", topic.get("posts_count")),
+                "max_post_id": max([previous.get("max_post_id", 0)] + [post["id"] for post in posts])
+            }
+
+        # The bump cursor only moves past topics that were all stored, so failed ones are seen again
+        bumped = [topic.get("bumped_at") for topic in unique_topics.values() if topic.get("bumped_at")]
+        if all_succeeded and bumped:
+            bumped_since = max(bumped + ([bumped_since] if bumped_since else []))
+        self.save_forum_state(base_url, {"last_bumped_at": bumped_since, "topics": topic_states})
+
+        if all_succeeded:
+            with self.crawled_lock:
+                self.crawled.append(forum["source"])
 
     def run(self):
-        """Start processing DAOs in parallel."""
-
-        dao_list = [
-            {"name": "Gitcoin", "base_url": "https://gov.gitcoin.co/"},
-            {"name": "Compound", "base_url": "https://www.comp.xyz/"},
-            {"name": "Across", "base_url": "https://forum.across.to/"},
-            {"name": "Lido", "base_url": "https://research.lido.fi/"},
-            {"name": "Jito", "base_url": "https://forum.jito.network"},
-            {"name": "Uniswap", "base_url": "https://gov.uniswap.org/"},
-            {"name": "Aave", "base_url": "https://governance.aave.com/"},
-            {"name": "Arbitrum", "base_url": "https://forum.arbitrum.foundation/"},
-            {"name": "ENS", "base_url": "https://discuss.ens.domains/"},
-            {"name": "Apecoin", "base_url": "https://forum.apecoin.com/"},
-            {"name": "Balancer", "base_url": "https://forum.balancer.fi/"},
-            {"name": "Starknet", "base_url": "https://community.starknet.io/"},
-            {"name": "Stargate", "base_url": "https://stargate.discourse.group/"},
-            {"name": "Optimism", "base_url": "https://gov.optimism.io/"},
-            {"name": "GMX", "base_url": "https://gov.gmx.io/"},
-            {"name": "Decentraland", "base_url": "https://forum.decentraland.org/"},
-            {"name": "Radiant", "base_url": "https://community.radiant.capital/"},
-            {"name": "Gnosis", "base_url": "https://forum.gnosis.io/"},
-            {"name": "coW DAO", "base_url": "https://forum.cow.fi/"},
-            {"name": "Hop", "base_url": "https://forum.hop.exchange/"},
-            {"name": "Curve", "base_url": "https://gov.curve.fi/"},
-            {"name": "Shapeshift", "base_url": "https://forum.shapeshift.com/"},
-            {"name": "Gyroscope", "base_url": "https://forum.gyro.finance/"},
-            {"name": "Frax", "base_url": "https://gov.frax.finance/"},
-            {"name": "Moonwell", "base_url": "https://forum.moonwell.fi/"},
-            {"name": "Rocketpool", "base_url": "https://dao.rocketpool.net/"},
-            {"name": "VitaDAO", "base_url": "https://gov.vitadao.com/"},
-            {"name": "Goldfinch", "base_url": "https://gov.goldfinch.finance/"},
-            {"name": "Cabin", "base_url": "https://forum.cabin.city/"},
-            {"name": "Stakewise", "base_url": "https://forum.stakewise.io/"},
-            {"name": "Rari", "base_url": "https://forum.rari.foundation/"},
-            {"name": "Sanctum", "base_url": "https://research.sanctum.so/"},
-            {"name": "Jupiter", "base_url": "https://www.jupresear.ch/"},
-            {"name": "Drift", "base_url": "https://driftgov.discourse.group/"},
-            {"name": "Orca", "base_url": "https://forums.orca.so/"},
-            {"name": "Marinade", "base_url": "https://forum.marinade.finance/"},
-            {"name": "Sky", "base_url": "https://forum.sky.money/"},
-            {"name": "Kamino", "base_url": "https://gov.kamino.finance/"},
-            {"name": "Parcl", "base_url": "https://parcl.discourse.group/"},
-            {"name": "Pyth", "base_url": "https://forum.pyth.network/"},
-            {"name": "Debridge", "base_url": "https://gov.debridge.foundation/"},
-            {"name": "Morpho", "base_url": "https://forum.morpho.org/"},
-            {"name": "Marinade", "base_url": "https://forum.marinade.finance/"},
-            {"name": "Sky", "base_url": "https://forum.sky.money/"},
-            {"name": "Wormhole", "base_url": "https://forum.wormhole.com/"},
-            {"name": "Pancakeswap", "base_url": "https://forum.pancakeswap.finance/"},
-            {"name": "Etherfi", "base_url": "https://governance.ether.fi/"},
-            {"name": "Abracadabra", "base_url": "https://forum.abracadabra.money/"},
-            {"name": "Osmosis", "base_url": "https://forum.osmosis.zone/"},
-            {"name": "Dxdy", "base_url": "https://dydx.forum/"},
-            {"name": "Blast", "base_url": "https://forum.blast.io/latest"},
-            
-        ]
+        """
+        Crawl the DAO forums that are due, all through one global work queue.
+        Forum listings are queued by forum priority and topic fetches by bump time, so the most recently
+        active topics of every forum are fetched first while each host keeps its own rate and concurrency limits.
+        """
+        dao_list = self.sources.discourse_forums(due_only=True)
+
+        # Ensure the Qdrant collection exists, with the payload indexes the dedup deletes filter on
+        if not self.create_qdrant_collection():
+            return
+
+        # A new or lost index is rebuilt from the collection so stored posts are not embedded again
+        if self.seen_posts.count() == 0:
+            self.seen_posts.rebuild_from_qdrant(self.qdrant_host, self.collection_name)
+
+        self.scheduler = CrawlScheduler()
+        self.scheduler.set_host_limit("ingest", self.ingest_concurrency)
+        self.crawled = []
 
-        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-            futures = {executor.submit(self.process_dao, dao["name"], dao["base_url"]): dao for dao in dao_list}
+        for dao in dao_list:
+            self.scheduler.submit(
+                CrawlScheduler.host_of(dao["base_url"]), (0, dao["priority"]), self.list_forum, dao,
+                on_error=lambda e, dao=dao: print(f"{dao['name']}: listing failed; the forum stays due for the next run")
+            )
+        self.scheduler.run()
+        self.scheduler = None
 
-            for future in as_completed(futures):  # Process completed threads first
-                dao = futures[future]
-                try:
-                    future.result()  # Raises exceptions inside the thread
-                except Exception as e:
-                    print(f"Error processing {dao['name']}: {e}")  # Error is logged, but execution continues
+        self.sources.mark_crawled(SourceRegistry.DISCOURSE, self.crawled)
 
 
 # **Usage**
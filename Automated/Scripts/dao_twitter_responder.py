@@ -1,21 +1,34 @@
 from datetime import datetime, timedelta, timezone
-import requests
+import math
 from openai import OpenAI
 import os
 from dotenv import load_dotenv
+from embedding_batcher import EmbeddingBatcher
+from embedding_cache import EmbeddingCache
+from http_client import HttpClient
+from qdrant_collection import QdrantCollection
 
 
 class DAOTwitterResponder:
     """Class to generate Twitter responses using DAO governance discussions stored in Qdrant."""
 
-    def __init__(self, qdrant_host="http://localhost:6333", collection_name="dao_forum_collection"):
-        """Initialize the responder with OpenAI API and Qdrant database settings."""
+    def __init__(self, qdrant_host="http://localhost:6333", collection_name="dao_forum_collection",
+                 combine_context_vectors=False, comment_weight=0.7):
+        """
+        Initialize the responder with OpenAI API and Qdrant database settings.
+        With combine_context_vectors the comment and the shared proposal context are embedded separately
+        (the context once per thread, thanks to the cache) and mixed with comment_weight on the comment.
+        """
         
         load_dotenv() 
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.qdrant_host = qdrant_host
         self.collection_name = collection_name
         self.current_date = datetime.now(timezone.utc)
+        self.embedding_batcher = EmbeddingBatcher(self.client)
+        self.embedding_cache = EmbeddingCache()
+        self.combine_context_vectors = combine_context_vectors
+        self.comment_weight = comment_weight
 
     def iso_to_epoch_milliseconds(self, iso_timestamp):
         """Convert ISO 8601 timestamp to Unix epoch time in milliseconds."""
@@ -25,14 +38,49 @@ class DAOTwitterResponder:
 
     def get_embedding(self, text):
         """Generate an embedding for the input text using OpenAI."""
-        response = self.client.embeddings.create(model="text-embedding-ada-002", input=text)
-        return response.data[0].embedding
-
-    def query_similar_context(self, input_text, dao_name, top_k=4, extra_context=""):
-        """Query Qdrant for the most similar governance discussions based on input text."""
+        return self.get_embeddings([text])[0]
+
+    def get_embeddings(self, texts):
+        """Generate embeddings for several input texts, serving repeated texts from the cache and batching the rest."""
+        model = self.embedding_batcher.model
+        vectors = self.embedding_cache.get_many(model, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embedded = self.embedding_batcher.embed([texts[i] for i in missing])
+            if any(vector is None for vector in embedded):
+                raise RuntimeError("Failed to embed query text")
+            self.embedding_cache.put_many(model, [texts[i] for i in missing], embedded)
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+        return vectors
+
+    def combine_vectors(self, comment_vector, context_vector):
+        """Weighted sum of a comment and its context vector, normalized back to unit length for cosine search."""
+        combined = [
+            self.comment_weight * c + (1 - self.comment_weight) * x for c, x in zip(comment_vector, context_vector)
+        ]
+        norm = math.sqrt(sum(value * value for value in combined)) or 1.0
+        return [value / norm for value in combined]
+
+    def get_query_vector(self, input_text, extra_context):
+        """Embedding used to search for a comment together with its thread's context."""
+        if self.combine_context_vectors and extra_context:
+            comment_vector, context_vector = self.get_embeddings([input_text, extra_context])
+            return self.combine_vectors(comment_vector, context_vector)
+        return self.get_query_vectors([input_text], extra_context)[0]
+
+    def get_query_vectors(self, input_texts, extra_context=""):
+        """Search embeddings of several comments sharing one context, embedded together in as few requests as possible."""
+        if self.combine_context_vectors and extra_context:
+            vectors = self.get_embeddings(list(input_texts) + [extra_context])
+            return [self.combine_vectors(vector, vectors[-1]) for vector in vectors[:-1]]
+        return self.get_embeddings([f"{text}\n\nAdditional context: {extra_context}" for text in input_texts])
+
+    def query_similar_context(self, input_text, dao_name, top_k=4, extra_context="", query_vector=None):
+        """Query Qdrant for the most similar governance discussions based on input text, or on a precomputed query_vector."""
         # Combine input text and extra context
-        combined_text = f"{input_text}\n\nAdditional context: {extra_context}"
-        query_vector = self.get_embedding(combined_text)
+        if query_vector is None:
+            query_vector = self.get_query_vector(input_text, extra_context)
 
         # Time filtering (limit to discussions from the past `days_past` days)
         time_threshold = self.iso_to_epoch_milliseconds(
@@ -52,11 +100,12 @@ class DAOTwitterResponder:
             "vector": query_vector,
             "filter": filter_condition,
             "top": top_k,
+            "params": QdrantCollection.SEARCH_PARAMS,
             "with_payload": True
         }
 
         # Request to Qdrant
-        response = requests.post(url, json=payload)
+        response = HttpClient.shared().request("POST", url, json=payload)
         if response.status_code == 200:
             results = response.json().get("result", [])
             return [
@@ -77,49 +126,60 @@ class DAOTwitterResponder:
     def generate_response(self, input_text, dao_name, extra_context=""):
         """Generate a concise response based on similar governance discussions."""
         try:
-            # Retrieve similar discussions
-            similar_comments = self.query_similar_context(input_text, dao_name, extra_context=extra_context)
-
-            # Format the context for GPT
-            context = "\n\n".join(
-                f"Comment {i+1} by {comment['author']} on {comment['timestamp']} (DAO: {comment['dao_name']}): {comment['content']}"
-                for i, comment in enumerate(similar_comments)
-            )
-
-            # Source links
-            links = "\n".join(f"{i+1}. {comment['source_url']}" for i, comment in enumerate(similar_comments))
+            return self.build_response(input_text, dao_name, extra_context)
+        except Exception as e:
+            return f"An error occurred: {e}"
 
-            # Define the chat prompt
-            messages = [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a DAO governance intern on Twitter. Your context comes from governance forums. "
-                        "Respond concisely in under 200 characters, and use references sparingly."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"Today's date is {self.current_date.strftime('%Y-%m-%d')}.\n\n"
-                        f"Extra context: {extra_context}\n\n"
-                        f"Using the context below, respond concisely:\n\nContext:\n{context}\n\nQuery: {input_text}"
-                    )
-                }
-            ]
+    def build_response(self, input_text, dao_name, extra_context="", query_vector=None):
+        """
+        Generate a concise response based on similar governance discussions.
+        Unlike generate_response, failures raise so callers never post an error message as a reply.
+        :param query_vector: Precomputed search embedding, e.g. from get_query_vectors.
+        :raises Exception: If embedding, search or completion fails.
+        """
+        # Retrieve similar discussions
+        similar_comments = self.query_similar_context(
+            input_text, dao_name, extra_context=extra_context, query_vector=query_vector
+        )
 
-            # Query GPT for a response
-            completion = self.client.chat.completions.create(
-                model="gpt-4o", messages=messages
-            )
+        # Format the context for GPT
+        context = "\n\n".join(
+            f"Comment {i+1} by {comment['author']} on {comment['timestamp']} (DAO: {comment['dao_name']}): {comment['content']}"
+            for i, comment in enumerate(similar_comments)
+        )
 
-            # Extract response text
-            gpt_response = completion.choices[0].message.content
+        # Source links
+        links = "\n".join(f"{i+1}. {comment['source_url']}" for i, comment in enumerate(similar_comments))
+
+        # Define the chat prompt
+        messages = [
+            {
+                "role": "system",
+                "content": (
+                    "You are a DAO governance intern on Twitter. Your context comes from governance forums. "
+                    "Respond concisely in under 200 characters, and use references sparingly."
+                )
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"Today's date is {self.current_date.strftime('%Y-%m-%d')}.\n\n"
+                    f"Extra context: {extra_context}\n\n"
+                    f"Using the context below, respond concisely:\n\nContext:\n{context}\n\nQuery: {input_text}"
+                )
+            }
+        ]
+
+        # Query GPT for a response
+        completion = self.client.chat.completions.create(
+            model="gpt-4o", messages=messages
+        )
 
-            return f"{gpt_response}{f'\n\nSources:\n{links}' if links else ''}"
+        # Extract response text
+        gpt_response = completion.choices[0].message.content
 
-        except Exception as e:
-            return f"An error occurred: {e}"
+        sources = f"\n\nSources:\n{links}" if links else ""
+        return f"{gpt_response}{sources}"
 
 
 # **Usage Example**
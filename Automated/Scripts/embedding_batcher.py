@@ -0,0 +1,156 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+class EmbeddingBatcher:
+    """
+    Embeds many texts with few OpenAI requests: texts are packed into batches under a token budget,
+    a bounded number of batches run at once, and rate-limited or failed batches are retried with backoff.
+    """
+
+    # Errors worth retrying; anything else fails the batch immediately
+    RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+    def __init__(self, client, model="text-embedding-ada-002", max_batch_tokens=100_000, max_batch_inputs=2048,
+                 max_input_tokens=8191, max_in_flight=4, max_retries=6):
+        """
+        Initializes the batcher.
+        :param client: An initialized OpenAI client.
+        :param model: Embedding model.
+        :param max_batch_tokens: Token budget of one request.
+        :param max_batch_inputs: Maximum number of texts in one request.
+        :param max_input_tokens: Model limit for a single text; longer texts are truncated.
+        :param max_in_flight: Maximum number of requests running at the same time.
+        :param max_retries: Attempts per batch on rate limits and transient errors.
+        """
+        self.client = client
+        self.model = model
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_inputs = max_batch_inputs
+        self.max_input_tokens = max_input_tokens
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.encoding = tiktoken.encoding_for_model(model) if tiktoken else None
+
+    def count_tokens(self, text):
+        """
+        Number of tokens in a text; estimated from its length when tiktoken is not installed.
+        """
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return len(text) // 3 + 1
+
+    def truncate(self, text):
+        """
+        Cut a text down to the model's input limit.
+        """
+        if self.count_tokens(text) <= self.max_input_tokens:
+            return text
+        if self.encoding is not None:
+            return self.encoding.decode(self.encoding.encode(text, disallowed_special=())[:self.max_input_tokens])
+        return text[:self.max_input_tokens * 3]
+
+    def make_batches(self, texts):
+        """
+        Pack texts, in order, into batches under the token and input budgets.
+        :param texts: List of texts.
+        :return: List of batches, each a list of (position, text).
+        """
+        batches = []
+        batch = []
+        batch_tokens = 0
+        for position, text in enumerate(texts):
+            text = self.truncate(text or " ")
+            tokens = self.count_tokens(text)
+            if batch and (batch_tokens + tokens > self.max_batch_tokens or len(batch) >= self.max_batch_inputs):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append((position, text))
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    @staticmethod
+    def retry_delay(error, attempt):
+        """
+        Seconds to wait before retrying: the server's Retry-After when given, otherwise exponential backoff with jitter.
+        """
+        response = getattr(error, "response", None)
+        header = response.headers.get("retry-after") if response is not None else None
+        if header:
+            try:
+                return float(header)
+            except ValueError:
+                pass
+        return min(2 ** attempt, 60) + random.uniform(0, 1)
+
+    def embed_batch(self, batch):
+        """
+        Embed one batch, retrying rate limits and transient errors.
+        :param batch: List of (position, text).
+        :return: List of (position, vector), or None if the batch failed.
+        """
+        for attempt in range(self.max_retries):
+            try:
+                response = self.client.embeddings.create(model=self.model, input=[text for _, text in batch])
+                return [(batch[item.index][0], item.embedding) for item in response.data]
+            except self.RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries - 1:
+                    print(f"Error embedding batch of {len(batch)} texts: {e}")
+                    return None
+                delay = self.retry_delay(e, attempt)
+                print(f"Embedding request failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+            except Exception as e:
+                print(f"Error embedding batch of {len(batch)} texts: {e}")
+                return None
+        return None
+
+    def embed(self, texts):
+        """
+        Embed a list of texts.
+        :param texts: List of texts.
+        :return: List of vectors in the same order; None where the text's batch failed.
+        """
+        vectors = [None] * len(texts)
+        batches = self.make_batches(texts)
+        if not batches:
+            return vectors
+
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(batches))) as executor:
+            for result in executor.map(self.embed_batch, batches):
+                for position, vector in result or []:
+                    vectors[position] = vector
+
+        print(f"Embedded {sum(1 for v in vectors if v is not None)} of {len(texts)} texts in {len(batches)} requests")
+        return vectors
+
+    def embed_grouped(self, groups):
+        """
+        Embed several texts per item and map the vectors back to their items.
+        :param groups: Dictionary of item key to list of texts (e.g. the parts of a post).
+        :return: Dictionary of item key to list of vectors, or None for items with any part that failed.
+        """
+        keys = []
+        texts = []
+        for key, parts in groups.items():
+            for part in parts:
+                keys.append(key)
+                texts.append(part)
+
+        vectors = self.embed(texts)
+        grouped = {key: [] for key in groups}
+        for key, vector in zip(keys, vectors):
+            if grouped[key] is not None:
+                grouped[key] = None if vector is None else grouped[key] + [vector]
+        return grouped
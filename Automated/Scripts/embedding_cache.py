@@ -0,0 +1,111 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+
+
+class EmbeddingCache:
+    """
+    Persistent SQLite cache of embeddings keyed by (model, hash of the text).
+    Texts differing only in whitespace share an entry. Hits refresh an entry's last-used time and the
+    least recently used entries are evicted once the cache grows past max_entries.
+    """
+
+    def __init__(self, db_path="../cache/embeddings.sqlite3", max_entries=50000):
+        """
+        Opens (and creates if needed) the cache.
+        :param db_path: Path to the SQLite file, relative to this script.
+        :param max_entries: Entries kept; eviction trims the cache to 90% of this.
+        """
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.db_path = os.path.normpath(os.path.join(script_dir, db_path))
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.max_entries = max_entries
+
+        # Replies are generated from several threads; one connection is shared under a lock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self.lock:
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            self.conn.commit()
+
+    @staticmethod
+    def text_hash(text):
+        """
+        Hash of a text with its whitespace collapsed.
+        :return: Hex digest.
+        """
+        return hashlib.sha256(re.sub(r"\s+", " ", text or "").strip().encode("utf-8")).hexdigest()
+
+    def get_many(self, model, texts):
+        """
+        Look up several texts.
+        :param model: Embedding model.
+        :param texts: List of texts.
+        :return: List of vectors in the same order; None for texts not in the cache.
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        unique = list(dict.fromkeys(hashes))
+        found = {}
+        with self.lock:
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model] + batch
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, text_hash) for text_hash in found]
+                )
+                self.conn.commit()
+        return [found.get(text_hash) for text_hash in hashes]
+
+    def put_many(self, model, texts, vectors):
+        """
+        Store the vectors of several texts, then evict the least recently used entries if over the bound.
+        :param model: Embedding model.
+        :param texts: List of texts.
+        :param vectors: List of vectors in the same order; None entries are skipped.
+        """
+        now = time.time()
+        rows = [
+            (model, self.text_hash(text), array("f", vector).tobytes(), now)
+            for text, vector in zip(texts, vectors) if vector is not None
+        ]
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (count - int(self.max_entries * 0.9),)
+                )
+            self.conn.commit()
+
+    def count(self):
+        """
+        Number of cached embeddings.
+        """
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
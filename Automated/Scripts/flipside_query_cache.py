@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+
+class FlipsideQueryCache:
+    """
+    On-disk cache of Flipside query results keyed by normalized SQL text and parameters.
+    Entries expire by TTL (or never) and the least recently used ones are evicted once the
+    cache grows past its size budget.
+    """
+
+    # Single-quoted string literals are kept verbatim when normalizing SQL
+    SQL_TOKEN_PATTERN = re.compile(r"('(?:[^']|'')*')|(\s+)")
+
+    def __init__(self, cache_dir="../cache/flipside", max_bytes=200 * 1024 * 1024, open_ttl_seconds=900, closed_grace_hours=6):
+        """
+        Initializes the cache and loads its index from disk.
+        :param cache_dir: Directory holding cached results, relative to this script.
+        :param max_bytes: Total size of cached results kept before LRU eviction.
+        :param open_ttl_seconds: TTL for results of proposals that are still open (or unknown).
+        :param closed_grace_hours: Hours after a proposal's end before its results are cached indefinitely.
+        """
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.cache_dir = os.path.normpath(os.path.join(script_dir, cache_dir))
+        self.index_file = os.path.join(self.cache_dir, "index.json")
+        self.max_bytes = max_bytes
+        self.open_ttl_seconds = open_ttl_seconds
+        self.closed_grace_hours = closed_grace_hours
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index = self.load_index()
+
+    def load_index(self):
+        """
+        Load the cache index from disk.
+        :return: Dictionary of key to entry metadata (size, expires_at, last_access).
+        """
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, "r") as file:
+                    return json.load(file)
+            except Exception as e:
+                print(f"Error loading Flipside cache index {self.index_file}: {e}")
+        return {}
+
+    def save_index(self):
+        """
+        Atomically write the cache index to disk. Callers must hold the lock.
+        """
+        temp_file = f"{self.index_file}.tmp"
+        with open(temp_file, "w") as file:
+            json.dump(self.index, file)
+        os.replace(temp_file, self.index_file)
+
+    def normalize_sql(self, sql):
+        """
+        Collapse whitespace outside string literals and drop trailing semicolons.
+        :param sql: SQL query text.
+        :return: Normalized SQL text.
+        """
+        normalized = self.SQL_TOKEN_PATTERN.sub(lambda m: m.group(1) or " ", sql).strip()
+        return normalized.rstrip(";").strip()
+
+    def make_key(self, sql, params=None):
+        """
+        Build the content address of a query.
+        :param sql: SQL query text.
+        :param params: Optional dictionary of parameters that affect the result.
+        :return: Hex digest identifying the query.
+        """
+        payload = json.dumps({"sql": self.normalize_sql(sql), "params": params or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key):
+        """
+        Path of the file holding an entry's records.
+        :param key: Key built by make_key.
+        """
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def ttl_for_proposal(self, proposal_end_time):
+        """
+        Pick the TTL for a proposal's results: closed proposals never expire, open ones expire quickly.
+        :param proposal_end_time: End time of the proposal (naive UTC datetime or ISO string), or None if unknown.
+        :return: TTL in seconds, or None for no expiry.
+        """
+        if proposal_end_time is None:
+            return self.open_ttl_seconds
+        if isinstance(proposal_end_time, str):
+            proposal_end_time = datetime.fromisoformat(proposal_end_time.replace("Z", "+00:00"))
+        if proposal_end_time.tzinfo is not None:
+            proposal_end_time = proposal_end_time.astimezone(timezone.utc).replace(tzinfo=None)
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if proposal_end_time + timedelta(hours=self.closed_grace_hours) <= now:
+            return None
+        return self.open_ttl_seconds
+
+    def get(self, key):
+        """
+        Return cached records for a key, or None on a miss or expired entry.
+        :param key: Key built by make_key.
+        :return: List of records or None.
+        """
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is None or (entry["expires_at"] is not None and entry["expires_at"] <= time.time()):
+                if entry is not None:
+                    self.remove(key)
+                    self.save_index()
+                self.misses += 1
+                return None
+
+            try:
+                with open(self.entry_path(key), "r") as file:
+                    records = json.load(file)
+            except Exception as e:
+                print(f"Error reading Flipside cache entry {key}: {e}")
+                self.remove(key)
+                self.save_index()
+                self.misses += 1
+                return None
+
+            entry["last_access"] = time.time()
+            self.save_index()
+            self.hits += 1
+            return records
+
+    def put(self, key, records, ttl_seconds):
+        """
+        Store records under a key and evict least recently used entries over the size budget.
+        :param key: Key built by make_key.
+        :param records: JSON-serializable list of records.
+        :param ttl_seconds: TTL in seconds, or None for no expiry.
+        """
+        data = json.dumps(records)
+        with self.lock:
+            temp_file = f"{self.entry_path(key)}.tmp"
+            with open(temp_file, "w") as file:
+                file.write(data)
+            os.replace(temp_file, self.entry_path(key))
+
+            now = time.time()
+            self.index[key] = {
+                "size": len(data),
+                "expires_at": now + ttl_seconds if ttl_seconds is not None else None,
+                "last_access": now
+            }
+            self.evict()
+            self.save_index()
+
+    def remove(self, key):
+        """
+        Remove an entry from the index and disk. Callers must hold the lock.
+        """
+        self.index.pop(key, None)
+        try:
+            os.remove(self.entry_path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """
+        Drop expired entries, then least recently used ones until the cache fits max_bytes.
+        Callers must hold the lock.
+        """
+        now = time.time()
+        for key in [k for k, e in self.index.items() if e["expires_at"] is not None and e["expires_at"] <= now]:
+            self.remove(key)
+
+        total_bytes = sum(entry["size"] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]["last_access"]):
+            if total_bytes <= self.max_bytes:
+                break
+            total_bytes -= self.index[key]["size"]
+            self.remove(key)
+
+    def stats(self):
+        """
+        Return hit/miss counters and the current cache size.
+        :return: Dictionary of cache statistics.
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.index),
+                "bytes": sum(entry["size"] for entry in self.index.values())
+            }
@@ -0,0 +1,98 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FlipsideResultStream:
+    """
+    Streams Flipside query results page by page, prefetching upcoming pages while the current one is consumed.
+    """
+
+    def __init__(self, flipside, page_size=1000, prefetch=2):
+        """
+        Initializes the stream.
+        :param flipside: An initialized Flipside client.
+        :param page_size: Default number of records per page.
+        :param prefetch: Number of pages fetched ahead of the consumer (0 disables prefetching).
+        """
+        self.flipside = flipside
+        self.page_size = page_size
+        self.prefetch = prefetch
+
+    def submit(self, sql):
+        """
+        Submit a query to Flipside and wait until its run has finished.
+        :param sql: SQL query to execute on Flipside.
+        :return: ID of the query run.
+        """
+        return self.flipside.query(sql, page_number=1, page_size=1).query_id
+
+    def fetch_page(self, query_id, page_number, page_size):
+        """
+        Fetch a single page of a finished query run.
+        :param query_id: ID of the query run.
+        :param page_number: Page to fetch, starting at 1.
+        :param page_size: Number of records per page.
+        :return: The Flipside query result set for that page.
+        """
+        return self.flipside.get_query_results(query_id, page_number=page_number, page_size=page_size)
+
+    def pages(self, sql=None, query_id=None, page_size=None):
+        """
+        Yield the records of a query one page at a time.
+        Either runs sql, or reads the results of an already submitted query run.
+        :param sql: SQL query to execute on Flipside.
+        :param query_id: ID of an already submitted query run.
+        :param page_size: Number of records per page, defaults to the stream's page size.
+        :return: Generator of record lists.
+        """
+        page_size = page_size or self.page_size
+
+        if query_id is None:
+            first_page = self.flipside.query(sql, page_number=1, page_size=page_size)
+            query_id = first_page.query_id
+            if first_page.page is None:
+                first_page = self.fetch_page(query_id, 1, page_size)
+        else:
+            first_page = self.fetch_page(query_id, 1, page_size)
+
+        total_pages = first_page.page.totalPages if first_page.page else 1
+        if first_page.records:
+            yield first_page.records
+        if total_pages <= 1:
+            return
+
+        if self.prefetch <= 0:
+            for page_number in range(2, total_pages + 1):
+                results = self.fetch_page(query_id, page_number, page_size)
+                if results.records:
+                    yield results.records
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.prefetch)
+        try:
+            in_flight = deque()
+            next_page = 2
+            while next_page <= total_pages and len(in_flight) < self.prefetch:
+                in_flight.append(executor.submit(self.fetch_page, query_id, next_page, page_size))
+                next_page += 1
+
+            while in_flight:
+                results = in_flight.popleft().result()
+                if next_page <= total_pages:
+                    in_flight.append(executor.submit(self.fetch_page, query_id, next_page, page_size))
+                    next_page += 1
+                if results.records:
+                    yield results.records
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def records(self, sql=None, query_id=None, page_size=None):
+        """
+        Yield the records of a query one at a time, in constant memory.
+        :param sql: SQL query to execute on Flipside.
+        :param query_id: ID of an already submitted query run.
+        :param page_size: Number of records per page, defaults to the stream's page size.
+        :return: Generator of record dictionaries.
+        """
+        for page in self.pages(sql=sql, query_id=query_id, page_size=page_size):
+            yield from page
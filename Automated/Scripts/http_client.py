@@ -0,0 +1,131 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HttpClient:
+    """
+    Process-wide HTTP client: one keep-alive Session per host, gzip, default timeouts, jittered
+    exponential retry that honours Retry-After, and a cap on concurrent requests per host.
+    """
+
+    # Statuses retried after a backoff
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    shared_client = None
+    shared_lock = threading.Lock()
+
+    def __init__(self, connect_timeout=5.0, read_timeout=30.0, max_per_host=None, host_limits=None):
+        """
+        Initializes the client.
+        :param connect_timeout: Seconds to wait for a connection.
+        :param read_timeout: Seconds to wait between bytes of the response.
+        :param max_per_host: Concurrent requests allowed per host (HTTP_MAX_PER_HOST, default 4).
+        :param host_limits: Dictionary of host to its own concurrency cap.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_per_host = max_per_host or int(os.getenv("HTTP_MAX_PER_HOST", "4"))
+        self.host_limits = host_limits or {}
+        self.sessions = {}
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """
+        Return the client shared by every network-facing class in the process.
+        """
+        with cls.shared_lock:
+            if cls.shared_client is None:
+                cls.shared_client = cls()
+            return cls.shared_client
+
+    def host_limit(self, host):
+        """
+        Concurrency cap of a host.
+        """
+        return self.host_limits.get(host, self.max_per_host)
+
+    def get_session(self, host):
+        """
+        Return the pooled Session for a host, creating it on first use.
+        The connection pool is sized to the host's concurrency cap so capped requests never wait for a socket.
+        """
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.host_limit(host))
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({"Accept-Encoding": "gzip, deflate"})
+                self.sessions[host] = session
+                self.semaphores[host] = threading.BoundedSemaphore(self.host_limit(host))
+            return session
+
+    @staticmethod
+    def retry_after_seconds(response, attempt):
+        """
+        Seconds to wait before retrying.
+        Uses the Retry-After header (seconds or HTTP date) when present, otherwise exponential backoff with jitter.
+        :param response: The failed response, or None after a network error.
+        :param attempt: Zero-based attempt number.
+        """
+        header = response.headers.get("Retry-After") if response is not None else None
+        if header:
+            try:
+                return max(float(header), 0)
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(header)
+                    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+                except (TypeError, ValueError):
+                    pass
+        return min(2 ** attempt, 60) * random.uniform(0.5, 1.5)
+
+    def request(self, method, url, retries=3, timeout=None, limiter=None, **kwargs):
+        """
+        Send a request through the host's pooled session.
+        Network errors and RETRY_STATUSES are retried; the last response is returned whatever its status.
+        :param method: HTTP method.
+        :param url: Request URL.
+        :param retries: Attempts in total; 1 disables retrying.
+        :param timeout: Override of the (connect, read) timeout.
+        :param limiter: Optional RateLimiter acquired before each attempt and told about throttling.
+        :param kwargs: Passed to requests (json, params, headers, ...).
+        :return: The response.
+        :raises requests.RequestException: If every attempt failed without a response.
+        """
+        host = urlsplit(url).netloc.lower()
+        session = self.get_session(host)
+        semaphore = self.semaphores[host]
+
+        for attempt in range(retries):
+            response = None
+            try:
+                if limiter is not None:
+                    limiter.acquire()
+                with semaphore:
+                    response = session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+                if response.status_code not in self.RETRY_STATUSES or attempt == retries - 1:
+                    if limiter is not None and response.ok:
+                        limiter.on_success()
+                    return response
+                print(f"{method} {url} returned {response.status_code} on attempt {attempt + 1}/{retries}")
+            except requests.RequestException as e:
+                if attempt == retries - 1:
+                    raise
+                print(f"Request error on attempt {attempt + 1}/{retries} for {url}: {e}")
+
+            delay = self.retry_after_seconds(response, attempt)
+            if limiter is not None and response is not None and response.status_code == 429:
+                limiter.on_throttle(delay)  # Slows every later request to this host, not just this one
+            time.sleep(delay)
+        return None
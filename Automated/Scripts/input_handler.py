@@ -86,11 +86,24 @@ class InputHandler:
             sql_update_query_lines.append(line)
         
         sql_update_query = f"""{' '.join(sql_update_query_lines).strip()}"""
+
+        # Step 9: Watermark column
+        print("\nStep 9: Specify Watermark Column (optional)")
+        print("💡 A timestamp column used to fetch only new rows on each update.")
+        print("   Use {watermark_start} and {watermark_end} in the update query, e.g.")
+        print("   WHERE CREATED_AT > '{watermark_start}' AND CREATED_AT <= '{watermark_end}'")
+        print("   Leave blank to run the update query as-is.")
+        print("-" * 40)
+        watermark_column = input("🔹 Watermark Column: ").strip() or None
+
+        if watermark_column and watermark_column not in columns:
+            print(f"❌ Watermark column '{watermark_column}' not found in columns.")
+            return
         
-        # Step 9: Register update query
+        # Step 10: Register update query
         print("\n" + "=" * 40)
         print("📝 Registering Update Query...")
-        self.table_manager.add_update_query(sql_update_query)
+        self.table_manager.add_update_query(sql_update_query, watermark_column=watermark_column)
         print("✅ Workflow completed successfully!")
         print("=" * 40)
 
@@ -0,0 +1,169 @@
+import psycopg2
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class MvRefreshScheduler:
+    """
+    Refreshes registered materialized views in dependency order, skipping views whose sources did not change.
+    """
+
+    # Walks each view's rewrite rule dependencies, expanding plain views, down to tables and other materialized views.
+    DEPENDENCY_SQL = """
+    WITH RECURSIVE deps(root, rel) AS (
+        SELECT c.oid, c.oid
+        FROM pg_class c
+        WHERE c.oid = ANY(%s::oid[])
+      UNION
+        SELECT deps.root, d.refobjid
+        FROM deps
+        JOIN pg_class c ON c.oid = deps.rel AND (c.relkind = 'v' OR c.oid = deps.root)
+        JOIN pg_rewrite r ON r.ev_class = deps.rel
+        JOIN pg_depend d
+            ON d.classid = 'pg_rewrite'::regclass
+            AND d.objid = r.oid
+            AND d.refclassid = 'pg_class'::regclass
+        WHERE d.refobjid <> deps.rel
+    )
+    SELECT deps.root::regclass::text, deps.rel::regclass::text, c.relkind
+    FROM deps
+    JOIN pg_class c ON c.oid = deps.rel
+    WHERE deps.rel <> deps.root
+        AND c.relkind IN ('r', 'p', 'f', 'm');
+    """
+
+    # REFRESH ... CONCURRENTLY needs a populated view with a plain, non-partial unique index.
+    CONCURRENT_SQL = """
+    SELECT c.oid::regclass::text
+    FROM pg_class c
+    WHERE c.oid = ANY(%s::oid[])
+        AND c.relispopulated
+        AND EXISTS (
+            SELECT 1
+            FROM pg_index i
+            WHERE i.indrelid = c.oid
+                AND i.indisunique
+                AND i.indisvalid
+                AND i.indpred IS NULL
+                AND i.indexprs IS NULL
+        );
+    """
+
+    def __init__(self, db_config, max_workers=4):
+        """
+        Initializes the scheduler.
+        :param db_config: Dictionary of psycopg2 connection parameters.
+        :param max_workers: Maximum number of views refreshed at the same time.
+        """
+        self.db_config = db_config
+        self.max_workers = max_workers
+
+    def load_view_metadata(self, conn, mv_names):
+        """
+        Resolves the registered views and reads their dependencies and unique indexes from the catalog.
+        :param conn: An open psycopg2 connection.
+        :param mv_names: List of registered materialized view names.
+        :return: Tuple of (views, dependencies, concurrent_views) keyed by catalog name, where views maps
+                 catalog name to registered name and dependencies maps a view to {source name: relkind}.
+        """
+        views = {}
+        oids = []
+        with conn.cursor() as cur:
+            for mv_name in mv_names:
+                cur.execute("SELECT to_regclass(%s)::oid, to_regclass(%s)::text;", (mv_name, mv_name))
+                oid, catalog_name = cur.fetchone()
+                if oid is None:
+                    print(f"Materialized view '{mv_name}' does not exist. Skipping...")
+                    continue
+                views[catalog_name] = mv_name
+                oids.append(oid)
+
+            dependencies = {catalog_name: {} for catalog_name in views}
+            if not oids:
+                return views, dependencies, set()
+
+            cur.execute(self.DEPENDENCY_SQL, (oids,))
+            for view, source, relkind in cur.fetchall():
+                dependencies[view][source] = relkind
+
+            cur.execute(self.CONCURRENT_SQL, (oids,))
+            concurrent_views = {row[0] for row in cur.fetchall()}
+
+        return views, dependencies, concurrent_views
+
+    def refresh_view(self, mv_name, concurrently):
+        """
+        Refreshes a single materialized view on its own connection.
+        :param mv_name: Name of the materialized view.
+        :param concurrently: Whether to use REFRESH ... CONCURRENTLY.
+        """
+        option = "CONCURRENTLY " if concurrently else ""
+        with psycopg2.connect(**self.db_config) as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"REFRESH MATERIALIZED VIEW {option}{mv_name};")
+            conn.commit()
+        conn.close()
+
+    def refresh(self, mv_names, table_changes):
+        """
+        Refreshes the registered views whose sources changed, running independent branches in parallel.
+        A view is stale when one of its base tables received new rows in this run, when one of its
+        base tables was not updated by this run (its changes are unknown), when it reads an
+        unregistered materialized view (refreshed outside this run, so also unknown), or when an
+        upstream registered view was refreshed.
+        :param mv_names: List of registered materialized view names.
+        :param table_changes: Dictionary of table name to new rows inserted this run (None on failure).
+        :return: Dictionary of view name to 'refreshed', 'skipped' or 'failed'.
+        """
+        with psycopg2.connect(**self.db_config) as conn:
+            views, dependencies, concurrent_views = self.load_view_metadata(conn, mv_names)
+        conn.close()
+
+        upstream = {
+            view: {source for source in sources if source in views}
+            for view, sources in dependencies.items()
+        }
+        status = {}
+
+        def is_stale(view):
+            for source, relkind in dependencies[view].items():
+                if source in views:
+                    if status.get(views[source]) == "refreshed":
+                        return True
+                elif relkind == "m":
+                    return True
+                elif source not in table_changes or (table_changes[source] or 0) > 0:
+                    return True
+            return False
+
+        pending = set(views)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                ready = [view for view in pending if not (upstream[view] & (pending | set(running.values())))]
+                for view in ready:
+                    pending.discard(view)
+                    mv_name = views[view]
+                    if not is_stale(view):
+                        status[mv_name] = "skipped"
+                        print(f"Materialized view '{mv_name}' has no new source rows. Skipping refresh.")
+                        continue
+                    future = executor.submit(self.refresh_view, mv_name, view in concurrent_views)
+                    running[future] = view
+
+                if not running:
+                    if pending and not ready:
+                        break
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    mv_name = views[running.pop(future)]
+                    try:
+                        future.result()
+                        status[mv_name] = "refreshed"
+                        print(f"Materialized view '{mv_name}' refreshed successfully!")
+                    except Exception as e:
+                        status[mv_name] = "failed"
+                        print(f"Error refreshing materialized view '{mv_name}': {e}")
+
+        return status
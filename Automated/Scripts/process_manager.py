@@ -14,7 +14,7 @@ def run_updates():
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"run_updates called at {current_time} \n")
         registry = UpdateRegistry()
-        registry.execute_updates()
+        registry.execute_updates(concurrent=True)
         print('--------------------------------------------------------------------\n\n')
     except Exception as e:
         print(f"Error in run_updates: {e}")
@@ -0,0 +1,173 @@
+import random
+import statistics
+import time
+
+import numpy as np
+
+from http_client import HttpClient
+from qdrant_collection import QdrantCollection
+
+
+class QdrantBenchmark:
+    """
+    Measures filtered-search latency against collection size on a local Qdrant.
+    Two scratch collections grow side by side, one bare and one provisioned by QdrantCollection,
+    and the responder's query (one DAO, last 30 days) is timed at each size checkpoint.
+    """
+
+    DAY_MS = 24 * 60 * 60 * 1000
+
+    def __init__(self, qdrant_host="http://localhost:6333", vector_size=1536, dao_count=50, queries=50, seed=7):
+        """
+        Initializes the benchmark.
+        :param qdrant_host: Base URL of a Qdrant that may be written to.
+        :param vector_size: Embedding dimensions.
+        :param dao_count: Number of distinct dao_name values spread over the points.
+        :param queries: Searches timed per checkpoint.
+        :param seed: Seed of the generated vectors and payloads.
+        """
+        self.qdrant_host = qdrant_host
+        self.vector_size = vector_size
+        self.dao_names = [f"dao_{i}" for i in range(dao_count)]
+        self.queries = queries
+        self.rng = np.random.default_rng(seed)
+        self.random = random.Random(seed)
+        self.http = HttpClient.shared()
+        self.now_ms = int(time.time() * 1000)
+
+    def random_vectors(self, count):
+        """
+        Unit-length random vectors, as lists.
+        """
+        vectors = self.rng.standard_normal((count, self.vector_size)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors.tolist()
+
+    def create_bare(self, collection_name):
+        """
+        Create a collection the way it was created before provisioning: vectors only, no payload indexes.
+        """
+        url = f"{self.qdrant_host}/collections/{collection_name}"
+        self.http.request("DELETE", url)
+        response = self.http.request("PUT", url, json={"vectors": {"size": self.vector_size, "distance": "Cosine"}})
+        if response.status_code not in [200, 201]:
+            raise RuntimeError(f"Failed to create collection '{collection_name}': {response.text}")
+
+    def insert(self, collection_names, start_id, count, batch_size=1000):
+        """
+        Insert the same generated points into every collection.
+        :param start_id: ID of the first point; IDs are consecutive integers.
+        :param count: Number of points to insert.
+        """
+        for offset in range(0, count, batch_size):
+            size = min(batch_size, count - offset)
+            vectors = self.random_vectors(size)
+            points = []
+            for i, vector in enumerate(vectors):
+                point_id = start_id + offset + i
+                points.append({
+                    "id": point_id,
+                    "vector": vector,
+                    "payload": {
+                        "dao_name": self.random.choice(self.dao_names),
+                        "topic_id": point_id // 20,
+                        "comment_id": point_id,
+                        "timestamp": self.now_ms - self.random.randint(0, 365) * self.DAY_MS
+                    }
+                })
+            for collection_name in collection_names:
+                url = f"{self.qdrant_host}/collections/{collection_name}/points?wait=true"
+                response = self.http.request("PUT", url, json={"points": points})
+                if response.status_code != 200:
+                    raise RuntimeError(f"Failed to insert into '{collection_name}': {response.text}")
+
+    def wait_until_indexed(self, collection_name, timeout=600):
+        """
+        Wait for Qdrant to finish optimizing a collection, so timings do not include background indexing.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            response = self.http.request("GET", f"{self.qdrant_host}/collections/{collection_name}")
+            if response.status_code == 200 and response.json().get("result", {}).get("status") == "green":
+                return
+            time.sleep(1)
+        print(f"Collection '{collection_name}' still optimizing after {timeout}s; timing it anyway")
+
+    def time_searches(self, collection_name, params=None):
+        """
+        Time the responder's filtered search against a collection.
+        :param params: Search params sent with each query, or None for Qdrant's defaults.
+        :return: Tuple of (p50, p95) latency in milliseconds.
+        """
+        url = f"{self.qdrant_host}/collections/{collection_name}/points/search"
+        latencies = []
+        for vector in self.random_vectors(self.queries):
+            payload = {
+                "vector": vector,
+                "filter": {
+                    "must": [
+                        {"key": "dao_name", "match": {"value": self.random.choice(self.dao_names)}},
+                        {"key": "timestamp", "range": {"gte": self.now_ms - 30 * self.DAY_MS}}
+                    ]
+                },
+                "top": 4,
+                "with_payload": True
+            }
+            if params:
+                payload["params"] = params
+
+            started = time.perf_counter()
+            response = self.http.request("POST", url, json=payload)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f"Search on '{collection_name}' failed: {response.text}")
+
+        latencies.sort()
+        return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+    def run(self, sizes=(1000, 10000, 50000, 100000)):
+        """
+        Grow both collections through each size and print the latency of each at every checkpoint.
+        The scratch collections are deleted afterwards.
+        :param sizes: Increasing collection sizes to measure at.
+        :return: List of dictionaries with the size and p50/p95 of both collections.
+        """
+        bare = "dao_forum_benchmark_bare"
+        provisioned = QdrantCollection(self.qdrant_host, "dao_forum_benchmark_provisioned", self.vector_size)
+
+        results = []
+        try:
+            self.create_bare(bare)
+            provisioned.drop()
+            provisioned.ensure()
+
+            inserted = 0
+            for size in sorted(sizes):
+                self.insert([bare, provisioned.collection_name], inserted, size - inserted)
+                inserted = size
+                self.wait_until_indexed(bare)
+                self.wait_until_indexed(provisioned.collection_name)
+
+                bare_p50, bare_p95 = self.time_searches(bare)
+                prov_p50, prov_p95 = self.time_searches(provisioned.collection_name, QdrantCollection.SEARCH_PARAMS)
+                results.append({
+                    "size": size,
+                    "bare_p50_ms": round(bare_p50, 2),
+                    "bare_p95_ms": round(bare_p95, 2),
+                    "provisioned_p50_ms": round(prov_p50, 2),
+                    "provisioned_p95_ms": round(prov_p95, 2)
+                })
+                print(
+                    f"{size:>8} points | bare p50 {bare_p50:7.2f} ms, p95 {bare_p95:7.2f} ms"
+                    f" | provisioned p50 {prov_p50:7.2f} ms, p95 {prov_p95:7.2f} ms"
+                )
+        finally:
+            self.http.request("DELETE", f"{self.qdrant_host}/collections/{bare}")
+            provisioned.drop()
+        return results
+
+
+# **Usage**
+if __name__ == "__main__":
+    benchmark = QdrantBenchmark()
+    benchmark.run()
@@ -0,0 +1,110 @@
+from http_client import HttpClient
+
+
+class QdrantCollection:
+    """
+    Provisions the forum collection in Qdrant: vector, HNSW and scalar quantization settings plus payload
+    indexes on the fields that searches and deletes filter on, so filters stay index lookups as it grows.
+    """
+
+    # Fields filtered by the responder (dao_name, timestamp range) and by post deletes (dao_name, topic_id, comment_id)
+    PAYLOAD_INDEXES = {
+        "dao_name": "keyword",
+        "topic_id": "integer",
+        "comment_id": "integer",
+        "timestamp": "integer"
+    }
+
+    # payload_m also links points within each indexed payload value, so searches filtered to one DAO stay on the graph
+    HNSW_CONFIG = {"m": 16, "ef_construct": 128, "payload_m": 16, "full_scan_threshold": 10000}
+
+    # int8 vectors kept in RAM cut memory about 4x; originals stay on disk for rescoring
+    QUANTIZATION_CONFIG = {"scalar": {"type": "int8", "quantile": 0.99, "always_ram": True}}
+
+    OPTIMIZERS_CONFIG = {"indexing_threshold": 20000}
+
+    # Sent with every search: oversample on quantized vectors, then rescore with the originals
+    SEARCH_PARAMS = {"hnsw_ef": 128, "exact": False, "quantization": {"ignore": False, "rescore": True, "oversampling": 2.0}}
+
+    def __init__(self, qdrant_host="http://localhost:6333", collection_name="dao_forum_collection", vector_size=1536):
+        """
+        Initializes the provisioner.
+        :param qdrant_host: Base URL of Qdrant.
+        :param collection_name: Name of the collection.
+        :param vector_size: Embedding dimensions (1536 for text-embedding-ada-002).
+        """
+        self.qdrant_host = qdrant_host
+        self.collection_name = collection_name
+        self.vector_size = vector_size
+        self.http = HttpClient.shared()
+        self.url = f"{qdrant_host}/collections/{collection_name}"
+
+    def exists(self):
+        """
+        Whether the collection exists.
+        :raises RuntimeError: If Qdrant answered with an unexpected status.
+        """
+        response = self.http.request("GET", self.url)
+        if response.status_code == 404:
+            return False
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to read collection '{self.collection_name}': {response.status_code}, {response.text}")
+        return True
+
+    def create(self):
+        """
+        Create the collection with its vector, HNSW, quantization and optimizer settings.
+        """
+        payload = {
+            "vectors": {"size": self.vector_size, "distance": "Cosine", "on_disk": True},
+            "hnsw_config": self.HNSW_CONFIG,
+            "quantization_config": self.QUANTIZATION_CONFIG,
+            "optimizers_config": self.OPTIMIZERS_CONFIG
+        }
+        response = self.http.request("PUT", self.url, json=payload)
+        if response.status_code not in [200, 201]:
+            raise RuntimeError(f"Failed to create collection '{self.collection_name}': {response.text}")
+        print(f"Collection '{self.collection_name}' created.")
+
+    def update_config(self):
+        """
+        Apply the HNSW, quantization and optimizer settings to an existing collection; Qdrant rebuilds in the background.
+        """
+        payload = {
+            "hnsw_config": self.HNSW_CONFIG,
+            "quantization_config": self.QUANTIZATION_CONFIG,
+            "optimizers_config": self.OPTIMIZERS_CONFIG
+        }
+        response = self.http.request("PATCH", self.url, json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to update collection '{self.collection_name}': {response.text}")
+
+    def create_payload_indexes(self):
+        """
+        Create the payload indexes; Qdrant treats an existing index with the same schema as a no-op.
+        """
+        for field_name, field_schema in self.PAYLOAD_INDEXES.items():
+            response = self.http.request(
+                "PUT", f"{self.url}/index?wait=true", json={"field_name": field_name, "field_schema": field_schema}
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"Failed to index '{field_name}' on '{self.collection_name}': {response.text}")
+
+    def ensure(self):
+        """
+        Create or update the collection and make sure every payload index exists.
+        """
+        if self.exists():
+            self.update_config()
+        else:
+            self.create()
+        self.create_payload_indexes()
+        print(f"Collection '{self.collection_name}' is ready with indexes on {', '.join(self.PAYLOAD_INDEXES)}.")
+
+    def drop(self):
+        """
+        Delete the collection.
+        """
+        response = self.http.request("DELETE", self.url)
+        if response.status_code not in [200, 404]:
+            raise RuntimeError(f"Failed to delete collection '{self.collection_name}': {response.text}")
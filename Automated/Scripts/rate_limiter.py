@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every caller of one API.
+    The refill rate halves whenever the API throttles us and creeps back up to the
+    configured rate as requests succeed again.
+    """
+
+    # Shared limiters keyed by name, so every client of the same API draws from one budget
+    shared_limiters = {}
+    shared_lock = threading.Lock()
+
+    def __init__(self, rate, burst, min_rate=0.1, recovery_step=0.05):
+        """
+        Initializes the bucket full.
+        :param rate: Requests per second allowed by the API.
+        :param burst: Maximum number of requests that may be sent back to back.
+        :param min_rate: Lowest rate the limiter backs off to after repeated throttling.
+        :param recovery_step: Requests per second regained after each successful request.
+        """
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.recovery_step = recovery_step
+
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, name, rate, burst):
+        """
+        Return the process-wide limiter for an API, creating it on first use.
+        :param name: Name of the API, e.g. "tally".
+        :param rate: Requests per second, used only when the limiter is created.
+        :param burst: Bucket size, used only when the limiter is created.
+        :return: The shared RateLimiter.
+        """
+        with cls.shared_lock:
+            if name not in cls.shared_limiters:
+                cls.shared_limiters[name] = cls(rate, burst)
+            return cls.shared_limiters[name]
+
+    def refill(self, now):
+        """
+        Add the tokens earned since the last update. Callers must hold the lock.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self):
+        """
+        Take a token, or report how long to wait for one.
+        :return: Seconds to wait before retrying, or 0 if a token was taken.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+
+            self.refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """
+        Block until a request may be sent.
+        """
+        while True:
+            delay = self.reserve()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """
+        Wait without blocking the event loop until a request may be sent.
+        """
+        while True:
+            delay = self.reserve()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def on_success(self):
+        """
+        Record a successful request and recover part of the rate lost to throttling.
+        """
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+    def on_throttle(self, retry_after):
+        """
+        Record a 429: pause every caller for retry_after seconds and halve the rate.
+        :param retry_after: Seconds the API asked us to wait.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0
+            self.blocked_until = max(self.blocked_until, now + retry_after)
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+import requests
+
+from http_client import HttpClient
+
+
+class SeenPostIndex:
+    """
+    Local SQLite index of the forum posts already stored in Qdrant, keyed by (dao_name, topic_id, comment_id)
+    with a hash of the post content. Checked before any embedding or Qdrant call, so unchanged posts cost nothing.
+    """
+
+    def __init__(self, db_path="../cache/seen_posts.sqlite3"):
+        """
+        Opens (and creates if needed) the index.
+        :param db_path: Path to the SQLite file, relative to this script.
+        """
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.db_path = os.path.normpath(os.path.join(script_dir, db_path))
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        # Posts are processed from several threads; one connection is shared under a lock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self.lock:
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_posts (
+                dao_name TEXT NOT NULL,
+                topic_id INTEGER NOT NULL,
+                comment_id INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                PRIMARY KEY (dao_name, topic_id, comment_id)
+            )
+            """)
+            self.conn.commit()
+
+    @staticmethod
+    def content_hash(content):
+        """
+        Hash of a post's content.
+        :param content: Post content as stored in the Qdrant payload.
+        :return: Hex digest.
+        """
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get_hash(self, dao_name, topic_id, comment_id):
+        """
+        Content hash stored for a post.
+        :return: Hex digest, or None if the post has not been stored.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT content_hash FROM seen_posts WHERE dao_name = ? AND topic_id = ? AND comment_id = ?",
+                (dao_name, topic_id, comment_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def mark(self, dao_name, topic_id, comment_id, content_hash):
+        """
+        Record that a post is stored in Qdrant with the given content hash.
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO seen_posts (dao_name, topic_id, comment_id, content_hash) VALUES (?, ?, ?, ?)",
+                (dao_name, topic_id, comment_id, content_hash)
+            )
+            self.conn.commit()
+
+    def count(self):
+        """
+        Number of posts in the index.
+        """
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM seen_posts").fetchone()[0]
+
+    def rebuild_from_qdrant(self, qdrant_host, collection_name, batch_size=1000):
+        """
+        Replace the index with the posts found by scrolling the Qdrant collection.
+        Uses the payload's content_hash when present, otherwise hashes the payload content.
+        :param qdrant_host: Base URL of Qdrant.
+        :param collection_name: Name of the collection holding forum posts.
+        :param batch_size: Points fetched per scroll request.
+        :return: Number of posts indexed, or None if Qdrant could not be read.
+        """
+        url = f"{qdrant_host}/collections/{collection_name}/points/scroll"
+        rows = {}
+        offset = None
+
+        while True:
+            body = {
+                "limit": batch_size,
+                "with_payload": ["dao_name", "topic_id", "comment_id", "content", "content_hash"],
+                "with_vector": False
+            }
+            if offset is not None:
+                body["offset"] = offset
+
+            try:
+                response = HttpClient.shared().request("POST", url, json=body)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                print(f"Error scrolling Qdrant collection '{collection_name}': {e}")
+                return None
+
+            result = response.json().get("result", {})
+            for point in result.get("points", []):
+                payload = point.get("payload") or {}
+                if payload.get("comment_id") is None or payload.get("topic_id") is None:
+                    continue
+                key = (payload.get("dao_name"), payload["topic_id"], payload["comment_id"])
+                rows[key] = payload.get("content_hash") or self.content_hash(payload.get("content") or "")
+
+            offset = result.get("next_page_offset")
+            if offset is None:
+                break
+
+        with self.lock:
+            self.conn.execute("DELETE FROM seen_posts")
+            self.conn.executemany(
+                "INSERT INTO seen_posts (dao_name, topic_id, comment_id, content_hash) VALUES (?, ?, ?, ?)",
+                [key + (content_hash,) for key, content_hash in rows.items()]
+            )
+            self.conn.commit()
+
+        print(f"Rebuilt seen-post index with {len(rows)} posts from '{collection_name}'")
+        return len(rows)
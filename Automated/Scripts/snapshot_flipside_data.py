@@ -2,11 +2,22 @@ import os
 from dotenv import load_dotenv
 from flipside import Flipside
 from graph_generator import GraphGenerator
+from flipside_result_stream import FlipsideResultStream
+from flipside_query_cache import FlipsideQueryCache
 from datetime import datetime
+import time
+from decimal import Decimal, ROUND_HALF_UP
+import json
 
 
 class SnapshotFlipsideData:
 
+    # Snowflake format matching the ISO timestamps Flipside returns for TIMESTAMP columns
+    TIMESTAMP_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.FF3"Z"'
+
+    # How long a fetched bundle is reused before the halftime/final thread of a later run refetches it
+    BUNDLE_TTL_SECONDS = 900
+
     def __init__(self): 
         # Load the .env file
         load_dotenv()   
@@ -17,22 +28,54 @@ class SnapshotFlipsideData:
             "https://api-v2.flipsidecrypto.xyz"
         )
 
+        # Shared page iterator for every query below
+        self.result_stream = FlipsideResultStream(self.flipside, page_size=1000, prefetch=2)
+
+        # Local result cache so reruns and retries of a thread cost no Flipside credits
+        self.query_cache = FlipsideQueryCache()
+
+        # Analytics bundles already fetched, keyed by proposal ID: (fetched_at, bundle)
+        self.bundles = {}
+
         self.graph_generator = GraphGenerator() 
 
-    
-    def hourly_total_voting_power_by_choice(self, proposal_id):
+    def fetch_records(self, sql, proposal_end_time=None):
+        """
+        Return all records of a query, served from the local cache when possible.
+        :param sql: SQL query to execute on Flipside.
+        :param proposal_end_time: End time of the proposal the query is about; closed proposals are cached indefinitely.
+        :return: List of record dictionaries.
+        """
+        key = self.query_cache.make_key(sql, {"page_size": self.result_stream.page_size})
+        records = self.query_cache.get(key)
+        if records is None:
+            records = list(self.result_stream.records(sql))
+            self.query_cache.put(key, records, self.query_cache.ttl_for_proposal(proposal_end_time))
+        return records
+
+    def proposal_analytics_bundle(self, proposal_id, proposal_end_time=None):
+        """
+        Fetch every statistic a proposal thread needs with a single Flipside query.
+        The latest-vote dedup runs once for the proposal and the space is scanned once; each
+        section is returned as rows of (section, data) and split locally:
+          - choice_totals:   selected_choice, voters, voting_power
+          - hourly:          hour, selected_choice, total_voters, total_voting_power (cumulative)
+          - wallet_buckets:  voting_power_group, wallets, voting_power
+          - top_holders:     voting_power_group, wallet_count, total_voting_power
+          - space_activity:  proposal_id, start_time, voters, total_voting_power for the whole vote
+                             and halftime_start_time, halftime_voters, halftime_voting_power up to its halfway point
+        :param proposal_id: Snapshot proposal ID.
+        :param proposal_end_time: End time of the proposal; closed proposals are cached indefinitely.
+        :return: Dictionary of section name to list of row dictionaries.
+        """
+        cached = self.bundles.get(proposal_id)
+        if cached and time.monotonic() - cached[0] < self.BUNDLE_TTL_SECONDS:
+            return cached[1]
+
         sql = f"""
         WITH tab1 AS (
             SELECT 
                 VOTER,
-                TO_NUMBER(
-                REPLACE(
-                    REPLACE(
-                    REPLACE(ARRAY_TO_STRING(vote_option, ''), '[', ''), 
-                    ']', ''), 
-                    '"', ''
-                )
-                ) AS numeric_vote_option,
                 PARSE_JSON(ARRAY_TO_STRING(CHOICES, ',')) AS c,
                 c[(TO_NUMBER(
                 REPLACE(
@@ -44,71 +87,185 @@ class SnapshotFlipsideData:
                 ) - 1)] AS selected_choice,
                 VOTING_POWER,
                 DATE_TRUNC('hour', VOTE_TIMESTAMP) AS hour,
-                VOTE_TIMESTAMP,
                 ROW_NUMBER() OVER (PARTITION BY VOTER ORDER BY VOTE_TIMESTAMP DESC) AS rn
             FROM external.snapshot.ez_snapshot
             WHERE PROPOSAL_ID LIKE '{proposal_id}'
                 AND VOTING_POWER > 0
-        ), 
-        Final_tab as (
+        ),
+        latest_votes AS (
+            SELECT VOTER, selected_choice, VOTING_POWER, hour
+            FROM tab1
+            WHERE rn = 1
+        ),
+        choice_totals AS (
             SELECT
-            hour,
-            selected_choice,
-            count(DISTINCT voter) as voters,
-            sum(voters) over (partition by selected_choice order by hour) as total_voters,
-            sum(vp) as voting_power,
-            sum(voting_power) over (partition by selected_choice order by hour) as total_voting_power
-            from(
-                SELECT 
-                VOTER,
-                numeric_vote_option,
-                c,
                 selected_choice,
-                VOTING_POWER as vp,
+                COUNT(DISTINCT voter) AS voters,
+                SUM(voting_power) AS voting_power
+            FROM latest_votes
+            GROUP BY 1
+        ),
+        hourly AS (
+            SELECT
                 hour,
-                VOTE_TIMESTAMP
-                FROM tab1
-                WHERE rn = 1
-            )
-            GROUP by 1,2
-        ) 
-        Select 
-            hour,
-            selected_choice,
-            total_voters, 
-            total_voting_power
-        from Final_tab
-        order by hour
-        """
-        query_result_set = self.flipside.query(sql, page_number=1, page_size=1)
-
-        # Pagination setup
-        current_page_number = 1
-        page_size = 1000  # Adjust as necessary
-        total_pages = 2   # Start with 2 until we know the real number
-
-        # List to store all rows
-        all_rows = []
-
-        # Paginate through all available pages
-        while current_page_number <= total_pages:
-            results = self.flipside.get_query_results(
-                query_result_set.query_id,
-                page_number=current_page_number,
-                page_size=page_size
-            )
-
-            # Update total pages based on response
-            total_pages = results.page.totalPages
+                selected_choice,
+                SUM(COUNT(DISTINCT voter)) OVER (PARTITION BY selected_choice ORDER BY hour) AS total_voters,
+                SUM(SUM(voting_power)) OVER (PARTITION BY selected_choice ORDER BY hour) AS total_voting_power
+            FROM latest_votes
+            GROUP BY 1, 2
+        ),
+        wallet_buckets AS (
+            SELECT
+                case when Voting_power < 10 then 'a/ below 10'
+                when Voting_power < 100 then 'b/ 10-100'
+                when Voting_power < 1000 then 'c/ 100-1K'
+                when Voting_power < 10000 then 'd/ 1K-10K'
+                when Voting_power < 100000 then 'e/ 10K-100K'
+                when Voting_power < 1000000 then 'f/ 100K-1M'
+                when Voting_power < 10000000 then 'g/ 1M-10M'
+                else 'h/ 10M+' end as voting_power_group,
+                count(*) as wallets,
+                sum(Voting_power) as voting_power
+            FROM latest_votes
+            GROUP BY 1
+        ),
+        ranked_wallets AS (
+            SELECT 
+                VOTING_POWER,
+                SUM(VOTING_POWER) OVER (ORDER BY VOTING_POWER DESC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+                    / SUM(VOTING_POWER) OVER () AS voting_power_percentage
+            FROM latest_votes
+        ),
+        top_holders AS (
+            SELECT 
+                CASE 
+                    WHEN voting_power_percentage <= 0.10 THEN 'Top 10%'
+                    WHEN voting_power_percentage <= 0.25 THEN 'Top 25%'
+                    WHEN voting_power_percentage <= 0.50 THEN 'Top 50%'
+                    ELSE 'Others'
+                END AS voting_power_group,
+                COUNT(*) AS wallet_count,
+                SUM(VOTING_POWER) AS total_voting_power
+            FROM ranked_wallets
+            GROUP BY 1
+        ),
+        space AS (
+            SELECT space_id
+            FROM external.snapshot.fact_proposals
+            WHERE proposal_id LIKE '{proposal_id}'
+        ),
+        halfway_time AS (
+            SELECT 
+                proposal_id,
+                TIMESTAMPADD(
+                SECOND, 
+                DATEDIFF(SECOND, proposal_start_time, proposal_end_time) / 2, 
+                proposal_start_time
+                ) AS halfway_point
+            FROM external.snapshot.fact_proposals
+            WHERE space_id IN (SELECT space_id FROM space)
+            -- One halfway point per proposal, so duplicate proposal rows cannot multiply its votes in the join
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY proposal_id ORDER BY proposal_end_time DESC, proposal_start_time DESC) = 1
+        ),
+        space_activity AS (
+            SELECT 
+                ez.proposal_id,
+                MIN(ez.vote_timestamp) AS start_time,
+                COUNT(DISTINCT ez.voter) AS voters,
+                SUM(ez.voting_power) AS total_voting_power,
+                MIN(IFF(ez.vote_timestamp <= ht.halfway_point, ez.vote_timestamp, NULL)) AS halftime_start_time,
+                COUNT(DISTINCT IFF(ez.vote_timestamp <= ht.halfway_point, ez.voter, NULL)) AS halftime_voters,
+                SUM(IFF(ez.vote_timestamp <= ht.halfway_point, ez.voting_power, 0)) AS halftime_voting_power
+            FROM external.snapshot.ez_snapshot AS ez
+            LEFT JOIN halfway_time AS ht
+                ON ht.proposal_id = ez.proposal_id
+            WHERE ez.space_id IN (SELECT space_id FROM space)
+            GROUP BY 1
+        )
 
-            # Add records from this page to the list
-            if results.records:
-                all_rows.extend(results.records)
+        SELECT 'choice_totals' AS section, OBJECT_CONSTRUCT_KEEP_NULL(
+            'selected_choice', selected_choice, 'voters', voters, 'voting_power', voting_power) AS data
+        FROM choice_totals
+        UNION ALL
+        SELECT 'hourly', OBJECT_CONSTRUCT_KEEP_NULL(
+            'hour', TO_VARCHAR(hour, '{self.TIMESTAMP_FORMAT}'), 'selected_choice', selected_choice,
+            'total_voters', total_voters, 'total_voting_power', total_voting_power)
+        FROM hourly
+        UNION ALL
+        SELECT 'wallet_buckets', OBJECT_CONSTRUCT_KEEP_NULL(
+            'voting_power_group', voting_power_group, 'wallets', wallets, 'voting_power', voting_power)
+        FROM wallet_buckets
+        UNION ALL
+        SELECT 'top_holders', OBJECT_CONSTRUCT_KEEP_NULL(
+            'voting_power_group', voting_power_group, 'wallet_count', wallet_count, 'total_voting_power', total_voting_power)
+        FROM top_holders
+        UNION ALL
+        SELECT 'space_activity', OBJECT_CONSTRUCT_KEEP_NULL(
+            'proposal_id', proposal_id,
+            'start_time', TO_VARCHAR(start_time, '{self.TIMESTAMP_FORMAT}'),
+            'voters', voters,
+            'total_voting_power', total_voting_power,
+            'halftime_start_time', TO_VARCHAR(halftime_start_time, '{self.TIMESTAMP_FORMAT}'),
+            'halftime_voters', halftime_voters,
+            'halftime_voting_power', halftime_voting_power)
+        FROM space_activity
+        """
 
-            # Increment page number to move to the next page
-            current_page_number += 1
+        bundle = {
+            "choice_totals": [],
+            "hourly": [],
+            "wallet_buckets": [],
+            "top_holders": [],
+            "space_activity": []
+        }
+        for row in self.fetch_records(sql, proposal_end_time):
+            data = row["data"]
+            if isinstance(data, str):
+                data = json.loads(data)
+            bundle[row["section"]].append(data)
+
+        bundle["choice_totals"].sort(key=lambda r: r["voting_power"] or 0, reverse=True)
+        bundle["hourly"].sort(key=lambda r: r["hour"])
+        bundle["wallet_buckets"].sort(key=lambda r: r["voting_power_group"])
+
+        self.bundles[proposal_id] = (time.monotonic(), bundle)
+        return bundle
+
+    @staticmethod
+    def rank_stats(rows, proposal_id, voters_key, voting_power_key):
+        """
+        Rank a proposal against the other proposals in its space, like RANK() and PERCENT_RANK()
+        ordered by descending voters and voting power.
+        :param rows: List of per-proposal dictionaries.
+        :param proposal_id: Proposal to rank.
+        :param voters_key: Key holding the voter count.
+        :param voting_power_key: Key holding the voting power.
+        :return: Dictionary of voting_power_rank, voting_power_percentile_rank, voters_rank and
+                 voters_percentile_rank, or None if the proposal is not among the rows.
+        """
+        selected = next((row for row in rows if row["proposal_id"] == proposal_id), None)
+        if selected is None:
+            return None
+
+        def rank_and_percentile(key):
+            value = selected[key] or 0
+            rank = 1 + sum(1 for row in rows if (row[key] or 0) > value)
+            percent_rank = (rank - 1) / (len(rows) - 1) if len(rows) > 1 else 0
+            percentile = Decimal(str(percent_rank * 100)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            return rank, 100 - float(percentile)
+
+        voting_power_rank, voting_power_percentile = rank_and_percentile(voting_power_key)
+        voters_rank, voters_percentile = rank_and_percentile(voters_key)
+        return {
+            "voting_power_rank": voting_power_rank,
+            "voting_power_percentile_rank": voting_power_percentile,
+            "voters_rank": voters_rank,
+            "voters_percentile_rank": voters_percentile
+        }
+
+    def hourly_total_voting_power_by_choice(self, proposal_id, proposal_end_time=None):
+        bundle = self.proposal_analytics_bundle(proposal_id, proposal_end_time)
 
-        # Now 'all_rows' contains every record for our query in dictionary form.
         # Build two separate lists of lists:
         #
         #   1) [hour, selected_choice, total_voters]
@@ -117,8 +274,8 @@ class SnapshotFlipsideData:
         voters_data = []
         voting_power_data = []
 
-        for row in all_rows:
-            # Each 'row' is a dict with keys: "HOUR", "SELECTED_CHOICE", "TOTAL_VOTERS", "TOTAL_VOTING_POWER"
+        for row in bundle["hourly"]:
+            # Each 'row' is a dict with keys: "hour", "selected_choice", "total_voters", "total_voting_power"
             hour_str = row["hour"]
             hour_val = datetime.strptime(hour_str, "%Y-%m-%dT%H:%M:%S.%fZ")
 
@@ -146,96 +303,13 @@ class SnapshotFlipsideData:
     
     
 
-    def voting_power_by_wallet(self, proposal_id):
-        sql = f"""
-        WITH tab1 AS (
-            SELECT 
-                VOTER,
-                TO_NUMBER(
-                REPLACE(
-                    REPLACE(
-                    REPLACE(ARRAY_TO_STRING(vote_option, ''), '[', ''), 
-                    ']', ''), 
-                    '"', ''
-                )
-                ) AS numeric_vote_option,
-                PARSE_JSON(ARRAY_TO_STRING(CHOICES, ',')) AS c,
-                c[(TO_NUMBER(
-                REPLACE(
-                    REPLACE(
-                    REPLACE(ARRAY_TO_STRING(vote_option, ''), '[', ''), 
-                    ']', ''), 
-                    '"', ''
-                )
-                ) - 1)] AS selected_choice,
-                VOTING_POWER,
-                DATE_TRUNC('hour', VOTE_TIMESTAMP) AS hour,
-                VOTE_TIMESTAMP,
-                ROW_NUMBER() OVER (PARTITION BY VOTER ORDER BY VOTE_TIMESTAMP DESC) AS rn
-            FROM external.snapshot.ez_snapshot
-            WHERE PROPOSAL_ID LIKE '{proposal_id}'
-                AND VOTING_POWER > 0
-        )
-
-        SELECT
-        case when Voting_power < 10 then 'a/ below 10'
-        when Voting_power < 100 then 'b/ 10-100'
-        when Voting_power < 1000 then 'c/ 100-1K'
-        when Voting_power < 10000 then 'd/ 1K-10K'
-        when Voting_power < 100000 then 'e/ 10K-100K'
-        when Voting_power < 1000000 then 'f/ 100K-1M'
-        when Voting_power < 10000000 then 'g/ 1M-10M'
-        else 'h/ 10M+' end as voting_power_group,
-        count(*) as wallets,
-        sum(Voting_power) as voting_power
-        from (
-            SELECT 
-            VOTER,
-            numeric_vote_option,
-            c,
-            selected_choice,
-            VOTING_POWER,
-            hour,
-            VOTE_TIMESTAMP
-            FROM tab1
-            WHERE rn = 1
-        )
-        GROUP by 1
-        order by voting_power_group 
-        """
-        query_result_set = self.flipside.query(sql, page_number=1, page_size=1)
-
-        # Pagination setup
-        current_page_number = 1
-        page_size = 1000  # Adjust as necessary
-        total_pages = 2   # Start with 2 until we know the real number
-
-        # List to store all rows
-        all_rows = []
-
-        # Paginate through all available pages
-        while current_page_number <= total_pages:
-            results = self.flipside.get_query_results(
-                query_result_set.query_id,
-                page_number=current_page_number,
-                page_size=page_size
-            )
-
-            # Update total pages based on response
-            total_pages = results.page.totalPages
-
-            # Add records from this page to the list
-            if results.records:
-                all_rows.extend(results.records)
-
-            # Increment page number to move to the next page
-            current_page_number += 1
-
+    def voting_power_by_wallet(self, proposal_id, proposal_end_time=None):
+        bundle = self.proposal_analytics_bundle(proposal_id, proposal_end_time)
 
         voters_data = []
         voting_power_data = []
 
-        for row in all_rows:
+        for row in bundle["wallet_buckets"]:
             voting_power_group = row["voting_power_group"]
             wallets = row["wallets"]
             voting_power = row["voting_power"]
@@ -256,91 +330,23 @@ class SnapshotFlipsideData:
         
         return Tweet3_data
     
-    def space_proposals_by_voting_power(self, proposal_id):
-        sql = f"""
-            WITH tab1 AS (
-                SELECT 
-                    space_id
-                FROM external.snapshot.fact_proposals
-                WHERE proposal_id LIKE '{proposal_id}'
-            ), 
-            tab2 as (
-                SELECT 
-                    proposal_id,
-                    proposal_start_time,
-                    proposal_end_time
-                FROM external.snapshot.fact_proposals
-                where space_id in (SELECT space_id from tab1)
-            ), 
-            halfway_time AS (
-                SELECT 
-                    proposal_id,
-                    proposal_start_time,
-                    proposal_end_time,
-                    TIMESTAMPADD(
-                    SECOND, 
-                    DATEDIFF(SECOND, proposal_start_time, proposal_end_time) / 2, 
-                    proposal_start_time
-                    ) AS halfway_point
-                FROM tab2
-            )
-
-            SELECT 
-            ez.proposal_id,
-            CASE 
-                WHEN ez.proposal_id LIKE '{proposal_id}' THEN 'Selected Proposal' 
-                ELSE 'Other Proposal' 
-            END AS proposal_type,
-            MIN(ez.vote_timestamp) AS start_time,
-            COUNT(DISTINCT ez.voter) AS voters,
-            SUM(ez.voting_power) AS total_voting_power
-            FROM external.snapshot.ez_snapshot AS ez
-            JOIN halfway_time AS ht
-                on ht.proposal_id = ez.proposal_id
-            WHERE ez.vote_timestamp < ht.halfway_point
-            GROUP BY 1, 2;
-            Order by start_time  
-        """
-        query_result_set = self.flipside.query(sql, page_number=1, page_size=1)
-
-        # Pagination setup
-        current_page_number = 1
-        page_size = 1000  # Adjust as necessary
-        total_pages = 2   # Start with 2 until we know the real number
-
-        # List to store all rows
-        all_rows = []
-
-        # Paginate through all available pages
-        while current_page_number <= total_pages:
-            results = self.flipside.get_query_results(
-                query_result_set.query_id,
-                page_number=current_page_number,
-                page_size=page_size
-            )
-
-            # Update total pages based on response
-            total_pages = results.page.totalPages
-
-            # Add records from this page to the list
-            if results.records:
-                all_rows.extend(results.records)
-
-            # Increment page number to move to the next page
-            current_page_number += 1
-
+    def space_proposals_by_voting_power(self, proposal_id, proposal_end_time=None):
+        bundle = self.proposal_analytics_bundle(proposal_id, proposal_end_time)
 
         voters_data = []
         voting_power_data = []
 
-        for row in all_rows:
+        # Activity of every proposal in the space up to its halfway point
+        for row in bundle["space_activity"]:
+            if not row["halftime_voters"]:
+                continue
 
-            start_time_str = row["start_time"]
+            start_time_str = row["halftime_start_time"]
             start_time = datetime.strptime(start_time_str, "%Y-%m-%dT%H:%M:%S.%fZ")
 
-            proposal_type = row["proposal_type"]
-            total_voters = row["voters"]
-            total_voting_power = row["total_voting_power"]
+            proposal_type = "Selected Proposal" if row["proposal_id"] == proposal_id else "Other Proposal"
+            total_voters = row["halftime_voters"]
+            total_voting_power = row["halftime_voting_power"]
 
             # Append to separate lists
             voters_data.append([start_time, proposal_type, total_voters])
@@ -354,65 +360,15 @@ class SnapshotFlipsideData:
         
         return Tweet4_data
 
-    def prompt_stats(self, proposal_id): 
+    def prompt_stats(self, proposal_id, proposal_end_time=None): 
         prompt_data = {}
+        bundle = self.proposal_analytics_bundle(proposal_id, proposal_end_time)
 
         # Part1
         ###########################################################
 
-        sql1 = f"""
-            WITH tab1 AS (
-                SELECT 
-                    VOTER,
-                    TO_NUMBER(
-                    REPLACE(
-                        REPLACE(
-                        REPLACE(ARRAY_TO_STRING(vote_option, ''), '[', ''), 
-                        ']', ''), 
-                        '"', ''
-                    )
-                    ) AS numeric_vote_option,
-                    PARSE_JSON(ARRAY_TO_STRING(CHOICES, ',')) AS c,
-                    c[(TO_NUMBER(
-                    REPLACE(
-                        REPLACE(
-                        REPLACE(ARRAY_TO_STRING(vote_option, ''), '[', ''), 
-                        ']', ''), 
-                        '"', ''
-                    )
-                    ) - 1)] AS selected_choice,
-                    VOTING_POWER,
-                    DATE_TRUNC('hour', VOTE_TIMESTAMP) AS hour,
-                    VOTE_TIMESTAMP,
-                    ROW_NUMBER() OVER (PARTITION BY VOTER ORDER BY VOTE_TIMESTAMP DESC) AS rn
-                FROM external.snapshot.ez_snapshot
-                WHERE PROPOSAL_ID LIKE '{proposal_id}'
-                    AND VOTING_POWER > 0
-            ) 
-            SELECT
-                selected_choice,
-                COUNT(DISTINCT voter) AS voters,
-                SUM(vp) AS voting_power
-            FROM (
-                SELECT 
-                    VOTER,
-                    numeric_vote_option,
-                    c,
-                    selected_choice,
-                    VOTING_POWER AS vp,
-                    hour,
-                    VOTE_TIMESTAMP
-                FROM tab1
-                WHERE rn = 1
-            )
-            GROUP BY 1
-            ORDER BY voting_power DESC
-        """
-
-        # Submit the query and await the results in one step.
-        result1 = self.flipside.query(sql1)
-
-        records1 = result1.records
+        # Sorted by voting_power descending
+        records1 = bundle["choice_totals"]
         if not records1:
             return prompt_data  # No data returned
 
@@ -444,142 +400,24 @@ class SnapshotFlipsideData:
         prompt_data["total_voting_power"] = total_voting_power
         prompt_data["total_voters"] = total_voters
 
-        # Part2
+        # Part2: rank among the space's proposals at their halfway points
         ###########################################################
 
-        sql2 = f"""
-            WITH tab1 AS (
-                SELECT space_id
-                FROM external.snapshot.fact_proposals
-                WHERE proposal_id LIKE '{proposal_id}'
-            ),
-            tab2 AS (
-                SELECT 
-                    proposal_id,
-                    proposal_start_time,
-                    proposal_end_time,
-                    PROPOSAL_TITLE
-                FROM external.snapshot.fact_proposals
-                WHERE space_id IN (SELECT space_id FROM tab1)
-            ),
-            halfway_time AS (
-                SELECT 
-                    proposal_id,
-                    PROPOSAL_TITLE,
-                    proposal_start_time,
-                    proposal_end_time,
-                    TIMESTAMPADD(
-                    SECOND, 
-                    DATEDIFF(SECOND, proposal_start_time, proposal_end_time) / 2, 
-                    proposal_start_time
-                    ) AS halfway_point
-                FROM tab2
-            ),
-            proposal_data AS (
-                SELECT 
-                    ez.proposal_id,
-                    ht.PROPOSAL_TITLE,
-                    CASE WHEN ez.proposal_id LIKE '{proposal_id}' THEN 'Selected Proposal' ELSE 'Other Proposal' END AS proposal_type,
-                    MIN(ez.vote_timestamp) AS start_time,
-                    COUNT(DISTINCT ez.voter) AS voters,
-                    SUM(ez.voting_power) AS total_voting_power
-                FROM external.snapshot.ez_snapshot AS ez
-                JOIN halfway_time AS ht
-                    ON ez.proposal_id = ht.proposal_id
-                WHERE ez.vote_timestamp <= ht.halfway_point
-                GROUP BY 1, 2, 3
-            ),
-            ranked_proposals AS (
-            SELECT 
-                proposal_id,
-                proposal_type,
-                PROPOSAL_TITLE,
-                voters,
-                start_time,
-                total_voting_power,
-                RANK() OVER (ORDER BY total_voting_power DESC) AS voting_power_rank,
-                RANK() OVER (ORDER BY voters DESC) AS voters_rank,
-                COUNT(*) OVER () AS total_proposals,
-                PERCENT_RANK() OVER (ORDER BY voters DESC) AS voters_percentile,
-                PERCENT_RANK() OVER (ORDER BY total_voting_power DESC) AS voting_power_percentile
-            FROM proposal_data
-            )
-
-            SELECT
-            voting_power_rank,
-            100 - ROUND(voting_power_percentile * 100, 2) AS voting_power_percentile_rank,
-            voters_rank,
-            100 - ROUND(voters_percentile * 100, 2) AS voters_percentile_rank
-            FROM ranked_proposals
-            Where PROPOSAL_ID LIKE '{proposal_id}'
-        """
-
-        result2 = self.flipside.query(sql2)
-        records2 = result2.records
+        halftime_rows = [row for row in bundle["space_activity"] if row["halftime_voters"]]
+        row = self.rank_stats(halftime_rows, proposal_id, "halftime_voters", "halftime_voting_power")
 
-        # We expect exactly one row from this query.
-        if records2:
-            row = records2[0]
-            # row2 keys will be lowercase, e.g. "voting_power_rank", etc.
+        if row:
             prompt_data["voting_power_rank"] = row["voting_power_rank"]
             prompt_data["voter_turnout_rank"] = row["voters_rank"]
             prompt_data["voting_power_percentile"] = row["voting_power_percentile_rank"]
             prompt_data["voter_percentile"] = row["voters_percentile_rank"]
 
-        # Part3
+        # Part3: rank among the space's proposals over their whole vote
         ###########################################################
 
+        row = self.rank_stats(bundle["space_activity"], proposal_id, "voters", "total_voting_power")
 
-        sql3 = f"""
-            WITH tab1 AS (
-            SELECT space_id
-            FROM external.snapshot.fact_proposals
-            WHERE proposal_id LIKE '{proposal_id}'
-            ),
-            proposal_data AS (
-            SELECT 
-                proposal_id,
-                PROPOSAL_TITLE,
-                CASE WHEN proposal_id LIKE '{proposal_id}' THEN 'Selected Proposal' ELSE 'Other Proposal' END AS proposal_type,
-                MIN(vote_timestamp) AS start_time,
-                COUNT(DISTINCT voter) AS voters,
-                SUM(voting_power) AS total_voting_power
-            FROM external.snapshot.ez_snapshot
-            WHERE space_id IN (SELECT * FROM tab1)
-            GROUP BY 1, 2, 3
-            ),
-            ranked_proposals AS (
-            SELECT 
-                proposal_id,
-                proposal_type,
-                PROPOSAL_TITLE,
-                voters,
-                start_time,
-                total_voting_power,
-                RANK() OVER (ORDER BY total_voting_power DESC) AS voting_power_rank,
-                RANK() OVER (ORDER BY voters DESC) AS voters_rank,
-                COUNT(*) OVER () AS total_proposals,
-                PERCENT_RANK() OVER (ORDER BY voters DESC) AS voters_percentile,
-                PERCENT_RANK() OVER (ORDER BY total_voting_power DESC) AS voting_power_percentile
-            FROM proposal_data
-            )
-
-            SELECT
-            voting_power_rank,
-            100 - ROUND(voting_power_percentile * 100, 2) AS voting_power_percentile_rank,
-            voters_rank,
-            100 - ROUND(voters_percentile * 100, 2) AS voters_percentile_rank
-            FROM ranked_proposals
-            WHERE Proposal_ID LIKE '{proposal_id}'
-        """
-
-        result3 = self.flipside.query(sql3)
-        records3 = result3.records
-
-        # We expect exactly one row from this query.
-        if records3:
-            row = records3[0]
-            # row2 keys will be lowercase, e.g. "voting_power_rank", etc.
+        if row:
             prompt_data["final_voting_power_rank"] = row["voting_power_rank"]
             prompt_data["final_voter_turnout_rank"] = row["voters_rank"]
             prompt_data["final_voting_power_percentile"] = row["voting_power_percentile_rank"]
@@ -588,82 +426,7 @@ class SnapshotFlipsideData:
         # Part4
         ###########################################################
 
-        sql4 = f""" 
-            WITH tab1 AS (
-                SELECT 
-                    VOTER,
-                    TO_NUMBER(
-                    REPLACE(
-                        REPLACE(
-                        REPLACE(ARRAY_TO_STRING(vote_option, ''), '[', ''), 
-                        ']', ''), 
-                        '"', ''
-                    )
-                    ) AS numeric_vote_option,
-                    PARSE_JSON(ARRAY_TO_STRING(CHOICES, ',')) AS c,
-                    c[(TO_NUMBER(
-                    REPLACE(
-                        REPLACE(
-                        REPLACE(ARRAY_TO_STRING(vote_option, ''), '[', ''), 
-                        ']', ''), 
-                        '"', ''
-                    )
-                    ) - 1)] AS selected_choice,
-                    VOTING_POWER,
-                    DATE_TRUNC('hour', VOTE_TIMESTAMP) AS hour,
-                    VOTE_TIMESTAMP,
-                    ROW_NUMBER() OVER (PARTITION BY VOTER ORDER BY VOTE_TIMESTAMP DESC) AS rn
-                FROM external.snapshot.ez_snapshot
-                WHERE PROPOSAL_ID LIKE '{proposal_id}'
-                    AND VOTING_POWER > 0
-                ),
-                ranked_wallets AS (
-                SELECT 
-                    VOTER,
-                    VOTING_POWER,
-                    ROW_NUMBER() OVER (ORDER BY VOTING_POWER DESC) AS rank,
-                    SUM(VOTING_POWER) OVER () AS total_voting_power,
-                    SUM(VOTING_POWER) OVER (ORDER BY VOTING_POWER DESC ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS cumulative_voting_power
-                FROM (
-                    SELECT 
-                    VOTER,
-                    VOTING_POWER
-                    FROM tab1
-                    WHERE rn = 1
-                )
-                ),
-                percentile_calculations AS (
-                SELECT 
-                    rank,
-                    VOTER,
-                    VOTING_POWER,
-                    cumulative_voting_power,
-                    total_voting_power,
-                    cumulative_voting_power / total_voting_power AS voting_power_percentage
-                FROM ranked_wallets
-                )
-
-                SELECT 
-                CASE 
-                    WHEN voting_power_percentage <= 0.10 THEN 'Top 10%'
-                    WHEN voting_power_percentage <= 0.25 THEN 'Top 25%'
-                    WHEN voting_power_percentage <= 0.50 THEN 'Top 50%'
-                    ELSE 'Others'
-                END AS voting_power_group,
-                COUNT(*) AS wallet_count,
-                SUM(VOTING_POWER) AS total_voting_power
-                FROM percentile_calculations
-                GROUP BY 1
-                ORDER BY CASE 
-                WHEN voting_power_group = 'Top 10%' THEN 1
-                WHEN voting_power_group = 'Top 25%' THEN 2
-                WHEN voting_power_group = 'Top 50%' THEN 3
-                ELSE 4
-                END;
-        """
-        
-        result4 = self.flipside.query(sql4)
-        records4 = result4.records
+        records4 = bundle["top_holders"]
 
         # Initialize defaults in case some groups are missing:
         prompt_data["top_10%_voting_power_wallets"] = 1
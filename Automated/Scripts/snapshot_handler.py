@@ -161,7 +161,7 @@ class SnapshotHandler:
         twitter_handle = self.spaces_data[space_id]["twitter"]
         dao_name = self.spaces_data[space_id]["dao_name"]
         
-        prompt_data = self.flipside_gov_data.prompt_stats(proposal_id)
+        prompt_data = self.flipside_gov_data.prompt_stats(proposal_id, proposal_end_time)
 
         # Messages for the current proposal
         messages = []
@@ -403,7 +403,7 @@ class SnapshotHandler:
         twitter_handle = self.spaces_data[space_id]["twitter"]
         dao_name = self.spaces_data[space_id]["dao_name"]
 
-        prompt_data = self.flipside_gov_data.prompt_stats(proposal_id)
+        prompt_data = self.flipside_gov_data.prompt_stats(proposal_id, proposal_end_time)
         
         # Messages for the current proposal
         messages = []
@@ -673,9 +673,9 @@ class SnapshotHandler:
         dao_name = halftime_message.get("dao_name", "")
                     
         cover_image = self.generate_space_image(space_id, 2)
-        Tweet2_media = self.flipside_gov_data.hourly_total_voting_power_by_choice(proposal_id)
-        Tweet3_media = self.flipside_gov_data.voting_power_by_wallet(proposal_id)
-        Tweet4_media = self.flipside_gov_data.space_proposals_by_voting_power(proposal_id)
+        Tweet2_media = self.flipside_gov_data.hourly_total_voting_power_by_choice(proposal_id, proposal['proposal_end_time'])
+        Tweet3_media = self.flipside_gov_data.voting_power_by_wallet(proposal_id, proposal['proposal_end_time'])
+        Tweet4_media = self.flipside_gov_data.space_proposals_by_voting_power(proposal_id, proposal['proposal_end_time'])
 
         orginal_post_id = self.twitter_client.post_with_media(messages[0], cover_image)
         thread1_id = self.twitter_client.post_thread_reply_with_media(messages[1], Tweet2_media, orginal_post_id)
@@ -684,6 +684,7 @@ class SnapshotHandler:
         self.twitter_client.post_thread_reply(messages[4], thread3_id)
 
         self.comment_handler.set_tweet_id(orginal_post_id, proposal_title, space_id, proposal_description, dao_name)
+        print(f"Flipside cache stats: {self.flipside_gov_data.query_cache.stats()}")
 
 
     def create_proposal_final(self, proposal):
@@ -698,9 +699,9 @@ class SnapshotHandler:
         dao_name = final_message.get("dao_name", "")
                     
         cover_image = self.generate_space_image(space_id, 3)
-        Tweet2_media = self.flipside_gov_data.hourly_total_voting_power_by_choice(proposal_id)
-        Tweet3_media = self.flipside_gov_data.voting_power_by_wallet(proposal_id)
-        Tweet4_media = self.flipside_gov_data.space_proposals_by_voting_power(proposal_id)
+        Tweet2_media = self.flipside_gov_data.hourly_total_voting_power_by_choice(proposal_id, proposal['proposal_end_time'])
+        Tweet3_media = self.flipside_gov_data.voting_power_by_wallet(proposal_id, proposal['proposal_end_time'])
+        Tweet4_media = self.flipside_gov_data.space_proposals_by_voting_power(proposal_id, proposal['proposal_end_time'])
 
         orginal_post_id = self.twitter_client.post_with_media(messages[0], cover_image)
         thread1_id = self.twitter_client.post_thread_reply_with_media(messages[1], Tweet2_media, orginal_post_id)
@@ -709,6 +710,7 @@ class SnapshotHandler:
         self.twitter_client.post_thread_reply(messages[4], thread3_id)
 
         self.comment_handler.set_tweet_id(orginal_post_id, proposal_title, space_id, proposal_description, dao_name)
+        print(f"Flipside cache stats: {self.flipside_gov_data.query_cache.stats()}")
 
     
     def _generate_chatGPT_response(self, prompt: str) -> str:
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+
+class SourceRegistry:
+    """
+    Registry of the Tally governors and Discourse forums the crawlers fetch, loaded from config/sources.json.
+    Entries are deduplicated on load and carry a crawl priority (1 = first) and a refresh interval;
+    the time each source was last crawled is kept in a separate state file.
+    """
+
+    TALLY = "tally_governors"
+    DISCOURSE = "discourse_forums"
+
+    # Lets a daily job that fires a little early still crawl sources with a 24 hour interval
+    DUE_SLACK = timedelta(minutes=30)
+
+    # Parsed registries keyed by file path, so the file is read once per process
+    loaded_sources = {}
+    load_lock = threading.Lock()
+
+    def __init__(self, sources_file="../config/sources.json", state_file="../config/source_crawl_state.json"):
+        """
+        Initializes the registry.
+        :param sources_file: Path to the JSON file listing the sources, relative to this script.
+        :param state_file: Path to the JSON file recording when each source was last crawled.
+        """
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.sources_file = os.path.normpath(os.path.join(script_dir, sources_file))
+        self.state_file = os.path.normpath(os.path.join(script_dir, state_file))
+        self.state_lock = threading.Lock()
+        self.sources = self.load_sources()
+
+    @staticmethod
+    def normalize_url(url):
+        """
+        Normalize a forum URL to its base: lowercase scheme and host, no trailing slash or /latest.
+        :param url: Forum URL as written in the registry.
+        :return: Base URL such as https://gov.uniswap.org.
+        """
+        parts = urlsplit(url.strip())
+        path = parts.path.rstrip("/")
+        if path.endswith("/latest"):
+            path = path[:-len("/latest")]
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}{path.rstrip('/')}"
+
+    def source_key(self, kind, source):
+        """
+        Identity of a source used for deduplication and crawl state.
+        :param kind: SourceRegistry.TALLY or SourceRegistry.DISCOURSE.
+        :param source: Source dictionary.
+        """
+        if kind == self.TALLY:
+            return source["governor_id"].lower()
+        return source["base_url"]
+
+    def load_sources(self):
+        """
+        Load and deduplicate the registry file, once per process.
+        :return: Dictionary of kind to list of source dictionaries sorted by priority.
+        """
+        with self.load_lock:
+            if self.sources_file in self.loaded_sources:
+                return self.loaded_sources[self.sources_file]
+
+            try:
+                with open(self.sources_file, "r") as file:
+                    data = json.load(file)
+            except Exception as e:
+                print(f"Error loading JSON file {self.sources_file}: {e}")
+                data = {}
+
+            sources = {}
+            for kind in (self.TALLY, self.DISCOURSE):
+                unique = {}
+                for source in data.get(kind, []):
+                    source = dict(source)
+                    if kind == self.DISCOURSE:
+                        source["base_url"] = self.normalize_url(source["base_url"])
+                    source.setdefault("priority", 1)
+                    source.setdefault("refresh_interval_hours", 24)
+
+                    key = self.source_key(kind, source)
+                    if key in unique:
+                        print(f"Duplicate source '{source['name']}' ({key}) in {self.sources_file}. Skipping...")
+                        continue
+                    unique[key] = source
+                sources[kind] = sorted(unique.values(), key=lambda s: s["priority"])
+
+            self.loaded_sources[self.sources_file] = sources
+            return sources
+
+    def load_state(self):
+        """
+        Load the crawl state. Callers must hold the state lock.
+        :return: Dictionary of kind to {source key: last crawl ISO timestamp}.
+        """
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r") as file:
+                    return json.load(file)
+            except Exception as e:
+                print(f"Error loading JSON file {self.state_file}: {e}")
+        return {}
+
+    def get_sources(self, kind, due_only=False):
+        """
+        Sources of one kind, highest priority first.
+        :param kind: SourceRegistry.TALLY or SourceRegistry.DISCOURSE.
+        :param due_only: Only return sources whose refresh interval has elapsed since their last crawl.
+        :return: List of source dictionaries.
+        """
+        sources = self.sources.get(kind, [])
+        if not due_only:
+            return list(sources)
+
+        with self.state_lock:
+            last_crawled = self.load_state().get(kind, {})
+
+        now = datetime.now(timezone.utc)
+        due = []
+        for source in sources:
+            last = last_crawled.get(self.source_key(kind, source))
+            interval = timedelta(hours=source["refresh_interval_hours"])
+            if last is None or now - datetime.fromisoformat(last) + self.DUE_SLACK >= interval:
+                due.append(source)
+        return due
+
+    def tally_governors(self, due_only=False):
+        """
+        Tally governors, highest priority first.
+        :param due_only: Only return governors due for a crawl.
+        """
+        return self.get_sources(self.TALLY, due_only)
+
+    def discourse_forums(self, due_only=False):
+        """
+        Discourse forums, highest priority first.
+        :param due_only: Only return forums due for a crawl.
+        """
+        return self.get_sources(self.DISCOURSE, due_only)
+
+    def mark_crawled(self, kind, sources):
+        """
+        Record that sources were crawled successfully just now.
+        :param kind: SourceRegistry.TALLY or SourceRegistry.DISCOURSE.
+        :param sources: Source dictionaries that were crawled.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        with self.state_lock:
+            state = self.load_state()
+            crawled = state.setdefault(kind, {})
+            for source in sources:
+                crawled[self.source_key(kind, source)] = now
+            try:
+                with open(self.state_file, "w") as file:
+                    json.dump(state, file, indent=4)
+            except Exception as e:
+                print(f"Error saving JSON file {self.state_file}: {e}")
@@ -3,6 +3,8 @@ from dotenv import load_dotenv
 import os
 from flipside import Flipside
 from update_registry import UpdateRegistry
+from bulk_loader import BulkLoader
+from flipside_result_stream import FlipsideResultStream
 
 class TableManager:
     """
@@ -16,6 +18,7 @@ class TableManager:
         """
         load_dotenv()
         self.registry = registry
+        self.bulk_loader = BulkLoader()
         self.db_config = {
             "host": os.getenv("DATABASE_HOST"),
             "database": os.getenv("DATABASE_NAME"),
@@ -78,52 +81,32 @@ class TableManager:
             return
 
         flipside = Flipside(os.getenv("FLIPSIDE_API_KEY"), "https://api-v2.flipsidecrypto.xyz")
+        conn = None
         try:
-            query_result_set = flipside.query(sql_query, page_number=1, page_size=1)
-
-            all_rows = []
-            current_page_number = 1
-            total_pages = 2
-
-            while current_page_number <= total_pages:
-                results = flipside.get_query_results(
-                    query_result_set.query_id,
-                    page_number=current_page_number,
-                    page_size=1000
-                )
-                total_pages = results.page.totalPages
-                if results.records:
-                    all_rows.extend(results.records)
-                current_page_number += 1
-
             conn = self.connect()
             if conn:
-                with conn.cursor() as cur:
-                    columns = ", ".join(self.columns.keys())
-                    placeholders = ", ".join(["%s"] * len(self.columns))
-                    insert_sql = f"""
-                    INSERT INTO {self.table_name} ({columns})
-                    VALUES ({placeholders})
-                    ON CONFLICT ({self.primary_key}) DO NOTHING;
-                    """
-                    for row in all_rows:
-                        cur.execute(insert_sql, tuple(row[col] for col in self.columns.keys()))
-                    conn.commit()
+                pages = FlipsideResultStream(flipside).pages(sql=sql_query)
+                self.bulk_loader.load(conn, self.table_name, self.columns, self.primary_key, pages)
+                conn.commit()
         except Exception as e:
             print(f"Error fetching or inserting data: {e}")
         finally:
             if conn:
                 conn.close()
 
-    def add_update_query(self, update_query):
+    def add_update_query(self, update_query, watermark_column=None, lookback_hours=0):
         """
         Registers an update query with the centralized registry.
         :param update_query: SQL query to use for updating the table.
+        :param watermark_column: Optional timestamp column for incremental updates.
+        :param lookback_hours: Hours re-fetched before the high-water mark on each run.
         """
         
         self.registry.register_table_update(
             table_name=self.table_name,
             update_query=update_query,
             columns=self.columns,
-            primary_key=self.primary_key
+            primary_key=self.primary_key,
+            watermark_column=watermark_column,
+            lookback_hours=lookback_hours
         )
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+
+import httpx
+import requests
+from dotenv import load_dotenv
+
+from http_client import HttpClient
+from rate_limiter import RateLimiter
+
+
+class TallyApiClient:
+    """
+    Sends GraphQL queries to the Tally API through the shared Tally rate limiter.
+    Throughput follows the API quota: requests wait for a token instead of sleeping a fixed
+    second, and 429 / Retry-After responses slow down every Tally caller in the process.
+    """
+
+    URL = "https://api.tally.xyz/query"
+
+    # Statuses that are retried after a backoff
+    RETRY_STATUSES = {429, 502, 503, 504}
+
+    def __init__(self, max_retries=5):
+        """
+        Initializes the client. The quota is read from the environment:
+          TALLY_REQUESTS_PER_SECOND (default 1), TALLY_BURST (default 1) and
+          TALLY_MAX_CONCURRENCY (default 4, governors crawled at the same time).
+        :param max_retries: Attempts per query on throttling or gateway errors.
+        """
+        load_dotenv()
+        self.tally_api_key = os.getenv("TALLY_API_KEY")
+        self.max_retries = max_retries
+        self.max_concurrency = int(os.getenv("TALLY_MAX_CONCURRENCY", "4"))
+
+        self.limiter = RateLimiter.shared(
+            "tally",
+            float(os.getenv("TALLY_REQUESTS_PER_SECOND", "1")),
+            float(os.getenv("TALLY_BURST", "1"))
+        )
+
+        # Pooled keep-alive sessions shared with the other network clients; retries stay here so they go through the limiter
+        self.http = HttpClient.shared()
+
+    def create_async_client(self):
+        """
+        Create one pooled HTTP/2 client for an asyncio crawl; the caller closes it.
+        :return: An httpx.AsyncClient sized to the concurrency budget.
+        """
+        return httpx.AsyncClient(
+            http2=True,
+            headers={"Api-Key": self.tally_api_key},
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        )
+
+    def query(self, query, variables):
+        """
+        Run a GraphQL query against Tally.
+        :param query: GraphQL query text.
+        :param variables: Query variables.
+        :return: Parsed JSON response, or None if the query failed.
+        """
+        for attempt in range(self.max_retries):
+            self.limiter.acquire()
+            try:
+                response = self.http.request(
+                    "POST", self.URL, retries=1,
+                    headers={"Api-Key": self.tally_api_key},
+                    json={"query": query, "variables": variables}
+                )
+            except requests.RequestException as e:
+                if attempt == self.max_retries - 1:
+                    print(f"Query failed: {e}")
+                    return None
+                delay = HttpClient.retry_after_seconds(None, attempt)
+                print(f"Tally request error ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if response.status_code == 200:
+                self.limiter.on_success()
+                return response.json()
+
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries - 1:
+                delay = HttpClient.retry_after_seconds(response, attempt)
+                if response.status_code == 429:
+                    self.limiter.on_throttle(delay)
+                print(f"Tally returned {response.status_code}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            print(f"Query failed with status {response.status_code}: {response.text}")
+            return None
+        return None
+
+    async def query_async(self, client, query, variables):
+        """
+        Run a GraphQL query against Tally from an asyncio task.
+        :param client: Client returned by create_async_client.
+        :param query: GraphQL query text.
+        :param variables: Query variables.
+        :return: Parsed JSON response, or None if the query failed.
+        """
+        for attempt in range(self.max_retries):
+            await self.limiter.acquire_async()
+            response = await client.post(self.URL, json={"query": query, "variables": variables})
+
+            if response.status_code == 200:
+                self.limiter.on_success()
+                return response.json()
+
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries - 1:
+                delay = HttpClient.retry_after_seconds(response, attempt)
+                if response.status_code == 429:
+                    self.limiter.on_throttle(delay)
+                print(f"Tally returned {response.status_code}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            print(f"Query failed with status {response.status_code}: {response.text}")
+            return None
+        return None
@@ -1,17 +1,32 @@
-import requests
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from collections import defaultdict
+import numpy as np
 from dotenv import load_dotenv
+from tally_api_client import TallyApiClient
 from graph_generator import GraphGenerator
 import time 
 
 
 class TallyData: 
+
+    # Upper bounds of the wallet voting power groups; the last group is open-ended
+    VOTING_POWER_BOUNDARIES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+    VOTING_POWER_GROUPS = [
+        "a/ below 1", "b/ 1-10", "c/ 10-100", "d/ 100-1K", "e/ 1K-10K",
+        "f/ 10K-100K", "g/ 100K-1M", "h/ 1M-10M", "i/ 10M+"
+    ]
+
+    # Placeholder for votes without a block timestamp
+    MISSING_TIMESTAMP = -1
+
+    # How long a proposal's votes are reused before they are fetched again
+    VOTE_CACHE_SECONDS = 900
+
     def __init__(self): 
 
         load_dotenv()
-        self.tally_api_key = os.getenv("TALLY_API_KEY")
+        self.tally_api = TallyApiClient()
 
         self.db_config = {
             "host": os.getenv("DATABASE_HOST"),
@@ -23,8 +38,23 @@ class TallyData:
 
         self.graph_generator = GraphGenerator() 
 
-    def tally_daily_total_voting_power_by_choice(self, proposal_id, decimals):
-        url = "https://api.tally.xyz/query"
+        # Votes already fetched, keyed by (proposal_id, decimals): (fetched_at, votes)
+        self.vote_sets = {}
+
+    def load_votes(self, proposal_id, decimals):
+        """
+        Fetch every vote of a proposal once and keep it in columnar form for the analytics below.
+        Results are memoized per proposal for VOTE_CACHE_SECONDS so the charts and prompt stats of
+        one thread share a single crawl of the Tally votes endpoint.
+        :param proposal_id: ID of the proposal.
+        :param decimals: Number of decimals for normalization.
+        :return: Dictionary with NumPy arrays "amounts" (normalized voting power), "types" (codes into
+                 "type_names") and "timestamps" (epoch seconds, MISSING_TIMESTAMP if unknown).
+        """
+        cached = self.vote_sets.get((proposal_id, decimals))
+        if cached and time.monotonic() - cached[0] < self.VOTE_CACHE_SECONDS:
+            return cached[1]
+
         query = """
         query ($input: VotesInput!) {
             votes(input: $input) {
@@ -44,15 +74,15 @@ class TallyData:
         }
         """
 
-        headers = {"Api-Key": self.tally_api_key}
         after_cursor = None
-        daily_votes_by_amount = []  # List of tuples (date, type, total_amount)
-        daily_votes_by_count = []  # List of tuples (date, type, voter_count)
-        aggregated_amounts = defaultdict(lambda: defaultdict(int))  # {date: {type: total_amount}}
-        aggregated_counts = defaultdict(lambda: defaultdict(int))  # {date: {type: voter_count}}
+        complete = False
+
+        amounts = []
+        types = []
+        timestamps = []
+        type_codes = {}
 
         while True:
-            time.sleep(1) 
             variables = {
                 "input": {
                     "filters": {
@@ -71,61 +101,84 @@ class TallyData:
             }
 
             try:
-                response = requests.post(url, json={"query": query, "variables": variables}, headers=headers)
-                if response.status_code == 200:
-                    data = response.json()
+                data = self.tally_api.query(query, variables)
+                if data is not None:
                     page = data.get("data", {}).get("votes", {})
                     nodes = page.get("nodes", [])
                     if not nodes:
+                        complete = True
                         break
 
                     for vote in nodes:
-                        amount = int(vote.get("amount", 0))
                         decision = vote.get("type", "UNKNOWN")
-                        timestamp = vote.get("block", {}).get("timestamp")
+                        timestamp = (vote.get("block") or {}).get("timestamp")
 
-                        if timestamp:
-                            # Normalize to the date and aggregate
-                            date = datetime.fromisoformat(timestamp).date()
-                            aggregated_amounts[date][decision] += amount / (10**decimals)
-                            aggregated_counts[date][decision] += 1
+                        amounts.append(int(vote.get("amount", 0)) / (10**decimals))
+                        types.append(type_codes.setdefault(decision, len(type_codes)))
+                        timestamps.append(self.to_epoch_seconds(timestamp) if timestamp else self.MISSING_TIMESTAMP)
 
                     # Handle pagination
                     after_cursor = page.get("pageInfo", {}).get("lastCursor")
                     if not after_cursor:
+                        complete = True
                         break
                 else:
-                    print(f"Query failed with status {response.status_code}: {response.text}")
                     break
             except Exception as e:
                 print(f"An error occurred: {e}")
                 break
 
-        # Convert aggregated data to tuples
-        for date, decisions in aggregated_amounts.items():
-            for decision, total_amount in decisions.items():
-                daily_votes_by_amount.append((date, decision, total_amount))
+        votes = {
+            "amounts": np.array(amounts, dtype=np.float64),
+            "types": np.array(types, dtype=np.int16),
+            "timestamps": np.array(timestamps, dtype=np.int64),
+            "type_names": list(type_codes)
+        }
 
-        for date, decisions in aggregated_counts.items():
-            for decision, voter_count in decisions.items():
-                daily_votes_by_count.append((date, decision, voter_count))
-        
-        daily_votes_by_amount = sorted(daily_votes_by_amount, key=lambda x: x[0])
-        daily_votes_by_count = sorted(daily_votes_by_count, key=lambda x: x[0])
+        # Only a full crawl is reused; a partial one is retried by the next caller
+        if complete:
+            self.vote_sets[(proposal_id, decimals)] = (time.monotonic(), votes)
+        return votes
 
-        # Makes the data cumulative
-        def make_cumulative(data):
-            cumulative_data = []
-            cumulative_totals = defaultdict(int)
+    @staticmethod
+    def to_epoch_seconds(timestamp):
+        """
+        Convert a Tally ISO timestamp to epoch seconds, treating naive timestamps as UTC.
+        """
+        parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+
+    def tally_daily_total_voting_power_by_choice(self, proposal_id, decimals):
+        votes = self.load_votes(proposal_id, decimals)
+        type_names = votes["type_names"]
+
+        # Normalize to the date and aggregate per (date, type)
+        has_timestamp = votes["timestamps"] != self.MISSING_TIMESTAMP
+        days = votes["timestamps"][has_timestamp] // 86400
+        types = votes["types"][has_timestamp].astype(np.int64)
+        amounts = votes["amounts"][has_timestamp]
 
-            for date, decision, value in data:
-                cumulative_totals[decision] += value
-                cumulative_data.append((date, decision, cumulative_totals[decision]))
+        keys, inverse = np.unique(days * max(len(type_names), 1) + types, return_inverse=True)
+        total_amounts = np.bincount(inverse, weights=amounts, minlength=len(keys))
+        voter_counts = np.bincount(inverse, minlength=len(keys))
 
-            return cumulative_data
+        daily_votes_by_amount = []  # List of tuples (date, type, total_amount)
+        daily_votes_by_count = []  # List of tuples (date, type, voter_count)
 
-        daily_votes_by_amount = make_cumulative(daily_votes_by_amount) 
-        daily_votes_by_count = make_cumulative(daily_votes_by_count) 
+        # Keys are ordered by day, so the running totals per type come out cumulative
+        cumulative_amounts = defaultdict(float)
+        cumulative_counts = defaultdict(int)
+        for key, total_amount, voter_count in zip(keys, total_amounts, voter_counts):
+            day, code = divmod(int(key), max(len(type_names), 1))
+            date = datetime.fromtimestamp(day * 86400, tz=timezone.utc).date()
+            decision = type_names[code]
+
+            cumulative_amounts[decision] += float(total_amount)
+            cumulative_counts[decision] += int(voter_count)
+            daily_votes_by_amount.append((date, decision, cumulative_amounts[decision]))
+            daily_votes_by_count.append((date, decision, cumulative_counts[decision]))
 
         voter_file_path = self.graph_generator.create_grouped_line_graph(daily_votes_by_count, 'Date', 'Total Voters', 'Daily Total Voters by Choice', 'tally_daily_total_voters_by_choice')
         voting_power_file_path = self.graph_generator.create_grouped_line_graph(daily_votes_by_amount, 'Date', 'Total Voting Power', 'Daily Total Voting Power by Choice', 'tally_daily_total_voting_power_by_choice')
@@ -139,103 +192,20 @@ class TallyData:
         Categorizes wallets into voting power groups, counts wallets in each group,
         and calculates the total voting power per group.
         """
-        url = "https://api.tally.xyz/query"
-        query = """
-        query ($input: VotesInput!) {
-            votes(input: $input) {
-                nodes {
-                    ... on OnchainVote {
-                        amount
-                    }
-                }
-                pageInfo {
-                    lastCursor
-                }
-            }
-        }
-        """
-        headers = {"Api-Key": self.tally_api_key}
-        after_cursor = None
+        amounts = self.load_votes(proposal_id, decimals)["amounts"]
 
-        # Define the groups
-        voting_power_groups = defaultdict(lambda: {"wallets": 0, "voting_power": 0})
-
-        def get_voting_power_group(amount):
-            """
-            Returns the group name based on the voting power.
-            """
-            if amount < 1:
-                return "a/ below 1"
-            elif amount < 10:
-                return "b/ 1-10"
-            elif amount < 100:
-                return "c/ 10-100"
-            elif amount < 1_000:
-                return "d/ 100-1K"
-            elif amount < 10_000:
-                return "e/ 1K-10K"
-            elif amount < 100_000:
-                return "f/ 10K-100K"
-            elif amount < 1_000_000:
-                return "g/ 100K-1M"
-            elif amount < 10_000_000:
-                return "h/ 1M-10M"
-            else:
-                return "i/ 10M+"
+        # Group index of every wallet, matching VOTING_POWER_GROUPS
+        groups = np.digitize(amounts, self.VOTING_POWER_BOUNDARIES)
+        wallet_counts = np.bincount(groups, minlength=len(self.VOTING_POWER_GROUPS))
+        group_powers = np.bincount(groups, weights=amounts, minlength=len(self.VOTING_POWER_GROUPS))
 
-        while True:
-            time.sleep(1) 
-            variables = {
-                "input": {
-                    "filters": {
-                        "proposalId": proposal_id,
-                        "includePendingVotes": False  # Filter by proposal ID
-                    },
-                    "page": {
-                        "limit": 100,  # Adjust as needed for batch size
-                        "afterCursor": after_cursor  # Pagination cursor
-                    },
-                    "sort": {
-                        "isDescending": True,
-                        "sortBy": "id"  # Sort by proposal ID
-                    }
-                }
-            }
-
-            try:
-                response = requests.post(url, json={"query": query, "variables": variables}, headers=headers)
-                if response.status_code == 200:
-                    data = response.json()
-                    page = data.get("data", {}).get("votes", {})
-                    nodes = page.get("nodes", [])
-                    if not nodes:
-                        break
-
-                    for vote in nodes:
-                        amount = int(vote.get("amount", 0)) / (10**decimals)
-                        group = get_voting_power_group(amount)
-
-                        voting_power_groups[group]["wallets"] += 1
-                        voting_power_groups[group]["voting_power"] += amount
-
-                    # Handle pagination
-                    after_cursor = page.get("pageInfo", {}).get("lastCursor")
-                    if not after_cursor:
-                        break
-                else:
-                    print(f"Query failed with status {response.status_code}: {response.text}")
-                    break
-            except Exception as e:
-                print(f"An error occurred: {e}")
-                break
-
-        # Prepare the results as lists of tuples
-        wallets_list = [(group, data["wallets"]) for group, data in voting_power_groups.items()]
-        voting_power_list = [(group, data["voting_power"]) for group, data in voting_power_groups.items()]
-
-        # Sort results by group name
-        wallets_list = sorted(wallets_list, key=lambda x: x[0])
-        voting_power_list = sorted(voting_power_list, key=lambda x: x[0])
+        # Prepare the results as lists of tuples, sorted by group name, skipping empty groups
+        wallets_list = []
+        voting_power_list = []
+        for index, group in enumerate(self.VOTING_POWER_GROUPS):
+            if wallet_counts[index]:
+                wallets_list.append((group, int(wallet_counts[index])))
+                voting_power_list.append((group, float(group_powers[index])))
 
         voter_file_path = self.graph_generator.create_bar_chart(wallets_list, "Voting Power Group", "Wallets", 'Voters by Wallet Voting Power Group', 'tally_voters_by_wallet_voting_power_group')
         voting_power_file_path = self.graph_generator.create_bar_chart(voting_power_list, "Voting Power Group", "Voting Power", 'Voting Power by Wallet Voting Power Group', 'tally_voting_power_by_wallet_voting_power_group')
@@ -244,7 +214,6 @@ class TallyData:
 
 
     def tally_space_proposals_by_voting_power(self, proposal_id, decimals, governor_id):
-        url = "https://api.tally.xyz/query"
 
         # GraphQL query to fetch proposals
         query = """
@@ -276,13 +245,11 @@ class TallyData:
         }
         """
 
-        headers = {"Api-Key": self.tally_api_key}
         after_cursor = None
         proposal_tuples_by_voting_power = []
         proposal_tuples_by_voters = []
 
         while True:
-            time.sleep(1)
             variables = {
                 "input": {
                     "filters": {
@@ -300,9 +267,8 @@ class TallyData:
             }
 
             try:
-                response = requests.post(url, json={"query": query, "variables": variables}, headers=headers)
-                if response.status_code == 200:
-                    data = response.json()
+                data = self.tally_api.query(query, variables)
+                if data is not None:
                     page = data.get("data", {}).get("proposals", {})
                     nodes = page.get("nodes", [])
 
@@ -333,7 +299,6 @@ class TallyData:
                     if not after_cursor:
                         break  # Exit loop if no more pages
                 else:
-                    print(f"Query failed with status {response.status_code}: {response.text}")
                     break
             except Exception as e:
                 print(f"An error occurred: {e}")
@@ -352,78 +317,17 @@ class TallyData:
         :param decimals: Number of decimals for normalization.
         :return: A dictionary with top 10% and 50% wallet counts.
         """
-        url = "https://api.tally.xyz/query"
-        query = """
-        query ($input: VotesInput!) {
-            votes(input: $input) {
-                nodes {
-                    ... on OnchainVote {
-                        amount
-                    }
-                }
-                pageInfo {
-                    lastCursor
-                }
-            }
-        }
-        """
-        headers = {"Api-Key": self.tally_api_key}
-        after_cursor = None
-
-        wallet_voting_powers = []
-
-        while True:
-            time.sleep(1)
-            variables = {
-                "input": {
-                    "filters": {
-                        "proposalId": proposal_id,
-                        "includePendingVotes": False
-                    },
-                    "page": {
-                        "limit": 200,
-                        "afterCursor": after_cursor
-                    }
-                }
-            }
-
-            try:
-                response = requests.post(url, json={"query": query, "variables": variables}, headers=headers)
-                if response.status_code == 200:
-                    data = response.json()
-                    page = data.get("data", {}).get("votes", {})
-                    nodes = page.get("nodes", [])
-                    if not nodes:
-                        break
-
-                    for vote in nodes:
-                        amount = int(vote.get("amount", 0)) / (10 ** decimals)
-                        wallet_voting_powers.append(amount)
-
-                    # Handle pagination
-                    after_cursor = page.get("pageInfo", {}).get("lastCursor")
-                    if not after_cursor:
-                        break
-                else:
-                    print(f"Query failed with status {response.status_code}: {response.text}")
-                    break
-            except Exception as e:
-                print(f"An error occurred: {e}")
-                break
-
         # Sort voting powers in descending order
-        wallet_voting_powers.sort(reverse=True)
-
-        total_power = sum(wallet_voting_powers)
+        wallet_voting_powers = np.sort(self.load_votes(proposal_id, decimals)["amounts"])[::-1]
+        cumulative = np.cumsum(wallet_voting_powers)
+        total_power = cumulative[-1] if len(cumulative) else 0
 
         def calculate_top_percent(percent):
-            threshold = percent * total_power
-            cumulative = 0
-            for i, power in enumerate(wallet_voting_powers, start=1):
-                cumulative += power
-                if cumulative >= threshold:
-                    return i
-            return len(wallet_voting_powers)
+            if not len(cumulative):
+                return 0
+            # First wallet at which the running total reaches the threshold
+            index = int(np.searchsorted(cumulative, percent * total_power, side="left"))
+            return min(index + 1, len(cumulative))
 
         return {
             "top_10%_voting_power_wallets": calculate_top_percent(0.1),
@@ -433,7 +337,6 @@ class TallyData:
     
 
     def prompt_stats(self, proposal_id, decimals, governor_id):
-        url = "https://api.tally.xyz/query"
 
         # GraphQL query to fetch proposals
         query = """
@@ -458,7 +361,6 @@ class TallyData:
         }
         """
 
-        headers = {"Api-Key": self.tally_api_key}
         after_cursor = None
 
         # Variables for rank calculation
@@ -469,7 +371,6 @@ class TallyData:
         proposal_data = {}
 
         while True:
-            time.sleep(1)
             variables = {
                 "input": {
                     "filters": {
@@ -487,9 +388,8 @@ class TallyData:
             }
 
             try:
-                response = requests.post(url, json={"query": query, "variables": variables}, headers=headers)
-                if response.status_code == 200:
-                    data = response.json()
+                data = self.tally_api.query(query, variables)
+                if data is not None:
                     page = data.get("data", {}).get("proposals", {})
                     nodes = page.get("nodes", [])
 
@@ -537,7 +437,6 @@ class TallyData:
                     if not after_cursor:
                         break
                 else:
-                    print(f"Query failed with status {response.status_code}: {response.text}")
                     break
             except Exception as e:
                 print(f"An error occurred: {e}")
@@ -1,9 +1,12 @@
-import requests
 import os
+import json
 from dotenv import load_dotenv
+from tally_api_client import TallyApiClient
+from source_registry import SourceRegistry
 import psycopg2
 from datetime import datetime, timedelta
 from psycopg2 import extras
+import asyncio
 import time
 
 class TallyProposalFetcher: 
@@ -11,7 +14,7 @@ class TallyProposalFetcher:
     def __init__(self): 
 
         load_dotenv()
-        self.tally_api_key = os.getenv("TALLY_API_KEY")
+        self.tally_api = TallyApiClient()
 
         self.db_config = {
             "host": os.getenv("DATABASE_HOST"),
@@ -21,99 +24,146 @@ class TallyProposalFetcher:
             "port": "5432"
         }
 
-        #self.space_keys = [{'space': 'Unlock Dao', 'governor_id': 'eip155:8453:0x65bA0624403Fc5Ca2b20479e9F626eD4D78E0aD9'}]
-        
-        self.space_keys = [
-            {'space': 'Uniswap', 'governor_id': 'eip155:1:0x408ED6354d4973f66138C91495F2f2FCbd8724C3'}, {'space': 'Arbitrum Core', 'governor_id': 'eip155:42161:0xf07DeD9dC292157749B6Fd268E37DF6EA38395B9'}, {'space': 'Compound', 'governor_id': 'eip155:1:0xc0Da02939E1441F497fd74F78cE7Decb17B66529'},
-            {'space': 'Dope Wars', 'governor_id': 'eip155:1:0xDBd38F7e739709fe5bFaE6cc8eF67C3820830E0C'}, {'space': 'Lil Nouns', 'governor_id': 'eip155:1:0x5d2C31ce16924C2a71D317e5BbFd5ce387854039'}, {'space': 'Nouns Dao', 'governor_id': 'eip155:1:0x6f3E6272A167e8AcCb32072d08E0957F9c79223d'},
-            {'space': 'PoolTogether', 'governor_id': 'eip155:1:0x8a907De47E00830a2b742db65e938a3ea1070A2E'}, {'space': 'Rari Dao', 'governor_id': 'eip155:1:0x6552C8fb228f7776Fc0e4056AA217c139D4baDa1'}, {'space': 'Unlock Dao', 'governor_id': 'eip155:8453:0x65bA0624403Fc5Ca2b20479e9F626eD4D78E0aD9'},
-            {'space': 'InstaDapp', 'governor_id': 'eip155:1:0x0204Cd037B2ec03605CFdFe482D8e257C765fA1B'}, {'space': 'Idle Dao', 'governor_id': 'eip155:1:0x3D5Fc645320be0A085A32885F078F7121e5E5375'}, {'space': 'Cryptex', 'governor_id': 'eip155:1:0x874C5D592AfC6803c3DD60d6442357879F196d5b'},
-            {'space': 'Optimism', 'governor_id': 'eip155:10:0xcDF27F107725988f2261Ce2256bDfCdE8B382B10'}, {'space': 'ZKsync', 'governor_id': 'eip155:324:0x76705327e682F2d96943280D99464Ab61219e34f'}, {'space': 'Aave', 'governor_id': 'eip155:1:0xEC568fffba86c094cf06b22134B23074DFE2252c'},
-            {'space': 'ENS', 'governor_id': 'eip155:1:0x323A76393544d5ecca80cd6ef2A560C6a395b7E3'}, {'space': 'Gitcoin', 'governor_id': 'eip155:1:0x9D4C63565D5618310271bF3F3c01b2954C1D1639'}, {'space': 'Hop', 'governor_id': 'eip155:1:0xed8Bdb5895B8B7f9Fdb3C087628FD8410E853D48'},
-            {'space': 'GMX', 'governor_id': 'eip155:42161:0x03e8f708e9C85EDCEaa6AD7Cd06824CeB82A7E68'}, {'space': 'Realtoken', 'governor_id': 'eip155:100:0x4A5327347f077E72d2AaB19F68Ba8A7F12ec5d63'}, {'space': 'Lisk', 'governor_id': 'eip155:1135:0x58a61b1807a7bDA541855DaAEAEe89b1DDA48568'},
-            {'space': 'Diva Staking', 'governor_id': 'eip155:1:0xFb6B7C11a55C57767643F1FF65c34C8693a11A70'}, {'space': 'Open Dollar', 'governor_id': 'eip155:42161:0xf704735CE81165261156b41D33AB18a08803B86F'}, {'space': 'Fei', 'governor_id': 'eip155:1:0x0BEF27FEB58e857046d630B2c03dFb7bae567494'},
-            {'space': 'SpellsDao', 'governor_id': 'eip155:1:0x2f8da73e52Ec56FeB0aE63FBDD50c01dd04E8CC9'}, {'space': 'Moonwell', 'governor_id': 'eip155:1284:0xfc4DFB17101A12C5CEc5eeDd8E92B5b16557666d'}, {'space': 'HAI', 'governor_id': 'eip155:10:0xe807f3282f3391d237BA8B9bECb0d8Ea3ba23777'},
-            {'space': 'Ondo Dao', 'governor_id': 'eip155:1:0x336505EC1BcC1A020EeDe459f57581725D23465A'}, {'space': 'Seamless', 'governor_id': 'eip155:8453:0x8768c789C6df8AF1a92d96dE823b4F80010Db294'}, {'space': 'Euler', 'governor_id': 'eip155:1:0xd8E2114f6bCbaee83CDEB1bD6650a28BBcF144D5'},
-            {'space': 'Tevaera', 'governor_id': 'eip155:324:0xe9cf190A95B3119a00824eC29a88302985Fba1DE'}, {'space': 'Anvil', 'governor_id': 'eip155:1:0x00e83d0698FAf01BD080A4Dd2927e6aB7C4874c9'}, {'space': 'Yam Finance', 'governor_id': 'eip155:1:0x2DA253835967D6E721C6c077157F9c9742934aeA'},
-            {'space': 'Rari Capital', 'governor_id': 'eip155:1:0x637deEED4e4deb1D222650bD4B64192abf002c00'}, {'space': 'Mystiko', 'governor_id': 'eip155:1:0x2a5eEf90F1aA36CaE2535349B522891A044EFCC1'}, {'space': 'TrueFi', 'governor_id': 'eip155:1:0x585CcA060422ef1779Fb0Dd710A49e7C49A823C9'},
-            {'space': 'Gas Dao', 'governor_id': 'eip155:1:0x5B1751306597A76C8E6D2BFb8e952f8855Ed976d'}, {'space': 'Indexed', 'governor_id': 'eip155:1:0x95129751769f99CC39824a0793eF4933DD8Bb74B'}, {'space': 'Tribe NopeDao', 'governor_id': 'eip155:1:0x6C7aF43Ce97686e0C8AcbBc03b2E4f313c0394C7'},
-            {'space': 'Ampleforth', 'governor_id': 'eip155:1:0x8a994C6F55Be1fD2B4d0dc3B8f8F7D4E3a2dA8F1'}, {'space': 'Inverse', 'governor_id': 'eip155:1:0x35d9f4953748b318f18c30634bA299b237eeDfff'}, {'space': 'MahaDao', 'governor_id': 'eip155:1:0xe7D23C2B3E9148c46ceC796F018842ab72D5867F'},
-            {'space': 'Collab.Land', 'governor_id': 'eip155:10:0xb18c10E49bC7C5f09A564f3A8DaF28Df54dc6672'}, {'space': 'SoftDao', 'governor_id': 'eip155:1:0x0ADd6d42bBfe6c40e15B02A2C8A1b81B36a2B326'}, {'space': 'DaxioDao', 'governor_id': 'eip155:1:0xDA9C9eD96f6D42f7e74f3C7eEa6772d64eD84bdf'},
-            {'space': 'Inedible', 'governor_id': 'eip155:1:0xB787139B526c6aecF5d21B1288539B94e9769BF3'}, {'space': 'BNB Chain', 'governor_id': 'eip155:56:0x0000000000000000000000000000000000002004'},
-            {'space': 'Hifi Dao', 'governor_id': 'eip155:1:0xef0A0421Ea43b602E5Be35e9018Dd3E34Bcee007'}, {'space': 'Increment', 'governor_id': 'eip155:1:0x134E7ABaF7E8c440f634aE9f5532A4df53c19385'}, {'space': 'DIMO', 'governor_id': 'eip155:137:0xD203e37D96cC0b9b7Dc00fC3fDfcf1b1A2E8c547'},
-            {'space': 'Sudoswap', 'governor_id': 'eip155:1:0x6853f8865BA8e9FBd9C8CCE3155ce5023fB7EEB0'}, {'space': 'Public Nouns', 'governor_id': 'eip155:1:0x2BbEbFECA0fEbde8C70EF8501C991f3AB2095862'}, {'space': 'Internet Token', 'governor_id': 'eip155:8453:0xc5C3a1882Eff9539527D88E2453cAB10d9bc1581'},
-            {'space': 'Gloom Governor', 'governor_id': 'eip155:8453:0xFc8c580f1AfAaC016cBb45c1ced7F73F7DBa1FEc'}, {'space': 'Lucidao', 'governor_id': 'eip155:137:0xac1fdCA2Be645E3e06c7832613a78C72135DA945'}, {'space': 'Radworks', 'governor_id': 'eip155:1:0x690e775361AD66D1c4A25d89da9fCd639F5198eD'},
-            {'space': 'Blur', 'governor_id': 'eip155:1:0xF7967b43949Fb0Cec48e63e345512d5Ea5845810'}, {'space': 'Arbitrum Treasury', 'governor_id': 'eip155:42161:0x789fC99093B09aD01C34DC7251D0C89ce743e5a4'}
-        ]
-
-
-    def fetch_proposals(self):
-
-        final_result = []
-        
-        for space in self.space_keys: 
-            time.sleep(1) 
-            space_name = space['space']
-            governor_id = space['governor_id']
-
-            url = "https://api.tally.xyz/query"
-
-            # GraphQL query to fetch proposals with BlocklessTimestamp only
-            query = """
-            query ($input: ProposalsInput!) {
-                proposals(input: $input) {
-                    nodes {
-                        ... on Proposal {
-                            id
-                            block {
-                                timestamp
-                            }
-                            metadata {
-                                title
-                                description 
-                            }
-                            status
-                            start {
-                                ... on Block {
-                                    timestamp
-                                }
-                            }
-                            end {
-                                ... on Block {
-                                    timestamp
-                                }
-                            }
-                            governor {
-                                id
-                                 token {
-                                    ... on Token {
-                                        decimals
-                                    }
-                                } 
-                            }
-                            voteStats {
-                                type
-                                votesCount
-                                votersCount
-                                percent
-                            }
-                        }
+        # Newest proposal ID and still-open proposal IDs per governor, for incremental syncs
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.sync_state_file = os.path.join(script_dir, "../config/tally_sync_state.json")
+        self.pending_sync_state = None
+
+        # Governors to crawl, with their priority and refresh interval
+        self.sources = SourceRegistry()
+        self.crawled_governors = []
+
+
+    # Fields stored for every proposal, with BlocklessTimestamp only
+    PROPOSAL_FIELDS = """
+        fragment ProposalFields on Proposal {
+            id
+            block {
+                timestamp
+            }
+            metadata {
+                title
+                description 
+            }
+            status
+            start {
+                ... on Block {
+                    timestamp
+                }
+            }
+            end {
+                ... on Block {
+                    timestamp
+                }
+            }
+            governor {
+                id
+                 token {
+                    ... on Token {
+                        decimals
                     }
-                    pageInfo {
-                        firstCursor
-                        lastCursor
-                        count
+                } 
+            }
+            voteStats {
+                type
+                votesCount
+                votersCount
+                percent
+            }
+        }
+        """
+
+    # GraphQL query to fetch a page of a governor's proposals
+    PROPOSALS_QUERY = """
+        query ($input: ProposalsInput!) {
+            proposals(input: $input) {
+                nodes {
+                    ... on Proposal {
+                        ...ProposalFields
                     }
                 }
+                pageInfo {
+                    firstCursor
+                    lastCursor
+                    count
+                }
             }
-            """
-            
-            headers = {"Api-Key": self.tally_api_key}
-            after_cursor = None
-            proposals = []
+        }
+        """ + PROPOSAL_FIELDS
+
+    # GraphQL query to fetch a single proposal by ID
+    PROPOSAL_QUERY = """
+        query ($input: ProposalInput!) {
+            proposal(input: $input) {
+                ...ProposalFields
+            }
+        }
+        """ + PROPOSAL_FIELDS
+
+    # Statuses of proposals that can still open for voting or change their vote counts
+    OPEN_STATUSES = {"draft", "submitted", "pending", "active", "extended"}
+
+    def load_sync_state(self):
+        """
+        Load the incremental sync state.
+        :return: Dictionary of governor ID to {'newest_proposal_id', 'open_proposal_ids'}.
+        """
+        if os.path.exists(self.sync_state_file):
+            try:
+                with open(self.sync_state_file, "r") as file:
+                    return json.load(file)
+            except Exception as e:
+                print(f"Error loading JSON file {self.sync_state_file}: {e}")
+        return {}
+
+    def save_sync_state(self, state):
+        """
+        Save the incremental sync state.
+        :param state: Dictionary built by fetch_proposals_async.
+        """
+        try:
+            with open(self.sync_state_file, "w") as file:
+                json.dump(state, file, indent=4)
+        except Exception as e:
+            print(f"Error saving JSON file {self.sync_state_file}: {e}")
+
+    def load_stored_active_ids(self):
+        """
+        IDs of proposals stored as active, whose status and voteStats need refreshing.
+        :return: Set of proposal IDs.
+        """
+        try:
+            with psycopg2.connect(**self.db_config) as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT proposal_id FROM tally_gov_proposals WHERE status = 'active';")
+                    active_ids = {str(row[0]) for row in cursor.fetchall()}
+            conn.close()
+            return active_ids
+        except Exception as db_error:
+            print(f"Database error: {db_error}")
+            return set()
+
+    async def fetch_governor_proposals(self, client, semaphore, space, newest_known_id=None):
+        """
+        Page through the proposals of one governor, newest first, in cursor order.
+        :param client: Shared client returned by TallyApiClient.create_async_client.
+        :param semaphore: Limits how many governors are crawled at the same time.
+        :param space: Dictionary with 'space' and 'governor_id'.
+        :param newest_known_id: Newest proposal ID seen by the last sync; paging stops at the first page
+                                reaching a known proposal whose voting has closed. None crawls everything.
+        :return: Tuple of ({'proposals', 'space_name'}, timing dictionary).
+        """
+        space_name = space['space']
+        governor_id = space['governor_id']
+
+        after_cursor = None
+        proposals = []
+        pages = 0
+        complete = False
 
+        async with semaphore:
+            start_time = time.monotonic()
             while True:
-                time.sleep(1) 
                 variables = {
                     "input": {
                         "filters": {
@@ -131,86 +181,242 @@ class TallyProposalFetcher:
                 }
 
                 try:
-                    response = requests.post(url, json={"query": query, "variables": variables}, headers=headers)
-                    if response.status_code == 200:
-                        data = response.json()
+                    data = await self.tally_api.query_async(client, self.PROPOSALS_QUERY, variables)
+                    if data is not None:
+                        pages += 1
                         page = data.get("data", {}).get("proposals", {})
                         nodes = page.get("nodes", [])
                         proposals.extend(nodes)
 
+                        # Everything older than a known, closed proposal was seen by a previous sync
+                        if newest_known_id is not None and any(
+                            int(node['id']) <= newest_known_id and node.get('status') not in self.OPEN_STATUSES
+                            for node in nodes
+                        ):
+                            complete = True
+                            break
+
                         # Handle pagination
                         after_cursor = page.get("pageInfo", {}).get("lastCursor")
                         if not after_cursor:
+                            complete = True
                             break  # Exit loop if no more pages
                     else:
-                        print(f"Query failed with status {response.status_code}: {response.text}")
                         break
                 except Exception as e:
-                    print(f"An error occurred: {e}")
+                    print(f"An error occurred while crawling {space_name}: {e}")
                     break
-            
-            final_result.append({'proposals': proposals, 'space_name': space_name})
-            print("adding new space") 
+            elapsed = time.monotonic() - start_time
+
+        print(f"adding new space: {space_name}")
+        timing = {
+            'space_name': space_name, 'seconds': elapsed, 'pages': pages,
+            'proposals': len(proposals), 'complete': complete
+        }
+        return {'proposals': proposals, 'space_name': space_name}, timing
+
+    async def fetch_proposal_by_id(self, client, semaphore, proposal_id):
+        """
+        Fetch the current state of a single proposal.
+        :param client: Shared client returned by TallyApiClient.create_async_client.
+        :param semaphore: Limits how many requests run at the same time.
+        :param proposal_id: Tally proposal ID.
+        :return: Proposal dictionary, or None if it could not be fetched.
+        """
+        async with semaphore:
+            try:
+                data = await self.tally_api.query_async(client, self.PROPOSAL_QUERY, {"input": {"id": proposal_id}})
+                if data is not None:
+                    return data.get("data", {}).get("proposal")
+            except Exception as e:
+                print(f"An error occurred while refreshing proposal {proposal_id}: {e}")
+        return None
+
+    async def fetch_proposals_async(self, incremental=False, refresh_ids=()):
+        """
+        Crawl the registered governors concurrently over one pooled HTTP/2 client, within the shared Tally rate budget.
+        In incremental mode only governors due for a refresh are crawled, each is paged only down to the proposals
+        seen by the last sync, and proposals that were still open (plus refresh_ids) are refetched individually.
+        :param incremental: Whether to stop paging at proposals known from the last sync.
+        :param refresh_ids: Proposal IDs to refetch if the crawl did not reach them.
+        :return: List of {'proposals', 'space_name'}, highest priority governors first.
+        """
+        state = self.load_sync_state() if incremental else {}
+        governors = self.sources.tally_governors(due_only=incremental)
+        spaces = [{'space': governor['name'], 'governor_id': governor['governor_id']} for governor in governors]
+        semaphore = asyncio.Semaphore(self.tally_api.max_concurrency)
+        start_time = time.monotonic()
+
+        def newest_known_id(governor_id):
+            newest = state.get(governor_id, {}).get('newest_proposal_id')
+            return int(newest) if newest is not None else None
+
+        async with self.tally_api.create_async_client() as client:
+            results = await asyncio.gather(
+                *(
+                    self.fetch_governor_proposals(client, semaphore, space, newest_known_id(space['governor_id']))
+                    for space in spaces
+                )
+            )
+
+            final_result = [result for result, _ in results]
+            seen_ids = {proposal['id'] for item in final_result for proposal in item['proposals']}
+
+            refresh = set(refresh_ids)
+            for governor_state in state.values():
+                refresh.update(governor_state.get('open_proposal_ids', []))
+            refresh -= seen_ids
+
+            refreshed = await asyncio.gather(
+                *(self.fetch_proposal_by_id(client, semaphore, proposal_id) for proposal_id in sorted(refresh))
+            )
+
+        # Attach refreshed proposals to their governor's entry, adding entries for governors not crawled this run
+        entries = {space['governor_id']: item for space, item in zip(spaces, final_result)}
+        registered = {governor['governor_id'].lower(): governor for governor in self.sources.tally_governors()}
+        for proposal in refreshed:
+            if proposal is None:
+                continue
+            governor = registered.get((proposal.get('governor') or {}).get('id', '').lower())
+            if governor is None:
+                continue
+            if governor['governor_id'] not in entries:
+                entries[governor['governor_id']] = {'proposals': [], 'space_name': governor['name']}
+                final_result.append(entries[governor['governor_id']])
+            entries[governor['governor_id']]['proposals'].append(proposal)
+
+        complete = {space['governor_id'] for space, (_, timing) in zip(spaces, results) if timing['complete']}
+        self.crawled_governors = [governor for governor in governors if governor['governor_id'] in complete]
 
+        self.pending_sync_state = dict(state)
+        for governor_id, item in entries.items():
+            previous = newest_known_id(governor_id)
+            fetched_ids = {proposal['id'] for proposal in item['proposals']}
 
+            # An interrupted crawl keeps the old watermark so the pages it missed are crawled next time
+            ids = [int(proposal_id) for proposal_id in fetched_ids] if governor_id in complete else []
+            newest = max(ids + ([previous] if previous is not None else []), default=None)
+
+            # Open proposals that could not be refetched stay open until they can
+            still_open = {
+                proposal_id for proposal_id in state.get(governor_id, {}).get('open_proposal_ids', [])
+                if proposal_id not in fetched_ids
+            }
+            still_open.update(
+                proposal['id'] for proposal in item['proposals'] if proposal.get('status') in self.OPEN_STATUSES
+            )
+            self.pending_sync_state[governor_id] = {
+                'newest_proposal_id': str(newest) if newest is not None else None,
+                'open_proposal_ids': sorted(still_open)
+            }
+
+        print(f"Refreshed {sum(1 for proposal in refreshed if proposal)} of {len(refresh)} previously open proposals")
+        self.report_timings([timing for _, timing in results], time.monotonic() - start_time)
         return final_result
 
+    def fetch_proposals(self, incremental=False, refresh_ids=()):
+        """
+        Fetch the proposals of the registered governors.
+        :param incremental: Whether to crawl only due governors down to the proposals known from the last sync.
+        :param refresh_ids: Proposal IDs to refetch if the crawl did not reach them.
+        :return: List of {'proposals', 'space_name'}, highest priority governors first.
+        """
+        return asyncio.run(self.fetch_proposals_async(incremental, refresh_ids))
+
+    @staticmethod
+    def report_timings(timings, total_seconds, top=10):
+        """
+        Print the governors that took longest to crawl.
+        :param timings: List of timing dictionaries from fetch_governor_proposals.
+        :param total_seconds: Wall-clock time of the whole crawl.
+        :param top: Number of governors to list.
+        """
+        total_pages = sum(timing['pages'] for timing in timings)
+        print(f"Crawled {len(timings)} governors ({total_pages} pages) in {total_seconds:.1f}s. Slowest:")
+        for timing in sorted(timings, key=lambda t: t['seconds'], reverse=True)[:top]:
+            print(
+                f"  {timing['space_name']}: {timing['seconds']:.1f}s, "
+                f"{timing['pages']} pages, {timing['proposals']} proposals"
+            )
+
     
-    def insert_proposals(self):
+    def insert_proposals(self, incremental=True):
+            """
+            Store new active proposals and refresh the status, voteStats and end_time of those already stored
+            as active, with one batched upsert. Rows are only rewritten when a mutable column changed.
+            :param incremental: Only page each governor down to the proposals seen by the last sync.
+            """
             try:
-                data = self.fetch_proposals() 
+                stored_active_ids = self.load_stored_active_ids()
+                data = self.fetch_proposals(incremental, stored_active_ids) 
+
+                rows = {}
+                for item in data:
+                    space_name = item['space_name'] 
+                    for proposal in item['proposals']:
+                        if proposal['status'] != 'active' and proposal['id'] not in stored_active_ids:
+                            continue
+                        if not (proposal.get('start') or {}).get('timestamp') or not (proposal.get('end') or {}).get('timestamp'):
+                            continue
+
+                        # Keyed by ID so a proposal seen twice is only upserted once per batch
+                        rows[proposal['id']] = (
+                            proposal['id'],
+                            (proposal.get('metadata') or {}).get('title', ''),
+                            (proposal.get('metadata') or {}).get('description', ''),
+                            proposal['status'],
+                            proposal['start']['timestamp'],
+                            proposal['end']['timestamp'],
+                            psycopg2.extras.Json(proposal.get('voteStats', [])),  # Store voteStats as JSONB
+                            space_name, 
+                            (proposal.get('governor') or {}).get('id', ''),
+                            ((proposal.get('governor') or {}).get('token') or {}).get('decimals', 0)
+                        )
+
+                # Insert new proposals; refresh the mutable columns of stored ones only when they changed
+                sql_upsert = """
+                INSERT INTO tally_gov_proposals (
+                    proposal_id,
+                    proposal_title,
+                    proposal_description,
+                    status,
+                    start_time,
+                    end_time,
+                    voteStats, 
+                    space_name, 
+                    governor_id, 
+                    decimals
+                ) VALUES %s
+                ON CONFLICT (proposal_id) DO UPDATE SET
+                    status = EXCLUDED.status,
+                    voteStats = EXCLUDED.voteStats,
+                    end_time = EXCLUDED.end_time
+                WHERE (tally_gov_proposals.status, tally_gov_proposals.voteStats, tally_gov_proposals.end_time)
+                    IS DISTINCT FROM (EXCLUDED.status, EXCLUDED.voteStats, EXCLUDED.end_time)
+                RETURNING (xmax = 0) AS inserted
+                """
 
                 # Connect to the PostgreSQL database
                 with psycopg2.connect(**self.db_config) as conn:
                     with conn.cursor() as cursor:
-                        for item in data:
-                            space_name = item['space_name'] 
-                            for proposal in item['proposals']:
-                                if proposal['status'] == 'active' and proposal.get('start', {}).get('timestamp') and proposal.get('end', {}).get('timestamp') : 
-                                    
-                                    proposal_id = proposal['id']
-                                    proposal_title = proposal['metadata'].get('title', '')
-                                    proposal_description = proposal['metadata'].get('description', '')
-                                    status = proposal['status']
-                                    start_time = proposal.get('start', {}).get('timestamp')
-                                    end_time = proposal.get('end', {}).get('timestamp') 
-                                    vote_stats = proposal.get('voteStats', [])
-                                    governor_id = proposal.get('governor', {}).get('id', '')
-                                    decimals = proposal.get('governor', {}).get('token', {}).get('decimals', 0)
-
-
-                                    # Insert into the database
-                                    sql_insert = """
-                                    INSERT INTO tally_gov_proposals (
-                                        proposal_id,
-                                        proposal_title,
-                                        proposal_description,
-                                        status,
-                                        start_time,
-                                        end_time,
-                                        voteStats, 
-                                        space_name, 
-                                        governor_id, 
-                                        decimals
-                                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                                    ON CONFLICT (proposal_id) DO NOTHING
-                                    """
-                                    cursor.execute(
-                                        sql_insert,
-                                        (
-                                            proposal_id,
-                                            proposal_title,
-                                            proposal_description,
-                                            status,
-                                            start_time,
-                                            end_time,
-                                            psycopg2.extras.Json(vote_stats),  # Store voteStats as JSONB
-                                            space_name, 
-                                            governor_id, 
-                                            decimals
-                                        )
-                                    )  
+                        written = []
+                        if rows:
+                            written = psycopg2.extras.execute_values(
+                                cursor, sql_upsert, list(rows.values()), page_size=500, fetch=True
+                            )
                     conn.commit()
+                conn.close()
+
+                inserted = sum(1 for row in written if row[0])
+                print(
+                    f"tally_gov_proposals: {inserted} inserted, {len(written) - inserted} updated, "
+                    f"{len(rows) - len(written)} unchanged"
+                )
+
+                # Only advance the sync state once its proposals are stored
+                if incremental and self.pending_sync_state is not None:
+                    self.save_sync_state(self.pending_sync_state)
+                self.sources.mark_crawled(SourceRegistry.TALLY, self.crawled_governors)
             except Exception as db_error:
                 print(f"Database error: {db_error}")
 
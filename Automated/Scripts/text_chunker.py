@@ -0,0 +1,183 @@
+import re
+from html.parser import HTMLParser
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+class PostTextExtractor(HTMLParser):
+    """
+    Extracts readable text from a Discourse post's cooked HTML.
+    Quoted replies (<aside class="quote">) repeat earlier posts and are dropped, as are scripts and styles.
+    """
+
+    BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "blockquote", "pre", "table", "tr", "h1", "h2", "h3", "h4", "h5", "h6"}
+    SKIPPED_TAGS = {"script", "style"}
+    VOID_TAGS = {"br", "img", "hr", "input", "meta", "link", "source", "wbr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_depth:
+            if tag not in self.VOID_TAGS:
+                self.skip_depth += 1
+            return
+        classes = (dict(attrs).get("class") or "").split()
+        if tag in self.SKIPPED_TAGS or (tag == "aside" and "quote" in classes):
+            self.skip_depth = 1
+            return
+        if tag in self.BLOCK_TAGS:
+            self.parts.append("\n\n" if tag != "br" else "\n")
+
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            if tag not in self.VOID_TAGS:
+                self.skip_depth -= 1
+            return
+        if tag in self.BLOCK_TAGS:
+            self.parts.append("\n\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+class TextChunker:
+    """
+    Turns forum post HTML into plain text chunks that end on paragraph or sentence boundaries,
+    each under a token budget, with a configurable overlap between consecutive chunks.
+    """
+
+    SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+    def __init__(self, max_tokens=500, overlap_tokens=50, model="text-embedding-ada-002"):
+        """
+        Initializes the chunker.
+        :param max_tokens: Token budget of one chunk.
+        :param overlap_tokens: Tokens of trailing sentences repeated at the start of the next chunk.
+        :param model: Embedding model whose tokenizer is used when tiktoken is installed.
+        """
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.encoding = tiktoken.encoding_for_model(model) if tiktoken else None
+
+    def count_tokens(self, text):
+        """
+        Number of tokens in a text; estimated from its length when tiktoken is not installed.
+        """
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return len(text) // 3 + 1
+
+    @staticmethod
+    def html_to_text(html):
+        """
+        Strip a post's HTML to text, dropping quoted replies.
+        :param html: Cooked HTML of a Discourse post.
+        :return: Text with paragraphs separated by blank lines.
+        """
+        extractor = PostTextExtractor()
+        extractor.feed(html or "")
+        extractor.close()
+        text = "".join(extractor.parts)
+
+        paragraphs = []
+        for paragraph in re.split(r"\n\s*\n", text):
+            paragraph = re.sub(r"[ \t\r\f\v]+", " ", paragraph).strip()
+            paragraph = re.sub(r" ?\n ?", "\n", paragraph)
+            if paragraph:
+                paragraphs.append(paragraph)
+        return "\n\n".join(paragraphs)
+
+    def split_long(self, sentence):
+        """
+        Split a single sentence that exceeds the budget into windows of max_tokens, overlapping by overlap_tokens.
+        The sentence is encoded once and each token window decoded; without tiktoken, characters stand in for tokens.
+        """
+        if self.encoding is not None:
+            tokens = self.encoding.encode(sentence, disallowed_special=())
+            window, overlap = self.max_tokens, self.overlap_tokens
+            decode = self.encoding.decode
+        else:
+            tokens = sentence
+            window, overlap = (self.max_tokens - 1) * 3, self.overlap_tokens * 3  # Matches count_tokens' estimate
+            decode = "".join
+        step = max(window - overlap, 1)
+
+        pieces = []
+        for start in range(0, len(tokens), step):
+            piece = decode(tokens[start:start + window]).strip()
+            if piece:
+                pieces.append(piece)
+            if start + window >= len(tokens):
+                break
+        return pieces
+
+    def units(self, text):
+        """
+        Break text into sentences, each within the budget, remembering where paragraphs end.
+        :return: List of (sentence, ends_paragraph).
+        """
+        units = []
+        for paragraph in text.split("\n\n"):
+            sentences = [s for s in self.SENTENCE_PATTERN.split(paragraph) if s.strip()]
+            for index, sentence in enumerate(sentences):
+                pieces = self.split_long(sentence) if self.count_tokens(sentence) > self.max_tokens else [sentence]
+                for piece_index, piece in enumerate(pieces):
+                    last = index == len(sentences) - 1 and piece_index == len(pieces) - 1
+                    units.append((piece, last))
+        return units
+
+    def chunk(self, text):
+        """
+        Pack sentences into chunks under max_tokens, so every cut falls on a sentence or paragraph boundary.
+        :param text: Plain text, paragraphs separated by blank lines.
+        :return: List of chunk strings.
+        """
+        units = [(sentence, ends, self.count_tokens(sentence)) for sentence, ends in self.units(text)]
+        chunks = []
+        current = []
+        current_tokens = 0
+
+        def render(items):
+            out = ""
+            for sentence, ends, _ in items:
+                out += sentence + ("\n\n" if ends else " ")
+            return out.strip()
+
+        for unit in units:
+            if current and current_tokens + unit[2] > self.max_tokens:
+                chunks.append(render(current))
+
+                # Carry the last sentences into the next chunk, up to the overlap budget
+                overlap = []
+                overlap_tokens = 0
+                for previous in reversed(current):
+                    if overlap_tokens + previous[2] > self.overlap_tokens:
+                        break
+                    overlap.insert(0, previous)
+                    overlap_tokens += previous[2]
+                if overlap_tokens + unit[2] > self.max_tokens:
+                    overlap, overlap_tokens = [], 0
+                current, current_tokens = overlap, overlap_tokens
+
+            current.append(unit)
+            current_tokens += unit[2]
+
+        if current:
+            chunks.append(render(current))
+        return chunks
+
+    def chunk_html(self, html):
+        """
+        Strip a post's HTML and split it into chunks.
+        :param html: Cooked HTML of a Discourse post.
+        :return: Tuple of (full text, list of chunks).
+        """
+        text = self.html_to_text(html)
+        return text, self.chunk(text) if text else []
@@ -1,5 +1,7 @@
 import tweepy
 import os
+import json
+import threading
 from dotenv import load_dotenv
 
 
@@ -31,6 +33,15 @@ class TwitterHandler:
             access_token_secret=access_token_secret
         )
 
+        # Cached authenticated user id
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.state_file = os.path.join(script_dir, "../config/twitter_state.json")
+        self.state_lock = threading.Lock()
+        self.user_id = None
+
+        # Longest search query the API access level accepts (512 for recent search)
+        self.max_query_length = int(os.getenv("X_MAX_QUERY_LENGTH", "512"))
+
     def upload_media(self, media_path):
         """
         Uploads media to Twitter (API v1.1) and returns the media ID.
@@ -131,46 +142,112 @@ class TwitterHandler:
             return None
     
     
-    def get_comments_on_post(self, tweet_id):
+    def load_state(self):
+        """
+        Loads the Twitter state file.
+        :return: Dictionary with the cached "user_id".
+        """
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r") as file:
+                    return json.load(file)
+            except Exception as e:
+                print(f"Error loading JSON file {self.state_file}: {e}")
+        return {}
+
+    def save_state(self, state):
         """
-        Fetches comments (replies) on a specific tweet, excluding the original post and replies made by the authenticated user.
-        :param tweet_id: The ID of the original tweet to fetch comments for.
-        :return: A list of dictionaries containing the ID and text of the comments.
+        Saves the Twitter state file.
         """
         try:
-            print(f"Fetching comments on tweet ID: {tweet_id}")
-            
-            # Get the authenticated user's ID to filter out their replies
-            my_user_id = self.api_v2.get_me().data["id"]
-            
-            # Query to find replies to the tweet and exclude the authenticated user's tweets
-            query = f"conversation_id:{tweet_id} -from:{my_user_id}" 
-              
-            
-            # Make the API call to fetch replies
-            response = self.api_v2.search_recent_tweets(
-                query=query,
-                tweet_fields=["id", "text"],  # Only necessary fields
-                max_results=100,  # Adjust based on API limits
-                user_auth=True
-            )
-            
-            # Check if there are any replies
-            if not response.data:
-                print("No comments found.")
-                return []
-
-            # Filter out the original tweet manually
-            comments = [
-                (tweet["id"], tweet["text"], False)
-                for tweet in response.data
-                if tweet["id"] != tweet_id  # Exclude the original tweet
-            ]
+            with open(self.state_file, "w") as file:
+                json.dump(state, file, indent=4)
+        except Exception as e:
+            print(f"Error saving JSON file {self.state_file}: {e}")
+
+    def get_user_id(self):
+        """
+        Returns the authenticated user's ID, calling get_me() only when it is not cached in memory or in the state file.
+        """
+        if self.user_id is None:
+            with self.state_lock:
+                state = self.load_state()
+                self.user_id = state.get("user_id")
+                if self.user_id is None:
+                    self.user_id = str(self.api_v2.get_me(user_auth=True).data["id"])
+                    state["user_id"] = self.user_id
+                    self.save_state(state)
+        return self.user_id
+
+    def conversation_query(self, conversation_ids):
+        """
+        Search query matching replies in any of several conversations, excluding the authenticated user's tweets.
+        """
+        clauses = " OR ".join(f"conversation_id:{conversation_id}" for conversation_id in conversation_ids)
+        if len(conversation_ids) > 1:
+            clauses = f"({clauses})"
+        return f"{clauses} -from:{self.get_user_id()}"
+
+    def conversation_batches(self, conversation_ids):
+        """
+        Splits conversation IDs into as few groups as fit the search query length limit.
+        :param conversation_ids: List of thread root tweet IDs.
+        :return: List of lists of conversation IDs.
+        """
+        batches = []
+        batch = []
+        for conversation_id in conversation_ids:
+            if batch and len(self.conversation_query(batch + [conversation_id])) > self.max_query_length:
+                batches.append(batch)
+                batch = []
+            batch.append(conversation_id)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def get_comments_on_post(self, conversation_ids, since_id=None):
+        """
+        Fetches comments (replies) on one or more tweets with a single OR-combined search, excluding the
+        original posts and replies made by the authenticated user. Pages through every result with next_token.
+        :param conversation_ids: The ID of the original tweet, or a list of IDs from conversation_batches.
+        :param since_id: Only return comments newer than this tweet ID.
+        :return: A list of (id, text, responded, conversation_id) tuples, or None if the fetch failed part way.
+        """
+        if isinstance(conversation_ids, (str, int)):
+            conversation_ids = [conversation_ids]
+        roots = {str(conversation_id) for conversation_id in conversation_ids}
+
+        try:
+            print(f"Fetching comments on {len(roots)} conversations" + (f" since {since_id}" if since_id else ""))
+            query = self.conversation_query(conversation_ids)
+
+            comments = []
+            next_token = None
+            while True:
+                # Make the API call to fetch one page of replies
+                response = self.api_v2.search_recent_tweets(
+                    query=query,
+                    tweet_fields=["id", "text", "conversation_id"],  # Only necessary fields
+                    max_results=100,  # Maximum page size of recent search
+                    since_id=since_id,
+                    next_token=next_token,
+                    user_auth=True
+                )
+
+                # Filter out the original tweets manually
+                comments.extend(
+                    (tweet["id"], tweet["text"], False, str(tweet["conversation_id"]))
+                    for tweet in response.data or []
+                    if str(tweet["id"]) not in roots  # Exclude the original tweets
+                )
+
+                next_token = (response.meta or {}).get("next_token")
+                if not next_token:
+                    break
             
             print(f"Found {len(comments)} comments.")
             return comments
 
         except Exception as e:
             print(f"Error fetching comments: {e}")
-            return []
-
+            return None
@@ -1,32 +1,53 @@
 import psycopg2
+from psycopg2 import pool
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from flipside import Flipside
 from dotenv import load_dotenv
 import os
 import json 
+import threading
+from datetime import datetime, timedelta, timezone
 from tally_proposal_fetcher import TallyProposalFetcher 
 from dao_forum_scraper import DAOForumScraper
+from bulk_loader import BulkLoader
+from flipside_result_stream import FlipsideResultStream
+from mv_refresh_scheduler import MvRefreshScheduler
 
 
 class UpdateRegistry:
     """
     Manages the registration and execution of update queries for tables and materialized views.
+
+    Update queries of tables registered with a watermark column are templates: the tokens
+    {watermark_start} and {watermark_end} are replaced with the window to fetch, e.g.
+    "WHERE CREATED_AT > '{watermark_start}' AND CREATED_AT <= '{watermark_end}'".
     """
 
-    def __init__(self, registry_file="../config/update_registry.json", mv_registry_file="../config/materialized_views.json"):
+    WATERMARK_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+    DEFAULT_WATERMARK = "1970-01-01 00:00:00.000000"
+
+    def __init__(self, registry_file="../config/update_registry.json", mv_registry_file="../config/materialized_views.json", max_workers=4, prefetch_pages=2):
         """
         Initializes the registries and loads existing updates from JSON files if available.
         :param registry_file: Path to the JSON file storing the update registry.
         :param mv_registry_file: Path to the JSON file storing materialized view names.
+        :param max_workers: Maximum number of tables paged and loaded at the same time in concurrent mode.
+        :param prefetch_pages: Number of Flipside result pages fetched ahead of the loader.
         """
         load_dotenv()
 
         self.tally_proposal_fetcher = TallyProposalFetcher() 
         self.dao_forum_scraper = DAOForumScraper() 
+        self.bulk_loader = BulkLoader()
+        self.max_workers = max_workers
+        self.prefetch_pages = prefetch_pages
+        self.mv_refresh_scheduler = MvRefreshScheduler(self.get_db_config(), max_workers=max_workers)
 
         script_dir = os.path.dirname(os.path.abspath(__file__))
         self.registry_file = os.path.join(script_dir, registry_file)
         self.mv_registry_file = os.path.join(script_dir, mv_registry_file)
         self.registry = self.load_json(self.registry_file)
+        self.registry_lock = threading.Lock()
         self.materialized_views = self.load_json(self.mv_registry_file)  
 
     def load_json(self, file_path):
@@ -55,13 +76,15 @@ class UpdateRegistry:
         except Exception as e:
             print(f"Error saving JSON file {file_path}: {e}")
 
-    def register_table_update(self, table_name, update_query, columns, primary_key):
+    def register_table_update(self, table_name, update_query, columns, primary_key, watermark_column=None, lookback_hours=0):
         """
         Register a table and its update query, then save it to the JSON file.
         :param table_name: Name of the table to update.
         :param update_query: SQL query for updating the table.
         :param columns: Dictionary of column names and their data types.
         :param primary_key: Primary key of the table.
+        :param watermark_column: Timestamp column used to fetch only rows newer than the stored high-water mark.
+        :param lookback_hours: Hours subtracted from the high-water mark to pick up late-arriving rows.
         """
 
         self.registry[table_name] = {
@@ -69,8 +92,108 @@ class UpdateRegistry:
             "columns": columns,
             "primary_key": primary_key
         }
+        if watermark_column:
+            self.registry[table_name].update({
+                "watermark_column": watermark_column,
+                "lookback_hours": lookback_hours,
+                "watermark": None
+            })
         self.save_json(self.registry_file, self.registry)
 
+    def render_update_query(self, details, start, end):
+        """
+        Inject a watermark window into a table's update query template.
+        :param details: Registry entry of the table.
+        :param start: Exclusive lower bound of the window (datetime).
+        :param end: Inclusive upper bound of the window (datetime).
+        :return: SQL query ready to run on Flipside.
+        """
+        return (
+            details["update_query"]
+            .replace("{watermark_start}", start.strftime(self.WATERMARK_FORMAT))
+            .replace("{watermark_end}", end.strftime(self.WATERMARK_FORMAT))
+        )
+
+    def read_watermark(self, conn, table_name, details):
+        """
+        Return the high-water mark of a table, falling back to the newest value held in Postgres.
+        :param conn: An open psycopg2 connection.
+        :param table_name: Name of the table.
+        :param details: Registry entry of the table.
+        :return: The high-water mark as a datetime.
+        """
+        watermark = details.get("watermark")
+        if not watermark:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT MAX({details['watermark_column']}) FROM {table_name};")
+                latest = cur.fetchone()[0]
+            conn.rollback()
+            watermark = latest.strftime(self.WATERMARK_FORMAT) if latest else self.DEFAULT_WATERMARK
+        return datetime.strptime(watermark, self.WATERMARK_FORMAT)
+
+    def save_watermark(self, conn, table_name, details):
+        """
+        Store the newest watermark column value held in Postgres as the table's high-water mark.
+        :param conn: An open psycopg2 connection.
+        :param table_name: Name of the table.
+        :param details: Registry entry of the table.
+        """
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT MAX({details['watermark_column']}) FROM {table_name};")
+            latest = cur.fetchone()[0]
+        if latest is None:
+            return
+        with self.registry_lock:
+            details["watermark"] = latest.strftime(self.WATERMARK_FORMAT)
+            self.save_json(self.registry_file, self.registry)
+
+    def build_update_query(self, conn, table_name, details):
+        """
+        Build the query for a table's next run, limited to rows past its high-water mark when it has one.
+        :param conn: An open psycopg2 connection.
+        :param table_name: Name of the table.
+        :param details: Registry entry of the table.
+        :return: SQL query ready to run on Flipside.
+        """
+        if not details.get("watermark_column"):
+            return f"""{details["update_query"]}"""
+        start = self.read_watermark(conn, table_name, details) - timedelta(hours=details.get("lookback_hours", 0))
+        end = datetime.now(timezone.utc).replace(tzinfo=None)
+        return self.render_update_query(details, start, end)
+
+    def backfill_table(self, table_name, start, end, chunk_days=7):
+        """
+        Load an arbitrary time range for a watermarked table in bounded chunks,
+        committing each chunk separately.
+        :param table_name: Name of a table registered with a watermark column.
+        :param start: Exclusive lower bound of the range (datetime).
+        :param end: Inclusive upper bound of the range (datetime).
+        :param chunk_days: Size of each chunk in days.
+        :return: Total number of new rows inserted.
+        """
+        details = self.registry.get(table_name)
+        if not details or not details.get("watermark_column"):
+            print(f"Table '{table_name}' is not registered with a watermark column.")
+            return 0
+
+        total_rows = 0
+        flipside = self.create_flipside_client()
+        with psycopg2.connect(**self.get_db_config()) as conn:
+            chunk_start = start
+            while chunk_start < end:
+                chunk_end = min(chunk_start + timedelta(days=chunk_days), end)
+                print(f"Backfilling '{table_name}' from {chunk_start} to {chunk_end}")
+                update_query = self.render_update_query(details, chunk_start, chunk_end)
+                inserted_rows = self.update_table(conn, flipside, table_name, details, update_query=update_query)
+                if inserted_rows is None:
+                    break
+                total_rows += inserted_rows
+                chunk_start = chunk_end
+        conn.close()
+
+        print(f"Backfill for table '{table_name}' inserted {total_rows} rows.")
+        return total_rows
+
     def register_materialized_view(self, mv_name):
         """
         Register a materialized view name and save it to the JSON file.
@@ -81,13 +204,23 @@ class UpdateRegistry:
             self.save_json(self.mv_registry_file, self.materialized_views)
 
 
-    def execute_updates(self):
+    def create_flipside_client(self):
         """
-        Execute the update query for each registered table and refresh all materialized views.
+        Create a Flipside client from the API key in the environment.
+        :return: A Flipside client.
+        """
+        return Flipside(
+            os.getenv("FLIPSIDE_API_KEY"), 
+            "https://api-v2.flipsidecrypto.xyz"
+        )
+
+    def get_db_config(self):
+        """
+        Build the PostgreSQL connection settings from the environment.
+        :return: Dictionary of psycopg2 connection parameters.
         """
-        # Load database configuration from .env once
         load_dotenv()
-        db_config = {
+        return {
             "host": os.getenv("DATABASE_HOST"),
             "database": os.getenv("DATABASE_NAME"),
             "user": os.getenv("DATABASE_USER"),
@@ -95,58 +228,133 @@ class UpdateRegistry:
             "port": "5432"
         }
 
+    def update_table(self, conn, flipside, table_name, details, query_id=None, update_query=None):
+        """
+        Load the results of a table's update query inside its own transaction.
+        :param conn: An open psycopg2 connection used only for this table.
+        :param flipside: An initialized Flipside client.
+        :param table_name: Name of the table to update.
+        :param details: Registry entry of the table.
+        :param query_id: ID of an already submitted Flipside query run, if any.
+        :param update_query: Query to run instead of the one built from the registry entry.
+        :return: Number of new rows inserted, or None if the update failed.
+        """
+        columns = details["columns"]
+        primary_key = details["primary_key"]
+
         try:
+            if update_query is None and query_id is None:
+                update_query = self.build_update_query(conn, table_name, details)
+            stream = FlipsideResultStream(flipside, prefetch=self.prefetch_pages)
+            pages = stream.pages(sql=update_query, query_id=query_id)
+            inserted_rows = self.bulk_loader.load(conn, table_name, columns, primary_key, pages)
+            conn.commit()
+            if details.get("watermark_column"):
+                self.save_watermark(conn, table_name, details)
+                conn.rollback()
+            print(f"Update for table '{table_name}' executed successfully!")
+            return inserted_rows
+
+        except Exception as e:
+            conn.rollback()
+            print(f"Error updating table '{table_name}': {e}")
+            return None
+
+    def refresh_tables(self, conn):
+        """
+        Update every registered table one after another on a single connection.
+        :param conn: An open psycopg2 connection.
+        :return: Dictionary of table name to new rows inserted (None on failure).
+        """
+        results = {}
+        for table_name, details in self.registry.items():
+            flipside = self.create_flipside_client()
+            results[table_name] = self.update_table(conn, flipside, table_name, details)
+        return results
+
+    def refresh_tables_concurrently(self, db_config):
+        """
+        Update every registered table concurrently. All Flipside queries are submitted up front,
+        then each finished query is paged and loaded by a bounded worker pool where every table
+        gets its own pooled connection and transaction. A slow or failing table only affects itself.
+        :param db_config: Dictionary of psycopg2 connection parameters.
+        :return: Dictionary of table name to new rows inserted (None on failure).
+        """
+        results = {table_name: None for table_name in self.registry}
+        if not self.registry:
+            return results
+
+        flipside_clients = {table_name: self.create_flipside_client() for table_name in self.registry}
+        connection_pool = pool.ThreadedConnectionPool(1, self.max_workers, **db_config)
+
+        def load_table(table_name, details, query_id):
+            conn = connection_pool.getconn()
+            try:
+                return self.update_table(conn, flipside_clients[table_name], table_name, details, query_id=query_id)
+            finally:
+                connection_pool.putconn(conn)
+
+        try:
+            update_queries = {}
+            conn = connection_pool.getconn()
+            try:
+                for table_name, details in self.registry.items():
+                    try:
+                        update_queries[table_name] = self.build_update_query(conn, table_name, details)
+                    except Exception as e:
+                        conn.rollback()
+                        print(f"Error building update query for table '{table_name}': {e}")
+            finally:
+                connection_pool.putconn(conn)
+
+            with ThreadPoolExecutor(max_workers=len(self.registry)) as submit_executor, \
+                    ThreadPoolExecutor(max_workers=self.max_workers) as load_executor:
+                query_futures = {
+                    submit_executor.submit(FlipsideResultStream(flipside_clients[table_name]).submit, update_query): table_name
+                    for table_name, update_query in update_queries.items()
+                }
+
+                load_futures = {}
+                for future in as_completed(query_futures):
+                    table_name = query_futures[future]
+                    try:
+                        query_id = future.result()
+                    except Exception as e:
+                        print(f"Error querying Flipside for table '{table_name}': {e}")
+                        continue
+                    load_futures[load_executor.submit(load_table, table_name, self.registry[table_name], query_id)] = table_name
+
+                for future in as_completed(load_futures):
+                    table_name = load_futures[future]
+                    try:
+                        results[table_name] = future.result()
+                    except Exception as e:
+                        print(f"Error updating table '{table_name}': {e}")
+        finally:
+            connection_pool.closeall()
+
+        return results
+
+    def execute_updates(self, concurrent=False):
+        """
+        Execute the update query for each registered table and refresh the materialized views that depend on changed tables.
+        :param concurrent: Update the registered tables in parallel instead of one after another.
+        """
+        db_config = self.get_db_config()
+
+        try:
+            if concurrent:
+                table_changes = self.refresh_tables_concurrently(db_config)
+
             # Establish a single database connection
             with psycopg2.connect(**db_config) as conn:
                 with conn.cursor() as cur:
-                    # Loop through all registered tables and execute updates
-                    for table_name, details in self.registry.items():
-                        update_query = f"""{details["update_query"]}"""
-                        columns = details["columns"]
-                        primary_key = details["primary_key"]
-
-                        flipside = Flipside(
-                            os.getenv("FLIPSIDE_API_KEY"), 
-                            "https://api-v2.flipsidecrypto.xyz"
-                        )
-                        try:
-                            query_result_set = flipside.query(update_query, page_number=1, page_size=1)
-                            all_rows = []
-                            current_page_number = 1
-                            total_pages = 2
-
-                            while current_page_number <= total_pages:
-                                results = flipside.get_query_results(
-                                    query_result_set.query_id,
-                                    page_number=current_page_number,
-                                    page_size=1000
-                                )
-                                total_pages = results.page.totalPages
-                                if results.records:
-                                    all_rows.extend(results.records)
-                                current_page_number += 1
-
-                            col_names = ", ".join(columns.keys())
-                            placeholders = ", ".join(["%s"] * len(columns))
-                            insert_sql = f"""
-                            INSERT INTO {table_name} ({col_names})
-                            VALUES ({placeholders})
-                            ON CONFLICT ({primary_key}) DO NOTHING;
-                            """
-                            for row in all_rows:
-                                cur.execute(insert_sql, tuple(row[col] for col in columns.keys()))
-                            conn.commit()
-                            print(f"Update for table '{table_name}' executed successfully!")
-
-                        except Exception as e:
-                            print(f"Error updating table '{table_name}': {e}")
-
-                    # Refresh all registered materialized views
-                    for mv_name in self.materialized_views:
-                        cur.execute(f"REFRESH MATERIALIZED VIEW {mv_name};")
-                        conn.commit()
-                        print(f"Materialized view '{mv_name}' refreshed successfully!")
-                    
+                    if not concurrent:
+                        table_changes = self.refresh_tables(conn)
+
+                    # Refresh registered materialized views whose source tables changed
+                    self.mv_refresh_scheduler.refresh(self.materialized_views, table_changes)
+
                     # Add new active Tally proposals to database
                     self.tally_proposal_fetcher.insert_proposals() 
                     print("Tally proposals added successfully") 